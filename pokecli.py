@@ -44,7 +44,14 @@ from pokemongo_bot import PokemonGoBot, TreeConfigBuilder
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.health_record import BotEvent
 from pokemongo_bot.plugin_loader import PluginLoader
-from pokemongo_bot.api_wrapper import PermaBannedException
+from pokemongo_bot.api_wrapper import PermaBannedException, CircuitOpenException
+from pokemongo_bot.retry_policy import RetryPolicy, circuit_breakers_for
+from pokemongo_bot.benchmark import Benchmark
+from pokemongo_bot.multi_account import MultiAccountRunner, account_configs
+from pokemongo_bot.supervisor import Supervisor
+from pokemongo_bot.config_watcher import ConfigWatcher
+from pokemongo_bot.api_stats import format_summary
+from pokemongo_bot import clock
 
 try:
     from demjson import jsonlint
@@ -61,7 +68,8 @@ logging.basicConfig(
 logger = logging.getLogger('cli')
 logger.setLevel(logging.INFO)
 
-class SIGINTRecieved(Exception): pass
+# not an Exception, the handlers of failing bots let it through
+class SIGINTRecieved(BaseException): pass
 
 def main():
     bot = False
@@ -70,6 +78,12 @@ def main():
         raise SIGINTRecieved
     signal.signal(signal.SIGINT, handle_sigint)
 
+    def handle_sigusr1(*args):
+        if bot:
+            bot.request_task_profile()
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, handle_sigusr1)
+
     try:
         logger.info('PokemonGO Bot v1.0')
         sys.stdout = codecs.getwriter('utf8')(sys.stdout)
@@ -80,14 +94,34 @@ def main():
             return
 
         logger.info('Configuration initialized')
+        if config.benchmark:
+            run_benchmark(config)
+            return
+
         health_record = BotEvent(config)
         health_record.login_success()
 
+        if config.accounts and config.supervisor_workers:
+            run_supervisor(config)
+            return
+        if config.accounts:
+            run_accounts(config, health_record)
+            return
+
         finished = False
+        retry_policy = RetryPolicy(
+            max_retries=config.api_max_retries,
+            base_delay=config.api_retry_base_delay,
+            max_delay=config.api_retry_max_delay
+        )
+        # outlive the bots re-created on reconnect, so do the paused request types
+        circuit_breakers = circuit_breakers_for(config)
+        reconnect_delay = None
+        config_watcher = watch_config(config)
 
         while not finished:
             try:
-                bot = PokemonGoBot(config)
+                bot = PokemonGoBot(config, circuit_breakers=circuit_breakers)
                 bot.start()
                 tree = TreeConfigBuilder(bot, config.raw_tasks).build()
                 bot.workers = tree
@@ -101,8 +135,33 @@ def main():
                     formatted='Starting bot...'
                 )
 
-                while True:
-                    bot.tick()
+                try:
+                    while True:
+                        if config_watcher is not None and config_watcher.changed():
+                            new_config = reload_config(config)
+                            if new_config is not None:
+                                bot.reload_config(new_config)
+                        try:
+                            bot.tick()
+                        except CircuitOpenException as e:
+                            # the tasks skip the paused request types, the tick
+                            # itself can't do without them: wait, keeping the session
+                            bot.event_manager.emit(
+                                'api_error',
+                                sender=bot,
+                                level='info',
+                                formatted='Server keeps failing, resuming in {:.0f} seconds'.format(e.retry_after)
+                            )
+                            time.sleep(e.retry_after)
+                            continue
+                        reconnect_delay = None
+                finally:
+                    # the next bot starts from what this one knew, without hiding
+                    # why this one stopped if saving fails
+                    try:
+                        bot.save_snapshot(background=False)
+                    except Exception as e:
+                        logger.warning('Error saving the snapshot to {}: {}'.format(bot.snapshot.path, e))
 
             except KeyboardInterrupt:
                 bot.event_manager.emit(
@@ -123,21 +182,36 @@ def main():
                     formatted='Log logged in, reconnecting in {:d}'.format(wait_time)
                 )
                 time.sleep(wait_time)
+            except CircuitOpenException as e:
+                bot.event_manager.emit(
+                    'api_error',
+                    sender=bot,
+                    level='info',
+                    formatted='Server keeps failing, reconnecting in {:.0f} seconds'.format(e.retry_after)
+                )
+                time.sleep(e.retry_after)
             except ServerBusyOrOfflineException:
+                reconnect_delay = retry_policy.next_delay(reconnect_delay)
                 bot.event_manager.emit(
                     'api_error',
                     sender=bot,
                     level='info',
-                    formatted='Server busy or offline'
+                    formatted='Server busy or offline, reconnecting in {:.0f} seconds'.format(reconnect_delay)
                 )
+                time.sleep(reconnect_delay)
             except ServerSideRequestThrottlingException:
+                reconnect_delay = retry_policy.next_delay(reconnect_delay)
                 bot.event_manager.emit(
                     'api_error',
                     sender=bot,
                     level='info',
-                    formatted='Server is throttling, reconnecting in 30 seconds'
+                    formatted='Server is throttling, reconnecting in {:.0f} seconds'.format(reconnect_delay)
                 )
-                time.sleep(30)
+                time.sleep(reconnect_delay)
+            finally:
+                # the next bot attaches its own profiler to the process-wide clock
+                if bot:
+                    bot.profiler.detach()
 
     except PermaBannedException:
          bot.event_manager.emit(
@@ -166,29 +240,79 @@ def main():
     finally:
         # Cache here on SIGTERM, or Exception.  Check data is available and worth caching.
         if bot:
-            if bot.recent_forts[-1] is not None and bot.config.forts_cache_recent_forts:
-                cached_forts_path = os.path.join(
-                    _base_dir, 'data', 'recent-forts-%s.json' % bot.config.username
-                )
-                try:
-                    with open(cached_forts_path, 'w') as outfile:
-                        json.dump(bot.recent_forts, outfile)
-                    bot.event_manager.emit(
-                        'cached_fort',
-                        sender=bot,
-                        level='debug',
-                        formatted='Forts cached.',
-                    )
-                except IOError as e:
-                    bot.event_manager.emit(
-                        'error_caching_forts',
-                        sender=bot,
-                        level='debug',
-                        formatted='Error caching forts for {path}',
-                        data={'path': cached_forts_path}
-                        )
+            try:
+                bot.fort_cache.save()
+            except IOError:
+                logger.warning('Error saving the fort details to {}'.format(bot.fort_cache.path))
+            bot.save_recent_forts()
+
+
+
+def run_accounts(config, health_record):
+    runner = MultiAccountRunner(account_configs(config), PokemonGoBot, health_record)
+
+    def handle_sigusr1(*args):
+        for bot in runner.bots():
+            bot.request_task_profile()
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, handle_sigusr1)
+
+    config_watcher = watch_config(config)
+
+    def reload_configs():
+        if config_watcher is None or not config_watcher.changed():
+            return None
+        new_config = reload_config(config)
+        return account_configs(new_config) if new_config is not None else None
+
+    try:
+        runner.run(reload_configs)
+    finally:
+        for bot in runner.bots():
+            report_summary(bot)
+
+def watch_config(config):
+    if config.config_reload_interval <= 0 or config.config_path is None:
+        return None
+    return ConfigWatcher(config.config_path, interval=config.config_reload_interval)
+
+def reload_config(config):
+    """
+    Parses the changed config file again, with the same command line.
+    :return: The new configuration, None if it is invalid.
+    """
+    try:
+        new_config = init_config(interactive=False)
+    except SystemExit:
+        new_config = None
+    if new_config is None:
+        logger.warning('Keeping the current configuration, the new one is invalid')
+        return None
+
+    # typed in at start
+    new_config.username = new_config.username or config.username
+    new_config.password = new_config.password or config.password
+    return new_config
 
+def run_supervisor(config):
+    supervisor = Supervisor(account_configs(config), PokemonGoBot, BotEvent, workers=config.supervisor_workers,
+                            metrics_interval=config.supervisor_metrics_interval)
+    supervisor.run()
 
+def run_benchmark(config):
+    clock.set_clock(clock.VirtualClock())
+    config.health_record = False
+    # background calls would make the order of the replayed responses random
+    config.api_async_workers = 0
+
+    bot = PokemonGoBot(config)
+    bot.start()
+    bot.workers = TreeConfigBuilder(bot, config.raw_tasks).build()
+    bot.health_record = BotEvent(config)
+
+    benchmark = Benchmark(bot, ticks=config.benchmark_ticks)
+    benchmark.run()
+    benchmark.report()
 
 def report_summary(bot):
     if bot.metrics.start_time is None:
@@ -211,8 +335,13 @@ def report_summary(bot):
         logger.info('Highest CP Pokemon: {}'.format(metrics.highest_cp['desc']))
     if metrics.most_perfect is not None:
         logger.info('Most Perfect Pokemon: {}'.format(metrics.most_perfect['desc']))
+    response_cache = bot.api.response_cache
+    logger.info('API cache: {} hits, {} misses ({:.0%} hit ratio)'.format(
+        response_cache.hits, response_cache.misses, response_cache.hit_ratio()))
+    for request_type, stats in bot.api.stats.summary():
+        logger.info(format_summary(request_type, stats))
 
-def init_config():
+def init_config(interactive=True):
     parser = argparse.ArgumentParser()
     config_file = os.path.join(_base_dir, 'configs', 'config.json')
     web_dir = "web"
@@ -237,10 +366,13 @@ def init_config():
     parser.add_argument("-cf", "--config", help="Config File to use")
     config_arg = parser.parse_known_args() and parser.parse_known_args()[0].config or None
 
+    config_path = None
     if config_arg and os.path.isfile(config_arg):
+        config_path = config_arg
         _json_loader(config_arg)
     elif os.path.isfile(config_file):
         logger.info('No config argument specified, checking for /configs/config.json')
+        config_path = config_file
         _json_loader(config_file)
     else:
         logger.info('Error: No /configs/config.json or specified config')
@@ -432,6 +564,54 @@ def init_config():
         type=bool,
         default=True,
     )
+    add_config(
+        parser,
+        load,
+        long_flag="--forts.details_cache_size",
+        help="Maximum number of fort details kept in the cache",
+        type=int,
+        default=2000,
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--forts.details_cache_ttl",
+        help="Seconds to keep fort details in the cache",
+        type=int,
+        default=7 * 24 * 3600,
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--forts.details_retry_delay",
+        help="Seconds to wait before looking up the details of a fort again after a failure",
+        type=int,
+        default=300,
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--forts.prefetch_details",
+        help="Number of nearby forts whose details are looked up in the background, 0 to disable",
+        type=int,
+        default=5,
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--snapshot_interval",
+        help="Seconds between snapshots of the world state used to restart quickly, 0 to disable",
+        type=int,
+        default=60,
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--snapshot_max_age",
+        help="Start from scratch if the last snapshot is older than this many seconds",
+        type=int,
+        default=900,
+    )
     add_config(
         parser,
         load,
@@ -496,13 +676,175 @@ def init_config():
         type=float,
         default=2.5
     )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.requests_per_second",
+        help="Maximum number of requests per second sent to the server",
+        type=float,
+        default=2.0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.burst",
+        help="Number of requests that can be sent back to back before the rate limit applies",
+        type=int,
+        default=1
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.max_retries",
+        help="Number of times a failed request is retried before giving up",
+        type=int,
+        default=15
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.retry_base_delay",
+        help="Shortest wait in seconds before retrying a failed request",
+        type=float,
+        default=1.0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.retry_max_delay",
+        help="Longest wait in seconds before retrying a failed request",
+        type=float,
+        default=30.0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.breaker_failed_calls",
+        help="Consecutive requests of a type failing all their api.max_retries retries before the type is paused",
+        type=int,
+        default=2
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.breaker_reset_timeout",
+        help="Seconds a failing request type stays paused before it is tried again",
+        type=float,
+        default=60.0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.async_workers",
+        help="Number of threads running independent API calls in the background, 0 runs them inline",
+        type=int,
+        default=2
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.starvation_timeout",
+        help="Seconds a waiting request is promoted to the next higher priority after",
+        type=float,
+        default=10.0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.stats_interval",
+        help="Seconds between summaries of the API latency and rate limiting statistics, 0 to disable",
+        type=int,
+        default=600
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api.record",
+        help="Record every API request and response to this file, for use with --benchmark",
+        type=str,
+        default=None
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--benchmark",
+        help="Replay a file recorded with --api.record offline and report the bot's throughput",
+        type=str,
+        default=None
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--benchmark_ticks",
+        help="Number of ticks to run in benchmark mode",
+        type=int,
+        default=1000
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--profile.window",
+        help="Number of recent runs of each task kept by the task profiler",
+        type=int,
+        default=1000
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--profile.export_path",
+        help="Periodically write the task profile to this JSON file",
+        type=str,
+        default=None
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--profile.export_interval",
+        help="Seconds between exports of the task profile",
+        type=int,
+        default=60
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--profile.cprofile_task",
+        help="Run the task of this type (e.g. MoveToFort) under cProfile",
+        type=str,
+        default=None
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--config_reload_interval",
+        help="Seconds between checks of the config file, its changes are applied without restarting. 0 to disable",
+        type=float,
+        default=5
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--supervisor.workers",
+        help="Run the accounts on this many processes, 0 runs them all in this process",
+        type=int,
+        default=0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--supervisor.metrics_interval",
+        help="Seconds between reports of the metrics of all the accounts",
+        type=int,
+        default=300
+    )
     # Start to parse other attrs
     config = parser.parse_args()
-    if not config.username and 'username' not in load:
-        config.username = raw_input("Username: ")
-    if not config.password and 'password' not in load:
-        config.password = getpass("Password: ")
+    if interactive and not config.benchmark and not load.get('accounts'):
+        if not config.username and 'username' not in load:
+            config.username = raw_input("Username: ")
+        if not config.password and 'password' not in load:
+            config.password = getpass("Password: ")
 
+    config.config_path = config_path
     config.persistent = load.get('persistent', {})
     config.encrypt_location = load.get('encrypt_location','')
 
@@ -510,8 +852,12 @@ def init_config():
     config.release = load.get('release', {})
     config.plugins = load.get('plugins', [])
     config.raw_tasks = load.get('tasks', [])
+    config.accounts = load.get('accounts', [])
     config.daily_catch_limit = load.get('daily_catch_limit', 800)
     config.vips = load.get('vips', {})
+    config.api_request_rates = load.get('api', {}).get('request_rates', {})
+    config.api_cache_ttl = load.get('api', {}).get('cache_ttl', {})
+    config.api_request_priorities = load.get('api', {}).get('request_priorities', {})
 
     if config.map_object_cache_time < 0.0:
         parser.error("--map_object_cache_time is out of range! (should be >= 0.0)")
@@ -570,6 +916,47 @@ def init_config():
             raise
 
     fix_nested_config(config)
+
+    if config.api_requests_per_second <= 0.0:
+        parser.error("--api.requests_per_second is out of range! (should be > 0.0)")
+        return None
+
+    if config.api_retry_base_delay <= 0.0 or config.api_retry_max_delay < config.api_retry_base_delay:
+        parser.error("--api.retry_base_delay and --api.retry_max_delay are out of range! (should be 0.0 < base <= max)")
+        return None
+
+    if config.api_async_workers < 0:
+        parser.error("--api.async_workers is out of range! (should be >= 0)")
+        return None
+
+    if config.api_starvation_timeout <= 0.0:
+        parser.error("--api.starvation_timeout is out of range! (should be > 0.0)")
+        return None
+
+    if any(p.lower() not in ('critical', 'normal', 'background') for p in config.api_request_priorities.values()):
+        parser.error("api.request_priorities must be one of critical, normal or background")
+        return None
+
+    if config.forts_details_cache_size <= 0:
+        parser.error("--forts.details_cache_size is out of range! (should be > 0)")
+        return None
+
+    if config.benchmark_ticks <= 0:
+        parser.error("--benchmark_ticks is out of range! (should be > 0)")
+        return None
+
+    if any('username' not in account or 'password' not in account for account in config.accounts):
+        parser.error("every entry of accounts needs a username and a password")
+        return None
+
+    if config.profile_window <= 0:
+        parser.error("--profile.window is out of range! (should be > 0)")
+        return None
+
+    if config.supervisor_workers < 0:
+        parser.error("--supervisor.workers is out of range! (should be >= 0)")
+        return None
+
     return config
 
 def add_config(parser, json_config, short_flag=None, long_flag=None, **kwargs):
@@ -9,18 +9,31 @@ import random
 import re
 import sys
 import time
-import Queue
-import threading
 
 from geopy.geocoders import GoogleV3
 from pgoapi import PGoApi
 from pgoapi.utilities import f2i, get_cell_ids
 
 import cell_workers
+import clock
+import static_data
 from base_task import BaseTask
 from plugin_loader import PluginLoader
 from api_wrapper import ApiWrapper
-from cell_workers.utils import distance
+from api_recorder import ApiRecorder, ApiRecording, RecordingApiWrapper, ReplayApiWrapper
+from rate_limiter import RateLimiter, BACKGROUND
+from map_cells import MapCellStore
+from spatial_index import SpatialIndex
+from fort_cache import FortCache
+from snapshot import SnapshotWriter, load_snapshot
+from task_scheduler import TaskScheduler
+from task_profiler import TaskProfiler, format_summary as format_task_summary
+from constants import Constants
+from response_cache import ResponseCache
+from retry_policy import RetryPolicy, circuit_breakers_for
+from api_stats import format_summary
+from async_api import AsyncApi
+from cell_workers.utils import distances, prefetch_fort_details
 from event_manager import EventManager
 from human_behaviour import sleep
 from item_list import Item
@@ -30,14 +43,17 @@ from pokemongo_bot.socketio_server.runner import SocketIoRunner
 from pokemongo_bot.websocket_remote_control import WebsocketRemoteControl
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.datastore import _init_database, Datastore
-from worker_result import WorkerResult
 from tree_config_builder import ConfigException, MismatchTaskApiVersion, TreeConfigBuilder
-from inventory import init_inventory
+from inventory import init_inventory, get_inventory, set_inventory
+from web_updater import WebUpdater
 from sys import platform as _platform
 import struct
 
-
 class PokemonGoBot(Datastore):
+    # Settings the tasks read when they use them, reload_config applies them while running
+    LIVE_SETTINGS = ('catch', 'release', 'vips', 'daily_catch_limit', 'walk_max', 'walk_min', 'alt_min', 'alt_max',
+                     'distance_unit')
+
     @property
     def position(self):
         return self.api._position_lat, self.api._position_lng, 0
@@ -55,50 +71,85 @@ class PokemonGoBot(Datastore):
         """
         return self._player
 
-    def __init__(self, config):
+    def __init__(self, config, shared=None, circuit_breakers=None):
+        """
+        :param shared: State shared by the bots of several accounts running in
+        this process, see multi_account.SharedState.
+        :param circuit_breakers: The CircuitBreakers of the account, kept by the
+        caller so that the bots re-created on reconnect keep pausing the
+        failing request types.
+        """
 
         # Database connection MUST be setup before migrations will work
         self.database = _init_database('/data/{}.db'.format(config.username))
 
         self.config = config
+        self.shared = shared
+        self.circuit_breakers = circuit_breakers or circuit_breakers_for(config)
         super(PokemonGoBot, self).__init__()
 
         self.fort_timeouts = dict()
-        self.pokemon_list = json.load(
-            open(os.path.join(_base_dir, 'data', 'pokemon.json'))
-        )
-        self.item_list = json.load(open(os.path.join(_base_dir, 'data', 'items.json')))
+        self.pokemon_list = static_data.load('pokemon.json')
+        self.item_list = static_data.load('items.json')
         self.metrics = Metrics(self)
         self.latest_inventory = None
         self.cell = None
+        self._indexed_cell = None
+        self._cell_indexes = {}
         self.recent_forts = [None] * config.forts_max_circle_size
+        if shared is not None:
+            self.fort_cache = shared.fort_cache
+        else:
+            self.fort_cache = FortCache(
+                path=os.path.join(_base_dir, 'data', 'fort-details-%s.json' % config.username),
+                max_size=config.forts_details_cache_size,
+                ttl=config.forts_details_cache_ttl,
+                retry_delay=config.forts_details_retry_delay
+            )
+        self.inventory = None
         self.tick_count = 0
         self.softban = False
         self.start_position = None
         self.last_map_object = None
         self.last_time_map_object = 0
+        self.map_cells = MapCellStore()
         self.logger = logging.getLogger(type(self).__name__)
 
         # Make our own copy of the workers for this instance
         self.workers = []
+        self.profiler = TaskProfiler(window=self.config.profile_window, cprofile_task=self.config.profile_cprofile_task)
+        self.scheduler = TaskScheduler(self, self.profiler)
+        self.last_profile_export = time.time()
+        self.task_profile_requested = False
 
         # Theading setup for file writing
-        self.web_update_queue = Queue.Queue(maxsize=1)
-        self.web_update_thread = threading.Thread(target=self.update_web_location_worker)
-        self.web_update_thread.start()
+        self.web_updater = shared.web_updater if shared is not None else WebUpdater()
 
         # Heartbeat limiting
         self.heartbeat_threshold = self.config.heartbeat_threshold
         self.heartbeat_counter = 0
-        self.last_heartbeat = time.time()
+        self.last_heartbeat = clock.now()
+
+        self.last_api_stats = time.time()
+
+        # World state snapshots for warm restarts
+        self.snapshot = SnapshotWriter(os.path.join(_base_dir, 'data', 'snapshot-%s.bin' % self.config.username))
+        self.last_snapshot = time.time()
+        self.started_at = None
+        self.warm_start = False
+        self.first_useful_tick = None
+        self._restored_task_state = None
 
 
     def start(self):
+        self.started_at = time.time()
         self._setup_event_system()
         self._setup_logging()
         self._setup_api()
         self._load_recent_forts()
-        init_inventory(self)
+        self._load_fort_cache()
+        snapshot = self._load_snapshot()
+        self.inventory = init_inventory(self, snapshot['inventory_items'] if snapshot else None)
         self.display_player_info()
         self._print_character_info()
         if self.config.pokemon_bag_show_at_start and self.config.pokemon_bag_pokemon_info:
@@ -120,7 +171,8 @@ class PokemonGoBot(Datastore):
 
             websocket_handler = SocketIoHandler(
                 self,
-                self.config.websocket_server_url
+                self.config.websocket_server_url,
+                sio=self.shared.socketio_client(self.config.websocket_server_url) if self.shared is not None else None
             )
             handlers.append(websocket_handler)
 
@@ -146,7 +198,16 @@ class PokemonGoBot(Datastore):
             parameters=('position', 'location')
         )
         self.event_manager.register_event('api_error')
+        self.event_manager.register_event(
+            'api_call',
+            parameters=('request_types', 'latency', 'throttle_wait', 'retries', 'response_size')
+        )
+        self.event_manager.register_event('api_stats', parameters=('summary', 'stats'))
+        self.event_manager.register_event('task_profile', parameters=('summary', 'tasks'))
+        self.event_manager.register_event('snapshot_loaded', parameters=('age', ))
+        self.event_manager.register_event('first_useful_tick', parameters=('seconds', 'start_type'))
         self.event_manager.register_event('config_error')
+        self.event_manager.register_event('config_reloaded', parameters=('kept', 'rebuilt', 'restart_needed'))
 
         self.event_manager.register_event('login_started')
         self.event_manager.register_event('login_failed')
@@ -513,9 +574,11 @@ class PokemonGoBot(Datastore):
 
     def tick(self):
         self.health_record.heartbeat()
+        self.api.coalescer.new_window()
         self.cell = self.get_meta_cell()
+        self._report_first_useful_tick()
 
-        now = time.time() * 1000
+        now = clock.now() * 1000
 
         for fort in self.cell["forts"]:
             timeout = fort.get("cooldown_complete_timestamp_ms", 0)
@@ -523,14 +586,211 @@ class PokemonGoBot(Datastore):
             if timeout >= now:
                 self.fort_timeouts[fort["id"]] = timeout
 
+        self._prefetch_fort_details()
+
         self.tick_count += 1
+        self._report_api_stats()
+        self._report_task_profile()
+        self._restore_task_state()
+        if time.time() - self.last_snapshot >= self.config.snapshot_interval > 0:
+            self.save_snapshot()
 
         # Check if session token has expired
         self.check_session(self.position[0:2])
 
+        self.scheduler.run(self.workers)
+
+    def reload_config(self, config):
+        """
+        Applies a new version of the configuration, between two ticks. Tasks
+        whose config changed are built again, the others keep their state.
+        Only the tasks and LIVE_SETTINGS are applied, the other settings need
+        a restart.
+
+        :return: False if the new tasks can't be built, the current ones keep running.
+        """
+        try:
+            workers = TreeConfigBuilder(self, config.raw_tasks).build(previous=self.workers)
+        except (ConfigException, MismatchTaskApiVersion) as e:
+            self.event_manager.emit(
+                'config_error',
+                sender=self,
+                level='warning',
+                formatted='Keeping the current tasks, the new ones are invalid: {}'.format(e)
+            )
+            return False
+
+        kept = [worker for worker in workers if worker in self.workers]
+        restart_needed = sorted(
+            key for key, value in vars(config).iteritems()
+            if key not in self.LIVE_SETTINGS and key != 'raw_tasks' and getattr(self.config, key, None) != value
+        )
+        self.config.raw_tasks = config.raw_tasks
+        for key in self.LIVE_SETTINGS:
+            setattr(self.config, key, getattr(config, key))
+        self.workers = workers
+
+        self.event_manager.emit(
+            'config_reloaded',
+            sender=self,
+            level='info',
+            formatted='Configuration reloaded: {kept} tasks kept, {rebuilt} rebuilt. Needing a restart: {restart_needed}',
+            data={
+                'kept': len(kept),
+                'rebuilt': len(workers) - len(kept),
+                'restart_needed': ', '.join(restart_needed) or 'nothing'
+            }
+        )
+        return True
+
+    def capture_snapshot(self):
+        """
+        :return: The world state needed to restart without fetching everything again.
+        :rtype: dict
+        """
+        inventory = get_inventory()
+        tasks = {}
         for worker in self.workers:
-            if worker.work() == WorkerResult.RUNNING:
-                return
+            state = worker.get_state()
+            if state is not None:
+                tasks[type(worker).__name__] = state
+
+        return {
+            'fort_timeouts': dict(self.fort_timeouts),
+            'recent_forts': list(self.recent_forts),
+            'map_cells': self.map_cells,
+            'fort_details': self.fort_cache.entries(),
+            'inventory_items': inventory.inventory_items if inventory else None,
+            'tasks': tasks
+        }
+
+    def save_snapshot(self, background=True):
+        """
+        Saves the world state for the next start.
+        :return: False if there was nothing to save or the previous snapshot is still being written.
+        """
+        self.last_snapshot = time.time()
+        if not self.tick_count or self.api.offline:
+            return False
+        return self.snapshot.save(self.capture_snapshot(), background)
+
+    def _load_snapshot(self):
+        if self.api.offline or self.config.snapshot_interval <= 0:
+            return None
+
+        snapshot = load_snapshot(self.snapshot.path, max_age=self.config.snapshot_max_age)
+        if snapshot is None:
+            return None
+
+        now = clock.now() * 1000
+        self.fort_timeouts.update(
+            (fort_id, timeout) for fort_id, timeout in snapshot['fort_timeouts'].iteritems() if timeout >= now)
+        if len(snapshot['recent_forts']) == len(self.recent_forts):
+            self.recent_forts = snapshot['recent_forts']
+        # the first map request will only ask for what changed since
+        self.map_cells = snapshot['map_cells']
+        self.fort_cache.restore(snapshot['fort_details'])
+        self._restored_task_state = snapshot['tasks']
+        self.warm_start = True
+
+        self.event_manager.emit(
+            'snapshot_loaded',
+            sender=self,
+            level='debug',
+            formatted='Restored the world state saved {age:.0f}s ago',
+            data={'age': time.time() - snapshot['saved_at']}
+        )
+        return snapshot
+
+    def _restore_task_state(self):
+        # tasks are built after start(), so their state is restored on the first tick
+        if not self._restored_task_state:
+            return
+
+        for worker in self.workers:
+            state = self._restored_task_state.get(type(worker).__name__)
+            if state is not None:
+                worker.set_state(state)
+        self._restored_task_state = None
+
+    def _report_first_useful_tick(self):
+        if self.first_useful_tick is not None or self.started_at is None:
+            return
+        if not (self.cell['forts'] or self.cell['wild_pokemons'] or self.cell['catchable_pokemons']):
+            return
+
+        self.first_useful_tick = time.time() - self.started_at
+        self.event_manager.emit(
+            'first_useful_tick',
+            sender=self,
+            level='info',
+            formatted='Found the first forts or pokemon {seconds:.1f}s after starting ({start_type} start)',
+            data={'seconds': self.first_useful_tick, 'start_type': 'warm' if self.warm_start else 'cold'}
+        )
+
+    def _emit_api_call(self, **data):
+        data['request_types'] = ', '.join(data['request_types'])
+        self.event_manager.emit(
+            'api_call',
+            sender=self,
+            level='debug',
+            formatted='{request_types} took {latency:.3f}s, waited {throttle_wait:.3f}s for the rate limiter',
+            data=data
+        )
+
+    def _report_api_stats(self):
+        interval = self.config.api_stats_interval
+        if not interval or time.time() - self.last_api_stats < interval:
+            return
+        self.last_api_stats = time.time()
+
+        stats = self.api.stats.summary()
+        if not stats:
+            return
+        self.event_manager.emit(
+            'api_stats',
+            sender=self,
+            level='info',
+            formatted='{summary}',
+            data={
+                'summary': ' | '.join(format_summary(t, s) for t, s in stats[:5]),
+                'stats': dict(stats)
+            }
+        )
+
+    def request_task_profile(self):
+        """
+        Reports the task profile on the next tick, safe to call from a signal handler.
+        """
+        self.task_profile_requested = True
+
+    def _report_task_profile(self):
+        if self.config.profile_export_path and \
+                time.time() - self.last_profile_export >= self.config.profile_export_interval:
+            self.last_profile_export = time.time()
+            try:
+                self.profiler.export(self.config.profile_export_path)
+            except (IOError, OSError) as e:
+                self.logger.warning('Error exporting the task profile: {}'.format(e))
+
+        if not self.task_profile_requested:
+            return
+        self.task_profile_requested = False
+
+        tasks = self.profiler.summary()
+        self.event_manager.emit(
+            'task_profile',
+            sender=self,
+            level='info',
+            formatted='{summary}',
+            data={
+                'summary': ' | '.join(format_task_summary(name, summary) for name, summary in tasks),
+                'tasks': dict(tasks)
+            }
+        )
+        cprofile_stats = self.profiler.cprofile_stats()
+        if cprofile_stats:
+            self.logger.info(cprofile_stats)
 
     def get_meta_cell(self):
         location = self.position[0:2]
@@ -541,27 +801,15 @@ class PokemonGoBot(Datastore):
         wild_pokemons = []
         catchable_pokemons = []
         for cell in cells:
-            if "forts" in cell and len(cell["forts"]):
-                forts += cell["forts"]
-            if "wild_pokemons" in cell and len(cell["wild_pokemons"]):
-                wild_pokemons += cell["wild_pokemons"]
-            if "catchable_pokemons" in cell and len(cell["catchable_pokemons"]):
-                catchable_pokemons += cell["catchable_pokemons"]
-
-        # If there are forts present in the cells sent from the server or we don't yet have any cell data, return all data retrieved
-        if len(forts) > 1 or not self.cell:
-            return {
-                "forts": forts,
-                "wild_pokemons": wild_pokemons,
-                "catchable_pokemons": catchable_pokemons
-            }
-        # If there are no forts present in the data from the server, keep our existing fort data and only update the pokemon cells.
-        else:
-            return {
-                "forts": self.cell["forts"],
-                "wild_pokemons": wild_pokemons,
-                "catchable_pokemons": catchable_pokemons
-            }
+            forts += cell["forts"]
+            wild_pokemons += cell["wild_pokemons"]
+            catchable_pokemons += cell["catchable_pokemons"]
+
+        return {
+            "forts": forts,
+            "wild_pokemons": wild_pokemons,
+            "catchable_pokemons": catchable_pokemons
+        }
 
     def update_web_location(self, cells=[], lat=None, lng=None, alt=None):
         # we can call the function with no arguments and still get the position
@@ -610,7 +858,7 @@ class PokemonGoBot(Datastore):
 
     def find_close_cells(self, lat, lng):
         cellid = get_cell_ids(lat, lng)
-        timestamp = [0, ] * len(cellid)
+        timestamp = self.map_cells.timestamps(cellid)
         response_dict = self.get_map_objects(lat, lng, timestamp, cellid)
         map_objects = response_dict.get(
             'responses', {}
@@ -619,15 +867,18 @@ class PokemonGoBot(Datastore):
 
         map_cells = []
         if status and status == 1:
-            map_cells = map_objects['map_cells']
-            position = (lat, lng, 0)
-            map_cells.sort(
-                key=lambda x: distance(
+            # the response only holds what changed, the store has the rest
+            map_cells = self.map_cells.cells(cellid)
+            with_forts = [cell for cell in map_cells if cell['forts']]
+            if with_forts:
+                cell_distances = distances(
                     lat,
                     lng,
-                    x['forts'][0]['latitude'],
-                    x['forts'][0]['longitude']) if x.get('forts', []) else 1e6
-            )
+                    [cell['forts'][0]['latitude'] for cell in with_forts],
+                    [cell['forts'][0]['longitude'] for cell in with_forts]
+                )
+                order = dict((id(cell), d) for cell, d in zip(with_forts, cell_distances))
+                map_cells.sort(key=lambda x: order.get(id(x), 1e6))
         return map_cells
 
     def _setup_logging(self):
@@ -677,7 +928,8 @@ class PokemonGoBot(Datastore):
                     formatted='Session stale, re-logging in.'
                 )
                 position = self.position
-                self.api = ApiWrapper()
+                self.api = self.api.renew()
+                self.async_api.api = self.api
                 self.position = position
                 self.login()
                 self.api.activate_signature(self.get_encryption_lib())
@@ -750,7 +1002,34 @@ class PokemonGoBot(Datastore):
 
     def _setup_api(self):
         # instantiate pgoapi
-        self.api = ApiWrapper()
+        rate_limiter = RateLimiter(
+            requests_per_second=self.config.api_requests_per_second,
+            burst=self.config.api_burst,
+            request_rates=self.config.api_request_rates,
+            request_priorities=self.config.api_request_priorities,
+            starvation_timeout=self.config.api_starvation_timeout
+        )
+        api_state = dict(
+            rate_limiter=rate_limiter,
+            response_cache=ResponseCache(ttl=self.config.api_cache_ttl),
+            retry_policy=RetryPolicy(
+                max_retries=self.config.api_max_retries,
+                base_delay=self.config.api_retry_base_delay,
+                max_delay=self.config.api_retry_max_delay
+            ),
+            circuit_breakers=self.circuit_breakers
+        )
+        if self.config.benchmark:
+            self.api = ReplayApiWrapper(ApiRecording.load(self.config.benchmark), **api_state)
+        elif self.config.api_record:
+            self.api = RecordingApiWrapper(ApiRecorder(self.config.api_record), **api_state)
+        else:
+            self.api = ApiWrapper(**api_state)
+        self.async_api = AsyncApi(
+            self.api,
+            workers=self.config.api_async_workers,
+            executor=self.shared.api_executor if self.shared is not None else None
+        )
 
         # provide player position on the earth
         self._set_starting_position()
@@ -758,7 +1037,10 @@ class PokemonGoBot(Datastore):
         self.login()
         # chain subrequests (methods) into one RPC call
 
-        self.api.activate_signature(self.get_encryption_lib())
+        if not self.api.offline:
+            self.api.activate_signature(self.get_encryption_lib())
+        self.api.stats.add_listener(self._emit_api_call)
+        self.profiler.attach(self.api.stats)
         self.logger.info('')
         # send empty map_cells and then our position
         self.update_web_location()
@@ -1029,26 +1311,28 @@ class PokemonGoBot(Datastore):
 
     def heartbeat(self):
         # Remove forts that we can now spin again.
-        now = time.time()
+        now = clock.now()
         self.fort_timeouts = {id: timeout for id, timeout
                               in self.fort_timeouts.iteritems()
                               if timeout >= now * 1000}
 
         if now - self.last_heartbeat >= self.heartbeat_threshold:
             self.last_heartbeat = now
-            request = self.api.create_request()
-            request.get_player()
-            request.check_awarded_badges()
-            request.call()
-        try:
-            self.web_update_queue.put_nowait(True)  # do this outside of thread every tick
-        except Queue.Full:
-            pass
-
-    def update_web_location_worker(self):
-        while True:
-            self.web_update_queue.get()
-            self.update_web_location()
+            with self.api.priority(BACKGROUND):
+                request = self.api.create_request()
+                request.get_player()
+                request.check_awarded_badges()
+                request.call()
+        self.web_updater.request(self)  # do this outside of thread every tick
+
+    def activate(self):
+        """
+        Points the module wide state (cached inventory, database) to this bot,
+        needed before ticking when a process runs the bots of several accounts.
+        """
+        _init_database('/data/{}.db'.format(self.config.username))
+        if self.inventory is not None:
+            set_inventory(self.inventory)
 
     def display_player_info(self):
             inventory_items = self.api.get_inventory()
@@ -1080,23 +1364,40 @@ class PokemonGoBot(Datastore):
                         '{poke_stop_visits}'.format(
                             **player_stats))
 
-    def get_forts(self, order_by_distance=False):
-        forts = [fort
-                 for fort in self.cell['forts']
-                 if 'latitude' in fort and 'type' in fort]
+    def spatial_index(self, key):
+        """
+        :param key: 'forts', 'wild_pokemons' or 'catchable_pokemons'.
+        :return: An index over those objects of the current cell, rebuilt when the cell is refreshed.
+        :rtype: SpatialIndex
+        """
+        if self._indexed_cell is not self.cell:
+            self._indexed_cell = self.cell
+            self._cell_indexes = {}
+        if key not in self._cell_indexes:
+            items = self.cell[key]
+            if key == 'forts':
+                items = [fort for fort in items if 'latitude' in fort and 'type' in fort]
+            self._cell_indexes[key] = SpatialIndex(items)
+        return self._cell_indexes[key]
 
+    def get_forts(self, order_by_distance=False):
         if order_by_distance:
-            forts.sort(key=lambda x: distance(
-                self.position[0],
-                self.position[1],
-                x['latitude'],
-                x['longitude']
-            ))
+            return self.nearest_forts()
+
+        return [fort
+                for fort in self.cell['forts']
+                if 'latitude' in fort and 'type' in fort]
 
-        return forts
+    def nearest_forts(self, k=None, max_distance=None, predicate=None):
+        """
+        :return: The forts around the bot matching the predicate, closest first.
+        :rtype: list of dict
+        """
+        return self.spatial_index('forts').nearest(
+            self.position[0], self.position[1], k=k, max_distance=max_distance, predicate=predicate)
 
     def get_map_objects(self, lat, lng, timestamp, cellid):
-        if time.time() - self.last_time_map_object < self.config.map_object_cache_time:
+        if clock.now() - self.last_time_map_object < self.config.map_object_cache_time:
             return self.last_map_object
 
         self.last_map_object = self.api.get_map_objects(
@@ -1105,10 +1406,64 @@ class PokemonGoBot(Datastore):
             since_timestamp_ms=timestamp,
             cell_id=cellid
         )
-        self.last_time_map_object = time.time()
+        self.last_time_map_object = clock.now()
+        map_objects = self.last_map_object.get('responses', {}).get('GET_MAP_OBJECTS', {})
+        if map_objects.get('status') == 1:
+            self.map_cells.update(map_objects.get('map_cells', []))
 
         return self.last_map_object
 
+    def _prefetch_fort_details(self):
+        # look up the forts we are likely to walk to next before we get there
+        count = self.config.forts_prefetch_details
+        if count <= 0:
+            return
+
+        forts = self.nearest_forts(
+            k=count,
+            max_distance=Constants.MAX_DISTANCE_FORT_DETAILS_PREFETCH,
+            predicate=lambda fort: self.fort_cache.should_fetch(fort['id'])
+        )
+        if forts:
+            with self.api.priority(BACKGROUND):
+                prefetch_fort_details(self, forts, wait=False)
+
+    def _load_fort_cache(self):
+        if self.api.offline or self.shared is not None:
+            # replays should not depend on what earlier runs looked up,
+            # a shared cache is loaded once by its owner
+            return
+
+        try:
+            self.fort_cache.load()
+        except (IOError, ValueError):
+            self.logger.debug('Starting a new fort details cache at {}'.format(self.fort_cache.path))
+
+    def save_recent_forts(self):
+        if self.recent_forts[-1] is None or not self.config.forts_cache_recent_forts:
+            return
+
+        cached_forts_path = os.path.join(
+            _base_dir, 'data', 'recent-forts-%s.json' % self.config.username
+        )
+        try:
+            with open(cached_forts_path, 'w') as outfile:
+                json.dump(self.recent_forts, outfile)
+            self.event_manager.emit(
+                'cached_fort',
+                sender=self,
+                level='debug',
+                formatted='Forts cached.',
+            )
+        except IOError as e:
+            self.event_manager.emit(
+                'error_caching_forts',
+                sender=self,
+                level='debug',
+                formatted='Error caching forts for {path}',
+                data={'path': cached_forts_path}
+            )
+
     def _load_recent_forts(self):
         if not self.config.forts_cache_recent_forts:
             return
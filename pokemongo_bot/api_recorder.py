@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import atexit
+import copy
+import gzip
+import pickle
+import threading
+import time
+from collections import defaultdict
+
+from pgoapi.exceptions import EmptySubrequestChainException
+
+from api_wrapper import ApiWrapper, ApiRequest
+
+
+class ApiRecorder(object):
+    """
+    Appends every RPC and its response to a gzipped stream of pickled records.
+
+    Each record is a dict with the seconds since the recording started (`t`),
+    the (request type, parameters) of every sub-request (`requests`) and the
+    response envelope (`response`). Records are flushed as they are written, so
+    a recording survives the bot crashing.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'ab')
+        self._start = time.time()
+        self.count = 0
+        atexit.register(self.close)
+
+    def record(self, sub_requests, response):
+        record = {'t': time.time() - self._start, 'requests': sub_requests, 'response': response}
+        with self._lock:
+            if self._file is None:
+                return
+            pickle.dump(record, self._file, pickle.HIGHEST_PROTOCOL)
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ApiRecording(object):
+    """
+    Serves recorded responses deterministically.
+
+    A request gets the next recorded response of a request with the same
+    sub-requests and parameters, or failing that with the same request types.
+    Responses are served round-robin, so a short recording can drive any
+    number of ticks. Requests that were never recorded get an empty successful
+    response and are counted in `misses`.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self._by_request = defaultdict(list)
+        self._by_types = defaultdict(list)
+        for record in records:
+            self._by_request[self._request_key(record['requests'])].append(record['response'])
+            self._by_types[self._types_key(record['requests'])].append(record['response'])
+        self._cursors = defaultdict(int)
+        self.calls = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path):
+        records = []
+        with gzip.open(path, 'rb') as f:
+            try:
+                while True:
+                    records.append(pickle.load(f))
+            except (EOFError, IOError):
+                # end of the stream, or the tail of a recording that was never closed
+                pass
+        return cls(records)
+
+    @staticmethod
+    def _request_key(sub_requests):
+        return repr([(t, sorted(params.items())) for t, params in sub_requests])
+
+    @staticmethod
+    def _types_key(sub_requests):
+        return tuple(t for t, _ in sub_requests)
+
+    def duration(self):
+        return self.records[-1]['t'] if self.records else 0.0
+
+    def response(self, sub_requests):
+        self.calls += 1
+        key = self._request_key(sub_requests)
+        responses = self._by_request.get(key)
+        if not responses:
+            key = self._types_key(sub_requests)
+            responses = self._by_types.get(key)
+        if not responses:
+            self.misses += 1
+            return {'status_code': 1, 'responses': {t: {} for t, _ in sub_requests}}
+
+        response = responses[self._cursors[key] % len(responses)]
+        self._cursors[key] += 1
+        # callers may modify the response, keep the recording intact
+        return copy.deepcopy(response)
+
+
+class RecordingApiWrapper(ApiWrapper):
+    def __init__(self, recorder, **kwargs):
+        ApiWrapper.__init__(self, **kwargs)
+        self.recorder = recorder
+
+    def _shared_state(self):
+        state = ApiWrapper._shared_state(self)
+        state['recorder'] = self.recorder
+        return state
+
+    def _request_class(self):
+        return RecordingApiRequest
+
+
+class RecordingApiRequest(ApiRequest):
+    def __init__(self, api, *args):
+        ApiRequest.__init__(self, api, *args)
+        self.recorder = api.recorder
+
+    def _call(self):
+        sub_requests = self._sub_requests()
+        result = ApiRequest._call(self)
+        self.recorder.record(sub_requests, result)
+        return result
+
+
+class ReplayApiWrapper(ApiWrapper):
+    """
+    Wrapper answering every request from an ApiRecording, without logging in.
+    """
+
+    offline = True
+
+    def __init__(self, recording, **kwargs):
+        ApiWrapper.__init__(self, **kwargs)
+        self.recording = recording
+
+    def _shared_state(self):
+        state = ApiWrapper._shared_state(self)
+        state['recording'] = self.recording
+        return state
+
+    def _request_class(self):
+        return ReplayApiRequest
+
+    def login(self, *args):
+        return True
+
+    def activate_signature(self, lib):
+        pass
+
+
+class ReplayApiRequest(ApiRequest):
+    def __init__(self, api, *args):
+        ApiRequest.__init__(self, api, *args)
+        self.recording = api.recording
+
+    def can_call(self):
+        if not self._req_method_list:
+            raise EmptySubrequestChainException()
+        return True
+
+    def _call(self):
+        sub_requests = self._sub_requests()
+        self._req_method_list = []
+        return self.recording.response(sub_requests)
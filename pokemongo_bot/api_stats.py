@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque, defaultdict
+
+RETRY_CAUSES = ('throttle', 'unexpected_response', 'invalid_response')
+
+
+class RingBuffer(object):
+    """
+    Keeps the last `size` samples.
+
+    Appending to a bounded deque is atomic in CPython, so the API threads can
+    add samples without taking a lock; readers work on a snapshot.
+    """
+
+    def __init__(self, size=1000):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def append(self, value):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def __len__(self):
+        return len(self._samples)
+
+    def window_total(self):
+        """
+        :return: The sum of the buffered samples, `total` covers every sample ever added.
+        """
+        return sum(list(self._samples))
+
+    def percentile(self, p):
+        """
+        :param p: Percentile between 0 and 100.
+        :return: The nearest-rank percentile of the buffered samples, None if there are none.
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = int(round(p / 100.0 * (len(samples) - 1)))
+        return samples[index]
+
+
+class RequestStats(object):
+    def __init__(self, size=1000):
+        self.latency = RingBuffer(size)
+        self.throttle_wait = RingBuffer(size)
+        self.response_size = RingBuffer(size)
+        self.retries = defaultdict(int)
+        self.batched = 0
+
+    def summary(self):
+        return {
+            'calls': self.latency.count,
+            'batched': self.batched,
+            'latency_p50': self.latency.percentile(50),
+            'latency_p95': self.latency.percentile(95),
+            'latency_p99': self.latency.percentile(99),
+            'latency_total': self.latency.total,
+            'throttle_wait_total': self.throttle_wait.total,
+            'response_size_p50': self.response_size.percentile(50),
+            'retries': dict(self.retries),
+        }
+
+
+class ApiStats(object):
+    """
+    Latency, rate limiting, retry and response size statistics of the RPCs,
+    grouped by RequestType.
+
+    A request batching several sub-requests is recorded under each of their
+    types and counted as `batched` there, its latency is shared by all of them.
+
+    Response sizes are sampled: measuring a response walks all of it, so only
+    one response in `size_sample_interval` of each request type is measured.
+    """
+
+    def __init__(self, size=1000, size_sample_interval=20):
+        self.size = size
+        self.size_sample_interval = size_sample_interval
+        self._requests = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """
+        :param listener: Called with the keyword arguments of every finished RPC
+        (request_types, latency, throttle_wait, retries, response_size), see record_call.
+        """
+        self._listeners.append(listener)
+
+    def get(self, request_type):
+        stats = self._requests.get(request_type)
+        if stats is None:
+            # setdefault is atomic, two threads end up with the same instance
+            stats = self._requests.setdefault(request_type, RequestStats(self.size))
+        return stats
+
+    def record_call(self, request_types, latency, throttle_wait, retries, response=None):
+        """
+        :param request_types: The types of the sub-requests sent together.
+        :type request_types: tuple of str
+        :param latency: Seconds spent waiting for the server, failed attempts included.
+        :param throttle_wait: Seconds spent waiting for the rate limiter.
+        :param retries: Number of retries by cause.
+        :type retries: dict
+        :param response: The response envelope, None if the call failed. Listeners get
+        the approximate size of its sampled sub-responses as `response_size`, None when
+        none was sampled.
+        """
+        responses = response.get('responses') if isinstance(response, dict) else None
+        response_size = None
+        for request_type in request_types:
+            stats = self.get(request_type)
+            if responses and request_type in responses \
+                    and stats.latency.count % self.size_sample_interval == 0:
+                # the size of the dict's repr is a stand-in for the payload size
+                size = len(repr(responses[request_type]))
+                stats.response_size.append(size)
+                response_size = (response_size or 0) + size
+            stats.latency.append(latency)
+            stats.throttle_wait.append(throttle_wait)
+            for cause, count in retries.iteritems():
+                stats.retries[cause] += count
+            if len(request_types) > 1:
+                stats.batched += 1
+
+        for listener in self._listeners:
+            listener(
+                request_types=tuple(request_types),
+                latency=latency,
+                throttle_wait=throttle_wait,
+                retries=retries,
+                response_size=response_size
+            )
+
+    def summary(self):
+        """
+        :return: (request type, summary) pairs, the request types costing the most time first.
+        :rtype: list of (str, dict)
+        """
+        summaries = [(t, stats.summary()) for t, stats in self._requests.items()]
+        return sorted(summaries, key=lambda s: -(s[1]['latency_total'] + s[1]['throttle_wait_total']))
+
+
+def format_summary(request_type, summary):
+    def ms(seconds):
+        return '-' if seconds is None else '{:.0f}ms'.format(seconds * 1000)
+
+    return '{}: {} calls ({} batched), latency p50 {} p95 {} p99 {}, {:.1f}s rate limited, {} retries'.format(
+        request_type, summary['calls'], summary['batched'], ms(summary['latency_p50']), ms(summary['latency_p95']),
+        ms(summary['latency_p99']), summary['throttle_wait_total'], sum(summary['retries'].values()))
@@ -1,5 +1,7 @@
 import time
 import logging
+import threading
+from contextlib import contextmanager
 
 from pgoapi.exceptions import (ServerSideRequestThrottlingException,
     NotLoggedInException, ServerBusyOrOfflineException,
@@ -9,17 +11,79 @@ from pgoapi.pgoapi import PGoApi, PGoApiRequest, RpcApi
 from pgoapi.protos.POGOProtos.Networking.Requests.RequestType_pb2 import RequestType
 
 from human_behaviour import sleep
+from rate_limiter import RateLimiter
+from request_coalescer import RequestCoalescer
+from request_types import COALESCABLE_REQUESTS
+from response_cache import ResponseCache
+from retry_policy import RetryPolicy, CircuitBreakers
+from api_stats import ApiStats, RETRY_CAUSES
 
 class PermaBannedException(Exception):
     pass
 
+class CircuitOpenException(ServerBusyOrOfflineException):
+    def __init__(self, request_types, retry_after):
+        ServerBusyOrOfflineException.__init__(
+            self, '{} requests are paused for {:.0f} seconds'.format(', '.join(request_types), retry_after))
+        self.retry_after = retry_after
+
 class ApiWrapper(PGoApi):
-    def __init__(self):
+    # True for wrappers that never talk to the servers (see api_recorder)
+    offline = False
+
+    def __init__(self, rate_limiter=None, response_cache=None, retry_policy=None, circuit_breakers=None, stats=None):
         PGoApi.__init__(self)
         self.useVanillaRequest = False
+        # shared by every request created by this wrapper, pass the old ones
+        # in when re-creating the wrapper to keep the learned request rate,
+        # the cached responses and the state of the circuit breakers
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.response_cache = response_cache or ResponseCache()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breakers = circuit_breakers or CircuitBreakers()
+        self.stats = stats or ApiStats()
+        self.coalescer = RequestCoalescer()
+        self._local = threading.local()
+
+    @contextmanager
+    def priority(self, priority):
+        """
+        Sends the requests created by this thread inside the block with the given
+        rate limiter priority instead of the priority of their request types.
+
+            with bot.api.priority(BACKGROUND):
+                bot.api.get_inventory()
+        """
+        previous = self.current_priority()
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self):
+        return getattr(self._local, 'priority', None)
+
+    def _shared_state(self):
+        return dict(
+            rate_limiter=self.rate_limiter,
+            response_cache=self.response_cache,
+            retry_policy=self.retry_policy,
+            circuit_breakers=self.circuit_breakers,
+            stats=self.stats
+        )
+
+    def renew(self):
+        """
+        Creates a new, logged out wrapper sharing the request state of this one.
+        """
+        return type(self)(**self._shared_state())
+
+    def _request_class(self):
+        return ApiRequest
 
     def create_request(self):
-        RequestClass = ApiRequest
+        RequestClass = self._request_class()
         if self.useVanillaRequest:
             RequestClass = PGoApiRequest
 
@@ -42,12 +106,17 @@ class ApiWrapper(PGoApi):
 
 
 class ApiRequest(PGoApiRequest):
-    def __init__(self, *args):
-        PGoApiRequest.__init__(self, *args)
+    def __init__(self, api, *args):
+        PGoApiRequest.__init__(self, api, *args)
         self.logger = logging.getLogger(__name__)
         self.request_callers = []
-        self.last_api_request_time = None
-        self.requests_per_seconds = 2
+        self.rate_limiter = api.rate_limiter
+        self.coalescer = api.coalescer
+        self.response_cache = api.response_cache
+        self.retry_policy = api.retry_policy
+        self.circuit_breakers = api.circuit_breakers
+        self.stats = api.stats
+        self.priority = api.current_priority()
 
     def can_call(self):
         if not self._req_method_list:
@@ -65,6 +134,22 @@ class ApiRequest(PGoApiRequest):
     def _call(self):
         return PGoApiRequest.call(self)
 
+    def _is_coalescable(self, request_callers):
+        # only parameterless sub-requests can be shared, those are plain ints
+        return bool(request_callers) \
+            and set(request_callers) <= COALESCABLE_REQUESTS \
+            and all(isinstance(req_method, int) for req_method in self._req_method_list)
+
+    def _sub_requests(self):
+        sub_requests = []
+        for req_method in self._req_method_list:
+            if isinstance(req_method, dict):
+                request_type, params = req_method.items()[0]
+            else:
+                request_type, params = req_method, {}
+            sub_requests.append((RequestType.Name(request_type), params))
+        return sub_requests
+
     def _pop_request_callers(self):
         r = self.request_callers
         self.request_callers = []
@@ -96,72 +181,100 @@ class ApiRequest(PGoApiRequest):
 
         return True
 
-    def call(self, max_retry=15):
+    def call(self, max_retry=None):
+        if max_retry is None:
+            max_retry = self.retry_policy.max_retries
         request_callers = self._pop_request_callers()
         if not self.can_call():
             return False # currently this is never ran, exceptions are raised before
 
-        request_timestamp = None
+        result = self.response_cache.get(self._sub_requests())
+        if result is not None:
+            return result
+        if not self.circuit_breakers.allow_request(request_callers):
+            raise CircuitOpenException(request_callers, self.circuit_breakers.retry_after(request_callers))
+        # drop what a write makes stale before sending it, it may be applied
+        # by the server even if we never get the response
+        self.response_cache.invalidate(request_callers)
+
+        coalescable = self._is_coalescable(request_callers)
+        if coalescable:
+            result = self.coalescer.lookup(request_callers)
+            if result is not None:
+                return result
+            # piggyback the sub-requests other callers will most likely send this tick
+            for request_type in self.coalescer.extra_requests(request_callers):
+                self._req_method_list.append(RequestType.Value(request_type))
+        else:
+            self.coalescer.invalidate(request_callers)
+
+        sent_requests = self._sub_requests()
+        call_stats = {'latency': 0.0, 'throttle_wait': 0.0, 'retries': dict.fromkeys(RETRY_CAUSES, 0)}
+        result = None
+        try:
+            result = self._call_with_retries(request_callers, max_retry, call_stats)
+        finally:
+            self.stats.record_call(tuple(request_callers) or ('UNKNOWN', ), response=result, **call_stats)
+
+        self.circuit_breakers.record_success(request_callers)
+        if coalescable:
+            self.coalescer.store(result)
+        self.response_cache.put(sent_requests, result)
+        self.rate_limiter.succeeded()
+        return result
+
+    def _call_with_retries(self, request_callers, max_retry, call_stats):
         api_req_method_list = self._req_method_list
         result = None
         try_cnt = 0
         throttling_retry = 0
-        unexpected_response_retry = 0
+        delay = None
         while True:
-            request_timestamp = self.throttle_sleep()
+            call_stats['throttle_wait'] += self.throttle_sleep(request_callers)
             # self._call internally clear this field, so save it
             self._req_method_list = [req_method for req_method in api_req_method_list]
-            should_throttle_retry = False
-            should_unexpected_response_retry = False
+            cause = 'invalid_response'
+            start = time.time()
             try:
                 result = self._call()
             except ServerSideRequestThrottlingException:
-                should_throttle_retry = True
-            except UnexpectedResponseException:
-                should_unexpected_response_retry = True
-
-            if should_throttle_retry:
+                call_stats['latency'] += time.time() - start
+                call_stats['retries']['throttle'] += 1
                 throttling_retry += 1
                 if throttling_retry >= max_retry:
                     raise ServerSideRequestThrottlingException('Server throttled too many times')
-                sleep(1) # huge sleep ?
+                # no backoff here, the lowered rate spaces out the retry
+                self.rate_limiter.throttled()
                 continue # skip response checking
-
-            if should_unexpected_response_retry:
-                unexpected_response_retry += 1
-                if unexpected_response_retry >= 5:
-                    self.logger.warning('Server is not responding correctly to our requests.  Waiting for 30 seconds to reconnect.')
-                    sleep(30)
-                else:
-                    sleep(2)
-                continue
-
-            if not self.is_response_valid(result, request_callers):
-                try_cnt += 1
-                if try_cnt > 3:
-                    self.logger.warning('Server seems to be busy or offline - try again - {}/{}'.format(try_cnt, max_retry))
-                if try_cnt >= max_retry:
-                    raise ServerBusyOrOfflineException()
-                sleep(1)
-            else:
-                break
-
-        self.last_api_request_time = request_timestamp
-        return result
+            except UnexpectedResponseException:
+                result = None
+                cause = 'unexpected_response'
+            call_stats['latency'] += time.time() - start
+
+            if self.is_response_valid(result, request_callers):
+                return result
+
+            self.circuit_breakers.record_failure(request_callers)
+            if self.circuit_breakers.is_open(*request_callers):
+                retry_after = self.circuit_breakers.retry_after(request_callers)
+                self.logger.warning('Server keeps failing, pausing {} requests for {:.0f} seconds'.format(
+                    ', '.join(request_callers), retry_after))
+                raise CircuitOpenException(request_callers, retry_after)
+
+            try_cnt += 1
+            if try_cnt > 3:
+                self.logger.warning('Server seems to be busy or offline - try again - {}/{}'.format(try_cnt, max_retry))
+            if try_cnt >= max_retry:
+                raise ServerBusyOrOfflineException()
+            call_stats['retries'][cause] += 1
+            delay = self.retry_policy.next_delay(delay)
+            sleep(delay, delta=0)
 
     def __getattr__(self, func):
         if func.upper() in  RequestType.keys():
             self.request_callers.append(func)
         return PGoApiRequest.__getattr__(self, func)
 
-    def throttle_sleep(self):
-        now_milliseconds = time.time() * 1000
-        required_delay_between_requests = 1000 / self.requests_per_seconds
-
-        difference = now_milliseconds - (self.last_api_request_time if self.last_api_request_time else 0)
-
-        if self.last_api_request_time != None and difference < required_delay_between_requests:
-            sleep_time = required_delay_between_requests - difference
-            time.sleep(sleep_time / 1000)
-
-        return now_milliseconds
+    def throttle_sleep(self, request_callers=()):
+        # returns the number of seconds we had to wait
+        return self.rate_limiter.wait(request_callers, priority=self.priority)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import Queue
+
+from pgoapi.protos.POGOProtos.Networking.Requests.RequestType_pb2 import RequestType
+
+
+class ApiFutureTimeout(Exception):
+    pass
+
+
+class ApiFuture(object):
+    """
+    Result of an API call running in the background.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done.is_set()
+
+    def _wait(self, timeout):
+        if not self._done.wait(timeout):
+            raise ApiFutureTimeout()
+
+    def result(self, timeout=None):
+        """
+        Blocks until the call finished.
+        :return: The response of the call; raises the exception of the call if it failed.
+        """
+        self._wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        self._wait(timeout)
+        return self._exception
+
+    def add_done_callback(self, callback):
+        """
+        :param callback: Called with the future once it is done, from the thread that ran the call.
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class AsyncApi(object):
+    """
+    Runs API calls on a small pool of threads and returns ApiFutures, so
+    independent calls can overlap instead of blocking the tick.
+
+    Requests are built when they are submitted, so each one carries the
+    position the bot had at that time. All calls still go through the
+    ApiWrapper and share its rate limiter. With `workers=0` calls run inline
+    and the returned futures are already done. Bots of several accounts can
+    share the threads of one `executor` (another AsyncApi).
+
+        future = bot.async_api.fort_details(fort_id=..., latitude=..., longitude=...)
+        details = future.result()['responses']['FORT_DETAILS']
+    """
+
+    def __init__(self, api, workers=2, executor=None):
+        self.api = api
+        self.workers = workers
+        self.executor = executor
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._process_calls)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _process_calls(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._run(*item)
+
+    @staticmethod
+    def _run(future, function, args, kwargs):
+        try:
+            result = function(*args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def submit(self, function, *args, **kwargs):
+        if self.executor is not None:
+            return self.executor.submit(function, *args, **kwargs)
+
+        future = ApiFuture()
+        if self.workers <= 0:
+            self._run(future, function, args, kwargs)
+            return future
+
+        if len(self._threads) < self.workers:
+            self._start_workers()
+        self._queue.put((future, function, args, kwargs))
+        return future
+
+    def call(self, request):
+        """
+        :param request: A request created with `api.create_request()`, with its sub-requests added.
+        :rtype: ApiFuture
+        """
+        return self.submit(request.call)
+
+    def shutdown(self):
+        with self._lock:
+            for _ in self._threads:
+                self._queue.put(None)
+            self._threads = []
+
+    def __getattr__(self, func):
+        if func.upper() in RequestType.keys():
+            def function(**kwargs):
+                request = self.api.create_request()
+                getattr(request, func)(**kwargs)
+                return self.call(request)
+            return function
+        raise AttributeError(func)
@@ -37,3 +37,24 @@ class BaseTask(object):
 
   def initialize(self):
     pass
+
+  def triggers(self):
+    """
+    Tasks that only have work to do at times can return the triggers
+    (see task_scheduler) that wake them up, the task is skipped on ticks
+    where none of them fired.
+    :return: A list of triggers, None to run on every tick.
+    """
+    return None
+
+  def get_state(self):
+    """
+    :return: State of the task worth keeping across restarts, None if there is none. Must be picklable.
+    """
+    return None
+
+  def set_state(self, state):
+    """
+    Restores the state returned by get_state before a restart.
+    """
+    pass
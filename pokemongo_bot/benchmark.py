@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from collections import defaultdict
+
+import clock
+
+
+class Benchmark(object):
+    """
+    Runs the tick loop of a bot using a ReplayApiWrapper and measures it.
+
+    Sleeps go through the virtual clock, so the numbers only reflect the time
+    spent computing, not the human-like delays.
+    """
+
+    def __init__(self, bot, ticks=1000):
+        self.bot = bot
+        self.ticks = ticks
+        self.logger = logging.getLogger(type(self).__name__)
+        self.worker_time = defaultdict(float)
+        self.worker_calls = defaultdict(int)
+        self.elapsed = 0.0
+        self.simulated = 0.0
+        self.api_calls = 0
+
+    def _timed(self, worker):
+        work = worker.work
+        name = type(worker).__name__
+
+        def timed_work(*args, **kwargs):
+            start = time.time()
+            try:
+                return work(*args, **kwargs)
+            finally:
+                self.worker_time[name] += time.time() - start
+                self.worker_calls[name] += 1
+
+        return timed_work
+
+    def run(self):
+        for worker in self.bot.workers:
+            worker.work = self._timed(worker)
+
+        recording = self.bot.api.recording
+        api_calls = recording.calls
+        simulated_start = clock.now()
+        start = time.time()
+        for _ in xrange(self.ticks):
+            self.bot.tick()
+        self.elapsed = time.time() - start
+        self.simulated = clock.now() - simulated_start
+        self.api_calls = recording.calls - api_calls
+
+    def ticks_per_second(self):
+        return self.ticks / self.elapsed if self.elapsed else 0.0
+
+    def api_calls_per_tick(self):
+        return float(self.api_calls) / self.ticks if self.ticks else 0.0
+
+    def report(self):
+        self.logger.info('Ran {} ticks in {:.2f}s ({:.1f} ticks/s), {:.0f}s of simulated time'.format(
+            self.ticks, self.elapsed, self.ticks_per_second(), self.simulated))
+        self.logger.info('API calls: {} ({:.2f} per tick, {} not in the recording)'.format(
+            self.api_calls, self.api_calls_per_tick(), self.bot.api.recording.misses))
+        for name, seconds in sorted(self.worker_time.iteritems(), key=lambda x: -x[1]):
+            self.logger.info('{:>24}: {:8.3f}s total, {:7.3f}ms per call'.format(
+                name, seconds, 1000 * seconds / self.worker_calls[name]))
@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.constants import Constants
-from pokemongo_bot.cell_workers.utils import fort_details, distance
+from pokemongo_bot.cell_workers.utils import fort_details, prefetch_fort_details
 from pokemongo_bot.cell_workers.pokemon_catch_worker import PokemonCatchWorker
 
 
@@ -12,6 +12,9 @@ class CatchLuredPokemon(BaseTask):
     SUPPORTED_TASK_API_VERSION = 1
 
     def work(self):
+        if self.bot.api.circuit_breakers.is_open('DISK_ENCOUNTER', 'CATCH_POKEMON'):
+            return WorkerResult.SUCCESS
+
         lured_pokemon = self.get_lured_pokemon()
         if len(lured_pokemon) > 0:
             self.catch_pokemon(lured_pokemon[0])
@@ -22,25 +25,13 @@ class CatchLuredPokemon(BaseTask):
         return WorkerResult.SUCCESS
 
     def get_lured_pokemon(self):
-        forts_in_range = []
         pokemon_to_catch = []
-        forts = self.bot.get_forts(order_by_distance=True)
-
-        if len(forts) == 0:
-            return []
-
-        for fort in forts:
-            distance_to_fort = distance(
-                self.bot.position[0],
-                self.bot.position[1],
-                fort['latitude'],
-                fort['longitude']
-            )
-
-            encounter_id = fort.get('lure_info', {}).get('encounter_id', None)
-            if distance_to_fort < Constants.MAX_DISTANCE_FORT_IS_REACHABLE and encounter_id:
-                forts_in_range.append(fort)
+        forts_in_range = self.bot.nearest_forts(
+            max_distance=Constants.MAX_DISTANCE_FORT_IS_REACHABLE,
+            predicate=lambda fort: fort.get('lure_info', {}).get('encounter_id', None)
+        )
 
+        prefetch_fort_details(self.bot, forts_in_range)
 
         for fort in forts_in_range:
             details = fort_details(self.bot, fort_id=fort['id'],
@@ -3,7 +3,6 @@ import os
 
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.cell_workers.pokemon_catch_worker import PokemonCatchWorker
-from utils import distance
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.base_dir import _base_dir
 
@@ -12,6 +11,9 @@ class CatchVisiblePokemon(BaseTask):
     SUPPORTED_TASK_API_VERSION = 1
 
     def work(self):
+        if self.bot.api.circuit_breakers.is_open('ENCOUNTER', 'CATCH_POKEMON'):
+            return WorkerResult.SUCCESS
+
         num_catchable_pokemon = 0
         if 'catchable_pokemons' in self.bot.cell:
             num_catchable_pokemon = len(self.bot.cell['catchable_pokemons'])
@@ -25,12 +27,9 @@ class CatchVisiblePokemon(BaseTask):
         if num_catchable_pokemon > 0:
             # Sort all by distance from current pos- eventually this should
             # build graph & A* it
-            self.bot.cell['catchable_pokemons'].sort(
-                key=
-                lambda x: distance(self.bot.position[0], self.bot.position[1], x['latitude'], x['longitude'])
-            )
+            catchable_pokemons = self.nearest('catchable_pokemons')
             user_web_catchable = os.path.join(_base_dir, 'web', 'catchable-{}.json'.format(self.bot.config.username))
-            for pokemon in self.bot.cell['catchable_pokemons']:
+            for pokemon in catchable_pokemons:
                 with open(user_web_catchable, 'w') as outfile:
                     json.dump(pokemon, outfile)
                 self.emit_event(
@@ -46,25 +45,29 @@ class CatchVisiblePokemon(BaseTask):
                     }
                 )
 
-            self.catch_pokemon(self.bot.cell['catchable_pokemons'].pop(0))
+            self.catch_pokemon(self.pop('catchable_pokemons', catchable_pokemons[0]))
             if num_catchable_pokemon > 1:
                 return WorkerResult.RUNNING
             else:
                 return WorkerResult.SUCCESS
 
         if num_available_pokemon > 0:
-            # Sort all by distance from current pos- eventually this should
-            # build graph & A* it
-            self.bot.cell['wild_pokemons'].sort(
-                key=
-                lambda x: distance(self.bot.position[0], self.bot.position[1], x['latitude'], x['longitude']))
-            self.catch_pokemon(self.bot.cell['wild_pokemons'].pop(0))
+            wild_pokemon = self.nearest('wild_pokemons', k=1)[0]
+            self.catch_pokemon(self.pop('wild_pokemons', wild_pokemon))
 
             if num_catchable_pokemon > 1:
                 return WorkerResult.RUNNING
             else:
                 return WorkerResult.SUCCESS
 
+    def nearest(self, key, k=None):
+        return self.bot.spatial_index(key).nearest(self.bot.position[0], self.bot.position[1], k=k)
+
+    def pop(self, key, pokemon):
+        self.bot.spatial_index(key).remove(pokemon)
+        self.bot.cell[key].remove(pokemon)
+        return pokemon
+
     def catch_pokemon(self, pokemon):
         worker = PokemonCatchWorker(pokemon, self.bot, self.config)
         return_value = worker.work()
@@ -1,4 +1,5 @@
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnInventoryChange, Every
 
 
 class CollectLevelUpReward(BaseTask):
@@ -11,6 +12,9 @@ class CollectLevelUpReward(BaseTask):
         self.current_level = self._get_current_level()
         self.previous_level = 0
 
+    def triggers(self):
+        return [OnInventoryChange(), Every(300)]
+
     def work(self):
         self.current_level = self._get_current_level()
 
@@ -3,6 +3,7 @@ from pokemongo_bot.human_behaviour import sleep
 from pokemongo_bot.inventory import Pokemon
 from pokemongo_bot.item_list import Item
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnInventoryChange, Every
 
 
 class EvolvePokemon(BaseTask):
@@ -23,6 +24,9 @@ class EvolvePokemon(BaseTask):
         if isinstance(self.evolve_all, basestring):
             self.evolve_all = [str(pokemon_name).strip() for pokemon_name in self.evolve_all.split(',')]
 
+    def triggers(self):
+        return [OnInventoryChange(), Every(300)]
+
     def work(self):
         if not self._should_run():
             return
@@ -85,14 +89,19 @@ class EvolvePokemon(BaseTask):
             'and': lambda pokemon: pokemon.cp >= self.evolve_above_cp and pokemon.iv >= self.evolve_above_iv
         }
 
-        for pokemon in inventory.pokemons().all():
-            if pokemon.unique_id > 0 and pokemon.has_next_evolution() and (logic_to_function[self.cp_iv_logic](pokemon)):
-                pokemons.append(pokemon)
-
         if self.first_evolve_by == "cp":
-            pokemons.sort(key=lambda x: (x.pokemon_id, x.cp, x.iv), reverse=True)
+            sort_key = lambda x: (x.cp, x.iv)
         else:
-            pokemons.sort(key=lambda x: (x.pokemon_id, x.iv, x.cp), reverse=True)
+            sort_key = lambda x: (x.iv, x.cp)
+
+        # only the kinds of pokemons that can evolve are looked at
+        groups = inventory.pokemons().groups('pokemon_id')
+        for pokemon_id in sorted(groups, reverse=True):
+            if not inventory.Pokemons.has_next_evolution(pokemon_id):
+                continue
+            group = [pokemon for pokemon in groups[pokemon_id]
+                     if pokemon.unique_id > 0 and logic_to_function[self.cp_iv_logic](pokemon)]
+            pokemons += sorted(group, key=sort_key, reverse=True)
 
         return pokemons
 
@@ -4,7 +4,7 @@ import gpxpy
 import gpxpy.gpx
 import json
 from pokemongo_bot.base_task import BaseTask
-from pokemongo_bot.cell_workers.utils import distance, i2f, format_dist
+from pokemongo_bot.cell_workers.utils import distance, distances, i2f, format_dist
 from pokemongo_bot.human_behaviour import sleep
 from pokemongo_bot.walkers.step_walker import StepWalker
 from pgoapi.utilities import f2i
@@ -75,28 +75,16 @@ class FollowPath(BaseTask):
         return points
 
     def find_closest_point_idx(self, points):
-
-        return_idx = 0
-        min_distance = float("inf");
-        for index in range(len(points)):
-            point = points[index]
-            botlat = self.bot.api._position_lat
-            botlng = self.bot.api._position_lng
-            lat = float(point['lat'])
-            lng = float(point['lng'])
-
-            dist = distance(
-                botlat,
-                botlng,
-                lat,
-                lng
-            )
-
-            if dist < min_distance:
-                min_distance = dist
-                return_idx = index
-
-        return return_idx
+        if not points:
+            return 0
+
+        point_distances = distances(
+            self.bot.api._position_lat,
+            self.bot.api._position_lng,
+            [float(point['lat']) for point in points],
+            [float(point['lng']) for point in points]
+        )
+        return int(point_distances.argmin())
 
     def work(self):
         last_lat = self.bot.api._position_lat
@@ -16,7 +16,7 @@ class HandleSoftBan(BaseTask):
         if not self.should_run():
             return
 
-        forts = self.bot.get_forts(order_by_distance=True)
+        forts = self.bot.nearest_forts(k=1)
 
         if len(forts) == 0:
             return
@@ -1,5 +1,6 @@
 from pokemongo_bot.human_behaviour import sleep
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnPositionChange, OnInventoryChange, Every
 
 
 class IncubateEggs(BaseTask):
@@ -20,6 +21,10 @@ class IncubateEggs(BaseTask):
     def _process_config(self):
         self.longer_eggs_first = self.config.get("longer_eggs_first", True)
 
+    def triggers(self):
+        # the distance walked only changes when we move
+        return [OnPositionChange(50), OnInventoryChange(), Every(120)]
+
     def work(self):
         try:
             self._check_inventory()
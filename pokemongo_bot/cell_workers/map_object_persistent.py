@@ -1,4 +1,5 @@
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnMapUpdate
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.persistent import persistentEnabled
 from pokemongo_bot.persistent import getPersistentHandler
@@ -9,6 +10,9 @@ class MapObjectPersistent(BaseTask):
     def initialize(self):
         self.last_map_object_time = 0;
 
+    def triggers(self):
+        return [OnMapUpdate()]
+
     def work(self):
         if not self.bot.last_map_object:
             return
@@ -89,12 +89,12 @@ class MoveToFort(BaseTask):
         )
         return WorkerResult.SUCCESS
 
-    def _get_nearest_fort_on_lure_way(self, forts):
+    def _get_nearest_fort_on_lure_way(self, available):
 
         if not self.lure_attraction:
             return None, 0
 
-        lures = filter(lambda x: True if x.get('lure_info', None) != None else False, forts)
+        lures = self.bot.nearest_forts(k=1, predicate=lambda x: available(x) and x.get('lure_info', None) != None)
 
         if (len(lures)):
             dist_lure_me = distance(self.bot.position[0], self.bot.position[1],
@@ -106,7 +106,7 @@ class MoveToFort(BaseTask):
 
             self.lure_distance = dist_lure_me
 
-            for fort in forts:
+            for fort in self.bot.nearest_forts(max_distance=dist_lure_me, predicate=available):
                 dist_lure_fort = distance(
                     fort['latitude'],
                     fort['longitude'],
@@ -121,31 +121,29 @@ class MoveToFort(BaseTask):
                 if dist_lure_fort < dist_lure_me and dist_lure_me > dist_fort_me:
                     return fort, dist_lure_me
 
-                if dist_fort_me > dist_lure_me:
-                    break
-
             return lures[0], dist_lure_me
 
         else:
             return None, 0
 
     def get_nearest_fort(self):
-        forts = self.bot.get_forts(order_by_distance=True)
-
-        # Remove stops that are still on timeout
-        forts = filter(lambda x: x["id"] not in self.bot.fort_timeouts, forts)
+        # Skip stops that are still on timeout
+        available = lambda x: x["id"] not in self.bot.fort_timeouts
 
-        next_attracted_pts, lure_distance = self._get_nearest_fort_on_lure_way(forts)
+        next_attracted_pts, lure_distance = self._get_nearest_fort_on_lure_way(available)
 
-        # Remove all forts which were spun in the last ticks to avoid circles if set
+        # Skip all forts which were spun in the last ticks to avoid circles if set
         if self.bot.config.forts_avoid_circles:
-            forts = filter(lambda x: x["id"] not in self.bot.recent_forts, forts)
+            predicate = lambda x: available(x) and x["id"] not in self.bot.recent_forts
+        else:
+            predicate = available
 
         self.lure_distance = lure_distance
 
         if (lure_distance > 0):
             return next_attracted_pts
 
+        forts = self.bot.nearest_forts(k=1, predicate=predicate)
         if len(forts) > 0:
             return forts[0]
         else:
@@ -50,14 +50,13 @@ Events:
 """
 
 import os
-import time
 import json
 import base64
 import requests
 
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 from pokemongo_bot.base_dir import _base_dir
-from pokemongo_bot.cell_workers.utils import distance, format_dist, format_time
+from pokemongo_bot.cell_workers.utils import distance, distances, format_dist, format_time
 from pokemongo_bot.walkers.walker_factory import walker_factory
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.base_task import BaseTask
@@ -118,7 +117,7 @@ class MoveToMapPokemon(BaseTask):
             return []
 
         pokemon_list = []
-        now = int(time.time())
+        now = int(clock.now())
 
         for pokemon in raw_data['pokemons']:
             try:
@@ -138,25 +137,34 @@ class MoveToMapPokemon(BaseTask):
                 continue
 
             pokemon['priority'] = self.config['catch'].get(pokemon['name'], 0)
+            pokemon_list.append(pokemon)
 
-            pokemon['dist'] = distance(
-                self.bot.position[0],
-                self.bot.position[1],
-                pokemon['latitude'],
-                pokemon['longitude'],
-            )
+        if not pokemon_list:
+            return pokemon_list
 
-            if pokemon['dist'] > self.config['max_distance'] and not self.config['snipe']:
-                continue
+        pokemon_distances = distances(
+            self.bot.position[0],
+            self.bot.position[1],
+            [pokemon['latitude'] for pokemon in pokemon_list],
+            [pokemon['longitude'] for pokemon in pokemon_list]
+        )
+        for pokemon, dist in zip(pokemon_list, pokemon_distances):
+            pokemon['dist'] = float(dist)
 
-            # pokemon not reachable with mean walking speed (by config)
-            mean_walk_speed = (self.bot.config.walk_max + self.bot.config.walk_min) / 2
-            if pokemon['dist'] > ((pokemon['disappear_time'] - now) * mean_walk_speed) and not self.config['snipe']:
-                continue
+        if self.config['snipe']:
+            return pokemon_list
 
-            pokemon_list.append(pokemon)
+        # pokemon not reachable with mean walking speed (by config)
+        mean_walk_speed = (self.bot.config.walk_max + self.bot.config.walk_min) / 2
+        return [pokemon for pokemon in pokemon_list
+                if pokemon['dist'] <= self.config['max_distance']
+                and pokemon['dist'] <= (pokemon['disappear_time'] - now) * mean_walk_speed]
+
+    def get_state(self):
+        return {'caught': self.caught}
 
-        return pokemon_list
+    def set_state(self, state):
+        self.caught = state['caught']
 
     def add_caught(self, pokemon):
         for caught_pokemon in self.caught:
@@ -198,7 +206,7 @@ class MoveToMapPokemon(BaseTask):
         )
 
         # update map when 500m away from center and last update longer than 2 minutes away
-        now = int(time.time())
+        now = int(clock.now())
         if (dist > UPDATE_MAP_MIN_DISTANCE_METERS and
             now - self.last_map_update > UPDATE_MAP_MIN_TIME_SEC):
             requests.post(
@@ -226,10 +234,10 @@ class MoveToMapPokemon(BaseTask):
         self._teleport_to(pokemon)
         catch_worker = PokemonCatchWorker(pokemon, self.bot, self.config)
         api_encounter_response = catch_worker.create_encounter_api_call()
-        time.sleep(SNIPE_SLEEP_SEC)
+        clock.sleep(SNIPE_SLEEP_SEC)
         self._teleport_back(last_position)
         self.bot.api.set_position(last_position[0], last_position[1], alt)
-        time.sleep(SNIPE_SLEEP_SEC)
+        clock.sleep(SNIPE_SLEEP_SEC)
         self.bot.heartbeat()
         catch_worker.work(api_encounter_response)
         self.add_caught(pokemon)
@@ -316,7 +324,7 @@ class MoveToMapPokemon(BaseTask):
         Returns:
             Dictionary with Pokemon's info.
         """
-        now = int(time.time())
+        now = int(clock.now())
         return {
             'poke_name': pokemon['name'],
             'poke_dist': (format_dist(pokemon['dist'], self.unit)),
@@ -369,7 +377,7 @@ class MoveToMapPokemon(BaseTask):
         Returns:
             Walker
         """
-        now = int(time.time())
+        now = int(clock.now())
         self.emit_event(
             'move_to_map_pokemon_move_towards',
             formatted=('Moving towards {poke_name}, {poke_dist}, left ('
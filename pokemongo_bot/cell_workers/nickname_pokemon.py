@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 import os
 import json
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnInventoryChange, Every
 from pokemongo_bot.human_behaviour import sleep
 from pokemongo_bot.inventory import pokemons, Pokemon, Attack
 
@@ -201,6 +202,9 @@ class NicknamePokemon(BaseTask):
             if os.path.isfile(fn):
                 self.translate = json.load(open(fn))
 
+    def triggers(self):
+        return [OnInventoryChange(), Every(300)]
+
     def work(self):
         """
         Iterate over all user pokemons and nickname if needed
@@ -126,7 +126,7 @@ class PokemonCatchWorker(Datastore, BaseTask):
         )
 
         # simulate app
-        time.sleep(3)
+        sleep(3, delta=0)
 
         # check for VIP pokemon
         if is_vip:
@@ -152,7 +152,7 @@ class PokemonCatchWorker(Datastore, BaseTask):
                 break
 
         # simulate app
-        time.sleep(5)
+        sleep(5, delta=0)
 
     def create_encounter_api_call(self):
         encounter_id = self.pokemon['encounter_id']
@@ -6,6 +6,7 @@ import os
 from pokemongo_bot import inventory
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnInventoryChange, Every
 from pokemongo_bot.human_behaviour import sleep, action_delay
 from pokemongo_bot.item_list import Item
 from pokemongo_bot.worker_result import WorkerResult
@@ -48,6 +49,9 @@ class PokemonOptimizer(BaseTask):
 
         return inventory.Pokemons.get_space_left()
 
+    def triggers(self):
+        return [OnInventoryChange(), Every(300)]
+
     def work(self):
         if (not self.enabled) or (self.get_pokemon_slot_left() > 5):
             return WorkerResult.SUCCESS
@@ -76,16 +80,7 @@ class PokemonOptimizer(BaseTask):
         return WorkerResult.SUCCESS
 
     def open_inventory(self):
-        self.family_by_family_id.clear()
-
-        for pokemon in inventory.pokemons().all():
-            family_id = pokemon.first_evolution_id
-            setattr(pokemon, "ncp", pokemon.cp_percent)
-            setattr(pokemon, "dps", pokemon.moveset.dps)
-            setattr(pokemon, "dps_attack", pokemon.moveset.dps_attack)
-            setattr(pokemon, "dps_defense", pokemon.moveset.dps_defense)
-
-            self.family_by_family_id.setdefault(family_id, []).append(pokemon)
+        self.family_by_family_id = inventory.pokemons().groups('family_id')
 
     def save_web_inventory(self):
         inventory_items = self.bot.api.get_inventory()["responses"]["GET_INVENTORY"]["inventory_delta"]["inventory_items"]
@@ -201,6 +196,8 @@ class PokemonOptimizer(BaseTask):
 
             # Not sure if the evo keep the same id
             next_pid = pokemon.next_evolution_ids[0]
+            # the evolution is rated with the stats of the pokemon
+            pokemon.compute_stats()
             next_evo = copy.copy(pokemon)
             next_evo.pokemon_id = next_pid
             next_evo.static = inventory.pokemons().data_for(next_pid)
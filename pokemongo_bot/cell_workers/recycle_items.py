@@ -1,9 +1,6 @@
-import json
-import os
-
-from pokemongo_bot import inventory
-from pokemongo_bot.base_dir import _base_dir
+from pokemongo_bot import inventory, static_data
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnInventoryChange, Every
 from pokemongo_bot.human_behaviour import action_delay
 from pokemongo_bot.services.item_recycle_worker import ItemRecycler
 from pokemongo_bot.tree_config_builder import ConfigException
@@ -63,7 +60,7 @@ class RecycleItems(BaseTask):
         :rtype: None
         :raise: ConfigException: When an item doesn't exist in ../../data/items.json
         """
-        item_list = json.load(open(os.path.join(_base_dir, 'data', 'items.json')))
+        item_list = static_data.load('items.json')
         for config_item_name, bag_count in self.items_filter.iteritems():
             if config_item_name not in item_list.viewvalues():
                 if config_item_name not in item_list:
@@ -77,10 +74,15 @@ class RecycleItems(BaseTask):
         :return: True if the recycling process should be run; otherwise, False.
         :rtype: bool
         """
+        if self.bot.api.circuit_breakers.is_open('RECYCLE_INVENTORY_ITEM'):
+            return False
         if inventory.Items.get_space_left() <= (DEFAULT_MIN_EMPTY_SPACE if self.min_empty_space is None else self.min_empty_space):
             return True
         return False
 
+    def triggers(self):
+        return [OnInventoryChange(), Every(300)]
+
     def work(self):
         """
         Start the process of recycling items if necessary.
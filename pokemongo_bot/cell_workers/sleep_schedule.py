@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
-from time import sleep
 from random import uniform
+from pokemongo_bot import clock
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import Every
 
 
 class SleepSchedule(BaseTask):
@@ -38,6 +39,10 @@ class SleepSchedule(BaseTask):
         self._schedule_next_sleep()
         self._calculate_current_sleep()
 
+    def triggers(self):
+        # the sleep times are randomized by the hour, a minute late doesn't matter
+        return [Every(60)]
+
     def work(self):
         if self._should_sleep_now():
             self._sleep()
@@ -78,16 +83,16 @@ class SleepSchedule(BaseTask):
         self._current_end = self._current_sleep + timedelta(seconds = current_duration)
 
     def _should_sleep_now(self):
-        if datetime.now() >= self._next_sleep:
+        if clock.datetime_now() >= self._next_sleep:
             return True
-        if datetime.now() >= self._current_sleep and datetime.now() < self._current_end:
-            self._next_duration = (self._current_end - datetime.now()).total_seconds()
+        if clock.datetime_now() >= self._current_sleep and clock.datetime_now() < self._current_end:
+            self._next_duration = (self._current_end - clock.datetime_now()).total_seconds()
             return True
 
         return False
 
     def _get_next_sleep_schedule(self):
-        now = datetime.now() + self.SCHEDULING_MARGIN
+        now = clock.datetime_now() + self.SCHEDULING_MARGIN
         next_time = now.replace(hour=self.time.hour, minute=self.time.minute)
 
         next_time += timedelta(seconds=self._get_random_offset(self.time_random_offset))
@@ -113,7 +118,7 @@ class SleepSchedule(BaseTask):
         sleep_h, sleep_m = divmod(sleep_m, 60)
         sleep_hms = '%02d:%02d:%02d' % (sleep_h, sleep_m, sleep_s)
 
-        now = datetime.now()
+        now = clock.datetime_now()
         wake = str(now + timedelta(seconds=sleep_to_go))
 
         self.emit_event(
@@ -126,8 +131,8 @@ class SleepSchedule(BaseTask):
         )
         while sleep_to_go > 0:
             if sleep_to_go < self.LOG_INTERVAL_SECONDS:
-                sleep(sleep_to_go)
+                clock.sleep(sleep_to_go)
                 sleep_to_go = 0
             else:
-                sleep(self.LOG_INTERVAL_SECONDS)
+                clock.sleep(self.LOG_INTERVAL_SECONDS)
                 sleep_to_go -= self.LOG_INTERVAL_SECONDS
@@ -3,17 +3,16 @@ from __future__ import unicode_literals
 
 import json
 import os
-import time
 
 from pgoapi.utilities import f2i
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 
 from pokemongo_bot.constants import Constants
 from pokemongo_bot.human_behaviour import action_delay
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.base_dir import _base_dir
-from utils import distance, format_time, fort_details
+from utils import format_time, fort_details
 
 SPIN_REQUEST_RESULT_SUCCESS = 1
 SPIN_REQUEST_RESULT_OUT_OF_RANGE = 2
@@ -30,6 +29,8 @@ class SpinFort(BaseTask):
         self.spin_wait_max = self.config.get("spin_wait_max", 3)
 
     def should_run(self):
+        if self.bot.api.circuit_breakers.is_open('FORT_SEARCH'):
+            return False
         has_space_for_loot = inventory.Items.has_space_for_loot()
         if not has_space_for_loot and not self.ignore_item_count:
             self.emit_event(
@@ -100,7 +101,7 @@ class SpinFort(BaseTask):
                     'cooldown_complete_timestamp_ms')
                 if pokestop_cooldown:
                     self.bot.fort_timeouts.update({fort["id"]: pokestop_cooldown})
-                    seconds_since_epoch = time.time()
+                    seconds_since_epoch = clock.now()
                     minutes_left = format_time(
                         (pokestop_cooldown / 1000) - seconds_since_epoch
                     )
@@ -132,7 +133,7 @@ class SpinFort(BaseTask):
                         formatted='Probably got softban.'
                     )
                 else:
-                    self.bot.fort_timeouts[fort["id"]] = (time.time() + 300) * 1000  # Don't spin for 5m
+                    self.bot.fort_timeouts[fort["id"]] = (clock.now() + 300) * 1000  # Don't spin for 5m
                 return WorkerResult.ERROR
         action_delay(self.spin_wait_min, self.spin_wait_max)
 
@@ -142,16 +143,10 @@ class SpinFort(BaseTask):
         return WorkerResult.SUCCESS
 
     def get_forts_in_range(self):
-        forts = self.bot.get_forts(order_by_distance=True)
-        forts = filter(lambda fort: fort["id"] not in self.bot.fort_timeouts, forts)
-        forts = filter(lambda fort: distance(
-            self.bot.position[0],
-            self.bot.position[1],
-            fort['latitude'],
-            fort['longitude']
-        ) <= Constants.MAX_DISTANCE_FORT_IS_REACHABLE, forts)
-
-        return forts
+        return self.bot.nearest_forts(
+            max_distance=Constants.MAX_DISTANCE_FORT_IS_REACHABLE,
+            predicate=lambda fort: fort["id"] not in self.bot.fort_timeouts
+        )
 
     def get_items_awarded_from_fort_spinned(self, response_dict):
         items_awarded = response_dict['responses']['FORT_SEARCH'].get('items_awarded', {})
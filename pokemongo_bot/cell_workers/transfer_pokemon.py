@@ -4,6 +4,7 @@ import os
 from pokemongo_bot import inventory
 from pokemongo_bot.human_behaviour import action_delay
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import OnInventoryChange, Every
 from pokemongo_bot.inventory import Pokemons, Pokemon, Attack
 
 class TransferPokemon(BaseTask):
@@ -13,6 +14,9 @@ class TransferPokemon(BaseTask):
         self.transfer_wait_min = self.config.get('transfer_wait_min', 1)
         self.transfer_wait_max = self.config.get('transfer_wait_max', 4)
 
+    def triggers(self):
+        return [OnInventoryChange(), Every(300)]
+
     def work(self):
         pokemon_groups = self._release_pokemon_get_groups()
         for pokemon_id, group in pokemon_groups.iteritems():
@@ -78,19 +82,7 @@ class TransferPokemon(BaseTask):
                         self.release_pokemon(pokemon)
 
     def _release_pokemon_get_groups(self):
-        pokemon_groups = {}
-        for pokemon in inventory.pokemons().all():
-            if pokemon.in_fort or pokemon.is_favorite:
-                continue
-
-            group_id = pokemon.pokemon_id
-
-            if group_id not in pokemon_groups:
-                pokemon_groups[group_id] = []
-
-            pokemon_groups[group_id].append(pokemon)
-
-        return pokemon_groups
+        return inventory.pokemons().groups('pokemon_id', exclude=('favorite', 'deployed'))
 
     def should_release_pokemon(self, pokemon, keep_best_mode = False):
         release_config = self._get_release_config_for(pokemon.name)
@@ -1,9 +1,10 @@
 import ctypes
 import logging
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import Every
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.tree_config_builder import ConfigException
 
@@ -69,6 +70,9 @@ class UpdateLiveInventory(BaseTask):
             self.bot.event_manager.register_event('show_inventory', parameters=('items',))
 
 
+    def triggers(self):
+        return [Every(self.min_interval)]
+
     def work(self):
         """
         Displays the items if necessary.
@@ -97,7 +101,7 @@ class UpdateLiveInventory(BaseTask):
         :return: True if the stats should be displayed; otherwise, False.
         :rtype: bool
         """
-        return self.next_update is None or datetime.now() >= self.next_update
+        return self.next_update is None or clock.datetime_now() >= self.next_update
 
     def compute_next_update(self):
         """
@@ -105,7 +109,7 @@ class UpdateLiveInventory(BaseTask):
         :return: Nothing.
         :rtype: None
         """
-        self.next_update = datetime.now() + timedelta(seconds=self.min_interval)
+        self.next_update = clock.datetime_now() + timedelta(seconds=self.min_interval)
 
     def print_inv(self, items, is_debug=False):
         """
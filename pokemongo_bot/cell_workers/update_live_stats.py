@@ -1,8 +1,11 @@
 import ctypes
 from sys import stdout, platform as _platform
-from datetime import datetime, timedelta
+from datetime import timedelta
 
+from pokemongo_bot import clock
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.task_scheduler import Every
+from pokemongo_bot.rate_limiter import BACKGROUND
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.tree_config_builder import ConfigException
 
@@ -82,6 +85,9 @@ class UpdateLiveStats(BaseTask):
     def initialize(self):
         pass
 
+    def triggers(self):
+        return [Every(self.min_interval)]
+
     def work(self):
         """
         Displays the stats if necessary.
@@ -110,7 +116,7 @@ class UpdateLiveStats(BaseTask):
         """
         if not self.terminal_title and not self.terminal_log:
             return False
-        return self.next_update is None or datetime.now() >= self.next_update
+        return self.next_update is None or clock.datetime_now() >= self.next_update
 
     def _compute_next_update(self):
         """
@@ -118,7 +124,7 @@ class UpdateLiveStats(BaseTask):
         :return: Nothing.
         :rtype: None
         """
-        self.next_update = datetime.now() + timedelta(seconds=self.min_interval)
+        self.next_update = clock.datetime_now() + timedelta(seconds=self.min_interval)
 
     def _log_on_terminal(self, stats):
         """
@@ -274,7 +280,9 @@ class UpdateLiveStats(BaseTask):
         :rtype: dict
         """
         # TODO : find a better solution than calling the api
-        inventory_items = self.bot.api.get_inventory() \
+        with self.bot.api.priority(BACKGROUND):
+            response = self.bot.api.get_inventory()
+        inventory_items = response \
             .get('responses', {}) \
             .get('GET_INVENTORY', {}) \
             .get('inventory_delta', {}) \
@@ -9,6 +9,8 @@ from networkx.algorithms.clique import find_cliques
 import networkx as nx
 import numpy as np
 
+from pokemongo_bot import clock
+
 init()
 
 TIME_PERIODS = (
@@ -18,13 +20,24 @@ TIME_PERIODS = (
     (86400*7, 'week')
 )
 
-FORT_CACHE = {}
 def fort_details(bot, fort_id, latitude, longitude):
     """
     Lookup fort metadata and (if possible) serve from cache.
     """
+    cache = bot.fort_cache
+    details = cache.get(fort_id)
+    if details is not None:
+        return details
+
+    future = cache.pending.get(fort_id)
+    if future is not None:
+        # already being looked up in the background
+        try:
+            return future.result()['responses']['FORT_DETAILS']
+        except Exception:
+            return {}
 
-    if fort_id not in FORT_CACHE:
+    if cache.should_fetch(fort_id):
         """
         Lookup the fort details and cache the response for future use.
         """
@@ -32,12 +45,46 @@ def fort_details(bot, fort_id, latitude, longitude):
         request.fort_details(fort_id=fort_id, latitude=latitude, longitude=longitude)
         try:
             response_dict = request.call()
-            FORT_CACHE[fort_id] = response_dict['responses']['FORT_DETAILS']
+            cache.put(fort_id, response_dict['responses']['FORT_DETAILS'])
         except Exception:
-            pass
+            cache.put_failure(fort_id)
 
     # Just to avoid KeyErrors
-    return FORT_CACHE.get(fort_id, {})
+    return cache.get(fort_id) or {}
+
+def prefetch_fort_details(bot, forts, wait=True):
+    """
+    Lookup the metadata of several forts concurrently, so the following
+    fort_details calls are served from cache.
+    :param wait: Return once the lookups finished, otherwise they go on in the background.
+    """
+    cache = bot.fort_cache
+
+    def store(fort_id, future):
+        try:
+            cache.put(fort_id, future.result()['responses']['FORT_DETAILS'])
+        except Exception:
+            cache.put_failure(fort_id)
+        finally:
+            cache.pending.pop(fort_id, None)
+
+    futures = []
+    for fort in forts:
+        if not cache.should_fetch(fort['id']):
+            continue
+        future = bot.async_api.fort_details(
+            fort_id=fort['id'],
+            latitude=fort['latitude'],
+            longitude=fort['longitude']
+        )
+        # the future can already be done if the call ran inline
+        cache.pending[fort['id']] = future
+        future.add_done_callback(lambda future, fort_id=fort['id']: store(fort_id, future))
+        futures.append(future)
+
+    if wait:
+        for future in futures:
+            future.exception()
 
 def encode(cellid):
     output = []
@@ -52,6 +99,59 @@ def distance(lat1, lon1, lat2, lon2):
     return 12742 * asin(sqrt(a)) * 1000
 
 
+def distance_matrix(lats1, lons1, lats2, lons2):
+    """
+    Vectorized distance(): the distances in meters between every point of the
+    first list and every point of the second.
+    :rtype: numpy.ndarray of shape (len(lats1), len(lats2))
+    """
+    p = 0.017453292519943295
+    lat1 = np.asarray(lats1, dtype=float)[:, np.newaxis] * p
+    lon1 = np.asarray(lons1, dtype=float)[:, np.newaxis] * p
+    lat2 = np.asarray(lats2, dtype=float)[np.newaxis, :] * p
+    lon2 = np.asarray(lons2, dtype=float)[np.newaxis, :] * p
+    a = 0.5 - np.cos(lat2 - lat1) / 2 + np.cos(lat1) * np.cos(lat2) * (1 - np.cos(lon2 - lon1)) / 2
+    return 12742 * np.arcsin(np.sqrt(np.clip(a, 0, 1))) * 1000
+
+
+def distances(lat, lon, lats, lons):
+    """
+    Vectorized distance() from one point to many.
+    :rtype: numpy.ndarray
+    """
+    return distance_matrix([lat], [lon], lats, lons)[0]
+
+
+def pairs_within(lats, lons, radius, block_size=512):
+    """
+    Finds the pairs of points at most `radius` meters apart without building
+    the full distance matrix: points are sorted by latitude and each block is
+    only compared with the points in its latitude band.
+    :return: Indexes (i, j) of the pairs, with i < j.
+    :rtype: list of (int, int)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    order = np.argsort(lats, kind='mergesort')
+    sorted_lats = lats[order]
+    # meters per degree of latitude on the sphere of distance()
+    band = radius / (12742000 * pi / 360)
+
+    pairs = []
+    for start in xrange(0, len(order), block_size):
+        rows = order[start:start + block_size]
+        end = np.searchsorted(sorted_lats, sorted_lats[min(start + block_size, len(order)) - 1] + band, 'right')
+        # only compare with points after the first of the block, the pairs
+        # with earlier points were found by the previous blocks
+        columns = order[start:end]
+        within = distance_matrix(lats[rows], lons[rows], lats[columns], lons[columns]) <= radius
+        for row, column in zip(*np.nonzero(within)):
+            i, j = rows[row], columns[column]
+            if row < column:
+                pairs.append((int(min(i, j)), int(max(i, j))))
+    return pairs
+
+
 def convert(distance, from_unit, to_unit):  # Converts units
     # Example of converting distance from meters to feet:
     # convert(100.0,"m","ft")
@@ -215,18 +315,22 @@ def rad2deg(rad):
 
 def find_biggest_cluster(radius, points, order=None):
     graph = nx.Graph()
+    nodes = []
     for point in points:
             if order is '9QM=':
                 #is a lure module - 9QM=
-                now = int(time.time())
+                now = int(clock.now())
                 remaining = now - point['last_modified_timestamp_ms']
                 f = point['latitude'], point['longitude'], remaining
             else:
                 f = point['latitude'], point['longitude'], 0
             graph.add_node(f)
-            for node in graph.nodes():
-                if node != f and distance(f[0], f[1], node[0], node[1]) <= radius*2:
-                    graph.add_edge(f, node)
+            nodes.append(f)
+    if nodes:
+        lats, lngs, _ = zip(*nodes)
+        for i, j in pairs_within(lats, lngs, radius*2):
+            if nodes[i] != nodes[j]:
+                graph.add_edge(nodes[i], nodes[j])
     cliques = list(find_cliques(graph))
     if len(cliques) > 0:
         max_clique = max(list(find_cliques(graph)), key=lambda l: (len(l), sum(x[2] for x in l)))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import time
+from datetime import datetime
+
+
+class RealClock(object):
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock(object):
+    """
+    Clock that jumps forward instead of sleeping, so the bot runs as fast as
+    the CPU allows while still seeing the delays it asked for.
+    """
+
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else float(start)
+        self.slept = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+            self.slept += seconds
+
+
+_clock = RealClock()
+_sleep_listeners = []
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    global _clock
+    _clock = clock
+
+
+def now():
+    return _clock.time()
+
+
+def datetime_now():
+    """
+    :return: The local time of the clock, to use instead of datetime.now().
+    :rtype: datetime
+    """
+    return datetime.fromtimestamp(_clock.time())
+
+
+def add_sleep_listener(listener):
+    """
+    :param listener: Called with the seconds of every sleep, from the sleeping thread.
+    """
+    _sleep_listeners.append(listener)
+
+
+def remove_sleep_listener(listener):
+    if listener in _sleep_listeners:
+        _sleep_listeners.remove(listener)
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
+    if seconds > 0:
+        for listener in _sleep_listeners:
+            listener(seconds)
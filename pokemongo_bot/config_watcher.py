@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import clock
+
+
+class ConfigWatcher(object):
+    """
+    Notices changes of the config file by looking at its modification time,
+    at most every `interval` seconds. Checked between ticks, so a new
+    configuration is applied before a tick and never during one.
+    """
+
+    def __init__(self, path, interval=5):
+        self.path = path
+        self.interval = interval
+        self.last_check = clock.now()
+        self._version = self._read_version()
+
+    def _read_version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def changed(self):
+        """
+        :return: True if the file changed since the previous call.
+        :rtype: bool
+        """
+        if clock.now() - self.last_check < self.interval:
+            return False
+        self.last_check = clock.now()
+
+        version = self._read_version()
+        if version is None or version == self._version:
+            return False
+        self._version = version
+        return True
@@ -1,2 +1,3 @@
 class Constants(object):
   MAX_DISTANCE_FORT_IS_REACHABLE = 40 # meters
+  MAX_DISTANCE_FORT_DETAILS_PREFETCH = 500 # meters
@@ -23,12 +23,20 @@ _DEFAULT = object()
 BACKEND = _DEFAULT
 DATABASE = _DEFAULT
 
+_BACKENDS = {}
+
 def _init_database(connection_string=':memory:', driver='sqlite'):
+    """
+    Connects to the database once per connection string and makes it the one
+    migrations run against, so a process can run bots of several accounts.
+    """
     global BACKEND, DATABASE
 
-    if DATABASE is _DEFAULT:
-        BACKEND = get_backend('{driver}://{conn}'.format(driver=driver, conn=connection_string))
-        DATABASE = BACKEND.connection
+    url = '{driver}://{conn}'.format(driver=driver, conn=connection_string)
+    if url not in _BACKENDS:
+        _BACKENDS[url] = get_backend(url)
+    BACKEND = _BACKENDS[url]
+    DATABASE = BACKEND.connection
 
     return DATABASE
 
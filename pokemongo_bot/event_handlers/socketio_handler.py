@@ -10,11 +10,14 @@ from pokemongo_bot.event_manager import EventHandler
 class SocketIoHandler(EventHandler):
 
 
-    def __init__(self, bot, url):
+    def __init__(self, bot, url, sio=None):
+        """
+        :param sio: A connected client, e.g. shared by the bots of several accounts.
+        """
         self.bot = bot
         self.host, port_str = url.split(':')
         self.port = int(port_str)
-        self.sio = SocketIO(self.host, self.port)
+        self.sio = sio or SocketIO(self.host, self.port)
 
     def handle_event(self, event, sender, level, msg, data):
         if msg:
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import clock
+
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class FortCache(object):
+    """
+    Least recently used cache of FORT_DETAILS responses.
+
+    Details are kept for `ttl` seconds and saved per account, so a restarted
+    bot doesn't look up every fort again. Failed lookups are remembered too
+    and only retried after `retry_delay` seconds.
+
+    Lookups running in the background are tracked in `pending` (fort id to
+    ApiFuture), so a task needing the details waits for them instead of
+    sending the same request again.
+
+    With a `backend` (a cache shared by other processes, usually a
+    supervisor.WorldCacheClient) misses are looked up in the backend and new
+    details are written to it too.
+    """
+
+    def __init__(self, path=None, max_size=2000, ttl=DEFAULT_TTL, retry_delay=300, backend=None):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self.backend = backend
+        self.pending = {}
+        self._lock = threading.Lock()
+        self._details = OrderedDict()
+        self._failures = {}
+
+    def __len__(self):
+        return len(self._details)
+
+    def get(self, fort_id):
+        """
+        :return: The cached details of the fort, None if we don't know them.
+        :rtype: dict
+        """
+        entry = self.entry(fort_id)
+        return entry[1] if entry is not None else None
+
+    def entry(self, fort_id):
+        """
+        :return: (fetch time, details) of the fort, None if we don't know them.
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._details.pop(fort_id, None)
+            if entry is not None and clock.now() - entry[0] <= self.ttl:
+                self._details[fort_id] = entry
+                return entry
+
+        entry = self._backend_call('entry', fort_id)
+        if entry is None:
+            return None
+        self._put(fort_id, entry[1], entry[0])
+        return tuple(entry)
+
+    def should_fetch(self, fort_id):
+        """
+        :return: False if the details are cached, being fetched or failed recently.
+        :rtype: bool
+        """
+        if fort_id in self.pending:
+            return False
+        with self._lock:
+            if self._failures.get(fort_id, 0) > clock.now():
+                return False
+            entry = self._details.get(fort_id)
+            if entry is not None and clock.now() - entry[0] <= self.ttl:
+                return False
+        return self.entry(fort_id) is None
+
+    def put(self, fort_id, details, fetched_at=None):
+        fetched_at = fetched_at or clock.now()
+        self._put(fort_id, details, fetched_at)
+        self._backend_call('put', fort_id, details, fetched_at)
+
+    def _put(self, fort_id, details, fetched_at):
+        with self._lock:
+            self._failures.pop(fort_id, None)
+            self._details.pop(fort_id, None)
+            self._details[fort_id] = (fetched_at, details)
+            while len(self._details) > self.max_size:
+                self._details.popitem(last=False)
+
+    def _backend_call(self, method, *args):
+        if self.backend is None:
+            return None
+        try:
+            return getattr(self.backend, method)(*args)
+        except (IOError, EOFError):
+            # the process holding the backend is gone, keep going on our own
+            self.backend = None
+            return None
+
+    def put_failure(self, fort_id):
+        with self._lock:
+            self._failures[fort_id] = clock.now() + self.retry_delay
+
+    def entries(self):
+        """
+        :return: [fort id, fetch time, details] of the cached forts, least recently used first.
+        :rtype: list
+        """
+        with self._lock:
+            return [[fort_id, fetched_at, details] for fort_id, (fetched_at, details) in self._details.iteritems()]
+
+    def restore(self, entries):
+        """
+        Adds entries returned by entries(), expired ones are skipped.
+        """
+        now = clock.now()
+        for fort_id, fetched_at, details in entries:
+            if now - fetched_at <= self.ttl:
+                self._put(fort_id, details, fetched_at)
+
+    def load(self):
+        """
+        Loads the details saved by a previous run.
+        Raises IOError or ValueError if the file can't be read.
+        """
+        with open(self.path) as f:
+            self.restore(json.load(f))
+
+    def save(self):
+        if self.backend is not None:
+            # saved by the owner of the backend
+            return
+        entries = self.entries()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.rename(tmp_path, self.path)
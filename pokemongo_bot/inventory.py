@@ -1,8 +1,13 @@
+import bisect
 import json
 import logging
 import os
+import threading
 from collections import OrderedDict
 
+import numpy as np
+
+from pokemongo_bot import static_data
 from pokemongo_bot.base_dir import _base_dir
 
 '''
@@ -17,10 +22,33 @@ https://www.reddit.com/r/pokemongodev/comments/4w7mdg/combat_damage_calculation_
 #
 # Abstraction
 
+class _StaticData(type):
+    """
+    Loads the static data of a component when one of its STATIC_ATTRIBUTES
+    is first read, so importing this module doesn't build every pokemon,
+    move and type.
+    """
+
+    def __init__(cls, name, bases, attributes):
+        super(_StaticData, cls).__init__(name, bases, attributes)
+        # one per component: building the data of one can read the data of
+        # others (pokemons need their moves and types)
+        cls._static_data_lock = threading.Lock()
+
+    def __getattr__(cls, name):
+        if name not in type.__getattribute__(cls, 'STATIC_ATTRIBUTES') or cls.STATIC_DATA_FILE is None:
+            raise AttributeError(name)
+        cls.init_static_data()
+        return type.__getattribute__(cls, name)
+
+
 class _StaticInventoryComponent(object):
+    __metaclass__ = _StaticData
+
     STATIC_DATA_FILE = None  # optionally load static data from file,
                              # dropping the data in a static variable named STATIC_DATA
-    STATIC_DATA = None
+    # class attributes set by init_static_data
+    STATIC_ATTRIBUTES = ('STATIC_DATA',)
 
     def __init__(self):
         if self.STATIC_DATA_FILE is not None:
@@ -28,9 +56,14 @@ class _StaticInventoryComponent(object):
 
     @classmethod
     def init_static_data(cls):
-        if not hasattr(cls, 'STATIC_DATA') or cls.STATIC_DATA is None:
-            cls.STATIC_DATA = cls.process_static_data(
-                json.load(open(cls.STATIC_DATA_FILE)))
+        # the first use can come from any thread: STATIC_DATA is set last,
+        # once process_static_data set every other static attribute
+        if 'STATIC_DATA' in cls.__dict__:
+            return
+        with cls._static_data_lock:
+            if 'STATIC_DATA' not in cls.__dict__:
+                cls.STATIC_DATA = cls.process_static_data(
+                    static_data.load(os.path.basename(cls.STATIC_DATA_FILE)))
 
     @classmethod
     def process_static_data(cls, data):
@@ -57,7 +90,7 @@ class _BaseInventoryComponent(_StaticInventoryComponent):
         assert self.ID_FIELD is not None
         ret = {}
         for item in inventory:
-            data = item['inventory_item_data']
+            data = item.get('inventory_item_data', {})
             if self.TYPE in data:
                 item = data[self.TYPE]
                 key = item[self.ID_FIELD]
@@ -67,6 +100,13 @@ class _BaseInventoryComponent(_StaticInventoryComponent):
     def refresh(self, inventory):
         self._data = self.retrieve_data(inventory)
 
+    def apply_delta(self, inventory):
+        """
+        Adds or replaces the objects changed by a GET_INVENTORY delta, the
+        others are kept as they are.
+        """
+        self._data.update(self.retrieve_data(inventory))
+
     def get(self, object_id):
         return self._data.get(object_id)
 
@@ -137,6 +177,7 @@ class Item(object):
         if self.count < amount:
             raise Exception('Tried to remove more {} than you have'.format(self.name))
         self.count -= amount
+        _changed()
 
     def add(self, amount):
         """
@@ -149,6 +190,7 @@ class Item(object):
         if amount < 0:
             raise Exception('Must add positive amount of {}'.format(self.name))
         self.count += amount
+        _changed()
 
     def __str__(self):
         return self.name + " : " + str(self.count)
@@ -237,6 +279,20 @@ class Pokemons(_BaseInventoryComponent):
     TYPE = 'pokemon_data'
     ID_FIELD = 'id'
     STATIC_DATA_FILE = os.path.join(_base_dir, 'data', 'pokemon.json')
+    # secondary indexes of the pokemons (not the eggs), kept up to date on
+    # every change of the bag so the queries don't go through all of it
+    INDEXES = {
+        'pokemon_id': lambda pokemon: pokemon.pokemon_id,
+        'family_id': lambda pokemon: pokemon.family_id,
+        'favorite': lambda pokemon: pokemon.is_favorite,
+        'deployed': lambda pokemon: pokemon.in_fort,
+    }
+    # stats the pokemons can be sorted by
+    SORTED_STATS = ('iv', 'ivcp', 'cp', 'ncp')
+
+    def __init__(self):
+        super(Pokemons, self).__init__()
+        self._clear_indexes()
 
     @classmethod
     def process_static_data(cls, data):
@@ -322,17 +378,113 @@ class Pokemons(_BaseInventoryComponent):
         # makes caller's lives more difficult)
         return [p for p in super(Pokemons, self).all() if not isinstance(p, Egg)]
 
+    def refresh(self, inventory):
+        super(Pokemons, self).refresh(inventory)
+        self._clear_indexes()
+        for pokemon in self._data.itervalues():
+            self._index(pokemon)
+
+    def apply_delta(self, inventory):
+        for unique_id, pokemon in self.retrieve_data(inventory).iteritems():
+            self._put(unique_id, pokemon)
+        # released, evolved and hatched pokemons come as deleted items
+        for item in inventory:
+            if 'deleted_item' in item:
+                self._pop(item['deleted_item'].get('pokemon_id'))
+
     def add(self, pokemon):
         if pokemon.unique_id <= 0:
             raise ValueError("Can't add a pokemon without id")
         if pokemon.unique_id in self._data:
             raise ValueError("Pokemon already present in the inventory")
-        self._data[pokemon.unique_id] = pokemon
+        self._put(pokemon.unique_id, pokemon)
+        _changed()
 
     def remove(self, pokemon_unique_id):
         if pokemon_unique_id not in self._data:
             raise ValueError("Pokemon not present in the inventory")
-        self._data.pop(pokemon_unique_id)
+        self._pop(pokemon_unique_id)
+        _changed()
+
+    def with_pokemon_id(self, pokemon_id):
+        return self._indexes['pokemon_id'].get(pokemon_id, {}).values()
+
+    def in_family(self, family_id):
+        return self._indexes['family_id'].get(family_id, {}).values()
+
+    def favorites(self):
+        return self._indexes['favorite'].get(True, {}).values()
+
+    def deployed(self):
+        return self._indexes['deployed'].get(True, {}).values()
+
+    def groups(self, index, exclude=()):
+        """
+        :param index: 'pokemon_id' or 'family_id'.
+        :param exclude: Pokemons to leave out: 'favorite', 'deployed' or both.
+        :return: Lists of pokemons by value of the index.
+        :rtype: dict
+        """
+        groups = {key: pokemons.values() for key, pokemons in self._indexes[index].iteritems()}
+        excluded = set()
+        for name in exclude:
+            excluded.update(self._indexes[name].get(True, {}).itervalues())
+        for pokemon in excluded:
+            key = self.INDEXES[index](pokemon)
+            groups[key].remove(pokemon)
+            if not groups[key]:
+                del groups[key]
+        return groups
+
+    def sorted_by(self, stat, reverse=True):
+        """
+        :param stat: One of SORTED_STATS.
+        :return: The pokemons sorted by `stat`, highest first by default.
+        :rtype: list
+        """
+        if stat not in self.SORTED_STATS:
+            raise ValueError("Can't sort pokemons by {}".format(stat))
+        # built on the first query only, the stats are computed on first use
+        if stat not in self._sorted:
+            self._sorted[stat] = sorted((getattr(pokemon, stat), pokemon.unique_id) for pokemon in self.all())
+        pokemons = [self._data[unique_id] for _, unique_id in self._sorted[stat]]
+        if reverse:
+            pokemons.reverse()
+        return pokemons
+
+    def _clear_indexes(self):
+        self._indexes = {name: {} for name in self.INDEXES}
+        # stat -> sorted (value, unique id) pairs
+        self._sorted = {}
+
+    def _put(self, unique_id, pokemon):
+        self._pop(unique_id)
+        self._data[unique_id] = pokemon
+        self._index(pokemon)
+
+    def _pop(self, unique_id):
+        pokemon = self._data.pop(unique_id, None)
+        if pokemon is not None:
+            self._unindex(pokemon)
+
+    def _index(self, pokemon):
+        if isinstance(pokemon, Egg):
+            return
+        for name, key in self.INDEXES.iteritems():
+            self._indexes[name].setdefault(key(pokemon), {})[pokemon.unique_id] = pokemon
+        for stat, view in self._sorted.iteritems():
+            bisect.insort(view, (getattr(pokemon, stat), pokemon.unique_id))
+
+    def _unindex(self, pokemon):
+        if isinstance(pokemon, Egg):
+            return
+        for name, key in self.INDEXES.iteritems():
+            index = self._indexes[name]
+            index[key(pokemon)].pop(pokemon.unique_id, None)
+            if not index[key(pokemon)]:
+                del index[key(pokemon)]
+        for stat, view in self._sorted.iteritems():
+            del view[bisect.bisect_left(view, (getattr(pokemon, stat), pokemon.unique_id))]
 
 
 #
@@ -412,37 +564,73 @@ class LevelToCPm(_StaticInventoryComponent):
 
     STATIC_DATA_FILE = os.path.join(_base_dir, 'data', 'level_to_cpm.json')
     MAX_LEVEL = 40
-    MAX_CPM = .0
     # half of the lowest difference between CPMs
     HALF_DIFF_BETWEEN_HALF_LVL = 14e-3
+    # LEVELS and CPMS are numpy arrays sorted by level, the CPMs grow with the level
+    STATIC_ATTRIBUTES = ('STATIC_DATA', 'MAX_CPM', 'LEVELS', 'CPMS', '_CPM_BY_LEVEL', '_SORTED_CPMS')
 
     @classmethod
-    def init_static_data(cls):
-        super(LevelToCPm, cls).init_static_data()
+    def process_static_data(cls, data):
+        cls._CPM_BY_LEVEL = {float(level): cpm for level, cpm in data.iteritems()}
+        levels = sorted(cls._CPM_BY_LEVEL)
+        cls._SORTED_CPMS = [cls._CPM_BY_LEVEL[level] for level in levels]
+        assert cls._SORTED_CPMS == sorted(cls._SORTED_CPMS)
+        cls.LEVELS = np.array(levels)
+        cls.CPMS = np.array(cls._SORTED_CPMS)
         cls.MAX_CPM = cls.cp_multiplier_for(cls.MAX_LEVEL)
         assert cls.MAX_CPM > .0
+        return data
 
     @classmethod
     def cp_multiplier_for(cls, level):
         # type: (Union[float, int, string]) -> float
-        level = float(level)
-        level = str(int(level) if level.is_integer() else level)
-        return cls.STATIC_DATA[level]
+        return cls._CPM_BY_LEVEL[float(level)]
 
     @classmethod
     def level_from_cpm(cls, cp_multiplier):
         # type: (float) -> float
-        for lvl, cpm in cls.STATIC_DATA.iteritems():
-            diff = abs(cpm - cp_multiplier)
-            if diff <= cls.HALF_DIFF_BETWEEN_HALF_LVL:
-                return float(lvl)
-        raise ValueError("Unknown cp_multiplier: {}".format(cp_multiplier))
+        cpms = cls._SORTED_CPMS
+        index = bisect.bisect_left(cpms, cp_multiplier)
+        # the closest CPM is on either side of the insertion point
+        if index == len(cpms) or index > 0 and cp_multiplier - cpms[index - 1] < cpms[index] - cp_multiplier:
+            index -= 1
+        if abs(cpms[index] - cp_multiplier) > cls.HALF_DIFF_BETWEEN_HALF_LVL:
+            raise ValueError("Unknown cp_multiplier: {}".format(cp_multiplier))
+        return cls.LEVELS[index].item()
+
+    @classmethod
+    def cp_multipliers_for(cls, levels):
+        """
+        :param levels: Levels, multiples of 0.5.
+        :return: The CPM of each level.
+        :rtype: numpy.ndarray
+        """
+        levels = np.asarray(levels, dtype=float)
+        indexes = np.clip(np.searchsorted(cls.LEVELS, levels), 0, len(cls.LEVELS) - 1)
+        if not np.array_equal(cls.LEVELS[indexes], levels):
+            raise ValueError("Unknown levels: {}".format(levels[cls.LEVELS[indexes] != levels]))
+        return cls.CPMS[indexes]
+
+    @classmethod
+    def levels_from_cpms(cls, cp_multipliers):
+        """
+        :param cp_multipliers: Total CPMs of pokemons.
+        :return: The level of each CPM.
+        :rtype: numpy.ndarray
+        """
+        cp_multipliers = np.asarray(cp_multipliers, dtype=float)
+        upper = np.clip(np.searchsorted(cls.CPMS, cp_multipliers), 1, len(cls.CPMS) - 1)
+        lower = upper - 1
+        closest = np.where(cp_multipliers - cls.CPMS[lower] < cls.CPMS[upper] - cp_multipliers, lower, upper)
+        unknown = np.abs(cls.CPMS[closest] - cp_multipliers) > cls.HALF_DIFF_BETWEEN_HALF_LVL
+        if unknown.any():
+            raise ValueError("Unknown cp_multipliers: {}".format(cp_multipliers[unknown]))
+        return cls.LEVELS[closest]
 
 
 class _Attacks(_StaticInventoryComponent):
-    BY_NAME = {}  # type: Dict[string, Attack]
-    BY_TYPE = {}  # type: Dict[List[Attack]]
-    BY_DPS = []  # type: List[Attack]
+    # BY_NAME: Dict[string, Attack], BY_TYPE: Dict[List[Attack]], BY_DPS: List[Attack]
+    STATIC_ATTRIBUTES = ('STATIC_DATA', 'BY_NAME', 'BY_TYPE', 'BY_DPS')
 
     @classmethod
     def process_static_data(cls, moves):
@@ -578,11 +766,13 @@ class Candy(object):
         if self.quantity < amount:
             raise Exception('Tried to consume more {} candy than you have'.format(self.type))
         self.quantity -= amount
+        _changed()
 
     def add(self, amount):
         if amount < 0:
             raise Exception('Must add positive amount of candy')
         self.quantity += amount
+        _changed()
 
 
 class Egg(object):
@@ -753,8 +943,16 @@ class PokemonInfo(object):
 
 
 class Pokemon(object):
+    # there can be a thousand of them, refreshed with the inventory, so they
+    # don't keep the raw dict and compute the derived stats on first use
+    __slots__ = (
+        'unique_id', 'pokemon_id', 'static', 'cp', 'cp_bm', 'cp_am', 'cp_m', 'level',
+        'hp_max', 'hp', 'iv_attack', 'iv_defense', 'iv_stamina', 'name', 'nickname_raw',
+        'nickname', 'in_fort', 'is_favorite', 'fast_attack', 'charged_attack',
+        'cp_exact', '_iv', '_ivcp', '_cp_percent', '_moveset',
+    )
+
     def __init__(self, data):
-        self._data = data
         # Unique ID for this particular Pokemon
         self.unique_id = data.get('id', 0)
         # Id of the such pokemons in pokedex
@@ -785,11 +983,6 @@ class Pokemon(object):
         self.iv_defense = data.get('individual_defense', 0)
         self.iv_stamina = data.get('individual_stamina', 0)
 
-        # Basic Values of the pokemon (identical for all pokemons of one kind)
-        base_attack = self.static.base_attack
-        base_defense = self.static.base_defense
-        base_stamina = self.static.base_stamina
-
         self.name = self.static.name
         self.nickname_raw = data.get('nickname', '')
         self.nickname = self.nickname_raw or self.name
@@ -800,26 +993,80 @@ class Pokemon(object):
         self.fast_attack = FastAttacks.data_for(data['move_1'])
         self.charged_attack = ChargedAttacks.data_for(data['move_2'])  # type: ChargedAttack
 
-        # Individial values (IV) perfection percent
-        self.iv = self._compute_iv_perfection()
-
-        # IV CP perfection - kind of IV perfection percent but calculated
-        #  using weight of each IV in its contribution to CP of the best
-        #  evolution of current pokemon
-        # So it tends to be more accurate than simple IV perfection
-        self.ivcp = self._compute_cp_perfection()
-
-        # Exact value of current CP (not rounded)
+        # Exact value of current CP (not rounded), cheap enough to check the
+        # pokemon data as soon as it is parsed
         self.cp_exact = _calc_cp(
-            base_attack, base_defense, base_stamina,
+            self.static.base_attack, self.static.base_defense, self.static.base_stamina,
             self.iv_attack, self.iv_defense, self.iv_stamina, self.cp_m)
         assert max(int(self.cp_exact), 10) == self.cp
 
-        # Percent of maximum possible CP
-        self.cp_percent = self.cp_exact / self.static.max_cp
+        self._iv = None
+        self._ivcp = None
+        self._cp_percent = None
+        self._moveset = None
 
-        # Get moveset instance with calculated DPS and perfection percents
-        self.moveset = self._get_moveset()
+    @property
+    def iv(self):
+        """
+        Individial values (IV) perfection percent
+        """
+        if self._iv is None:
+            self._iv = self._compute_iv_perfection()
+        return self._iv
+
+    @property
+    def ivcp(self):
+        """
+        IV CP perfection - kind of IV perfection percent but calculated
+        using weight of each IV in its contribution to CP of the best
+        evolution of current pokemon.
+        So it tends to be more accurate than simple IV perfection.
+        """
+        if self._ivcp is None:
+            self._ivcp = self._compute_cp_perfection()
+        return self._ivcp
+
+    @property
+    def cp_percent(self):
+        """
+        Percent of maximum possible CP
+        """
+        if self._cp_percent is None:
+            self._cp_percent = self.cp_exact / self.static.max_cp
+        return self._cp_percent
+
+    @property
+    def moveset(self):
+        """
+        Moveset instance with calculated DPS and perfection percents
+        """
+        if self._moveset is None:
+            self._moveset = self._get_moveset()
+        return self._moveset
+
+    # names of the stats in the sort criteria of the PokemonOptimizer
+    @property
+    def ncp(self):
+        return self.cp_percent
+
+    @property
+    def dps(self):
+        return self.moveset.dps
+
+    @property
+    def dps_attack(self):
+        return self.moveset.dps_attack
+
+    @property
+    def dps_defense(self):
+        return self.moveset.dps_defense
+
+    def compute_stats(self):
+        """
+        Computes the derived stats now rather than on first use, for copies
+        that must keep the stats of this pokemon.
+        """
+        return self.iv, self.ivcp, self.cp_percent, self.moveset
 
     def __str__(self):
         return self.name
@@ -1073,26 +1320,106 @@ class Moveset(object):
 
 
 class Inventory(object):
-    def __init__(self, bot):
+    # identifier field of the inventory item types having several items,
+    # the other types hold a single item
+    ITEM_ID_FIELDS = {
+        'pokemon_data': 'id',
+        'item': 'item_id',
+        'pokedex_entry': 'pokemon_id',
+        'candy': 'family_id',
+        'avatar_item': 'avatar_template_id',
+    }
+
+    def __init__(self, bot, inventory_items=None):
         self.bot = bot
         self.pokedex = Pokedex()
         self.candy = Candies()
         self.items = Items()
         self.pokemons = Pokemons()
-        self.refresh()
+        self.inventory_items = None
+        self._items_by_key = {}
+        # new_timestamp_ms of the last response, the changes made since then
+        # are all we need to ask for
+        self.last_timestamp_ms = None
+        # bumped on every change of the cached inventory
+        self.version = 0
+        self.refresh(inventory_items)
         self.item_inventory_size = None
         self.pokemon_inventory_size = None
 
-    def refresh(self):
-        inventory = self.bot.api.get_inventory()
-        inventory = inventory['responses']['GET_INVENTORY']['inventory_delta']['inventory_items']
+    def refresh(self, inventory_items=None):
+        """
+        Fetches the changes since the previous refresh from the server and
+        applies them, only the changed pokemons and items are parsed again.
+        The whole inventory is fetched the first time.
+
+        :param inventory_items: Items of a previous GET_INVENTORY response to use instead of the server's.
+        """
+        if inventory_items is not None:
+            self.last_timestamp_ms = None
+            self._replace(inventory_items)
+            return
+
+        inventory_delta = self._fetch_delta()
+        # without a known timestamp, or when it can't tell what changed, the
+        # server answers with the whole inventory
+        if inventory_delta.get('original_timestamp_ms'):
+            self._apply_delta(inventory_delta.get('inventory_items', []))
+        else:
+            self._replace(inventory_delta.get('inventory_items', []))
+
+    def _fetch_delta(self):
+        if self.last_timestamp_ms is None:
+            response = self.bot.api.get_inventory()
+        else:
+            response = self.bot.api.get_inventory(last_timestamp_ms=self.last_timestamp_ms)
+        inventory_delta = response['responses']['GET_INVENTORY']['inventory_delta']
+        self.last_timestamp_ms = inventory_delta.get('new_timestamp_ms') or None
+        return inventory_delta
+
+    def _item_key(self, item):
+        if 'deleted_item' in item:
+            return 'pokemon_data', item['deleted_item'].get('pokemon_id')
+        if not item.get('inventory_item_data'):
+            return None
+        item_type, data = item['inventory_item_data'].items()[0]
+        return item_type, data.get(self.ITEM_ID_FIELDS.get(item_type))
+
+    def _replace(self, inventory_items):
+        changed = inventory_items != self.inventory_items
+        self.inventory_items = inventory_items
+        self._items_by_key = {}
+        for item in inventory_items:
+            key = self._item_key(item)
+            if key is not None:
+                self._items_by_key[key] = item
+        for i in (self.pokedex, self.candy, self.items, self.pokemons):
+            i.refresh(inventory_items)
+        if changed:
+            self._updated()
+
+    def _apply_delta(self, inventory_items):
+        if not inventory_items:
+            return
+        for item in inventory_items:
+            key = self._item_key(item)
+            if key is None:
+                continue
+            if 'deleted_item' in item:
+                self._items_by_key.pop(key, None)
+            else:
+                self._items_by_key[key] = item
+        self.inventory_items = self._items_by_key.values()
         for i in (self.pokedex, self.candy, self.items, self.pokemons):
-            i.refresh(inventory)
+            i.apply_delta(inventory_items)
+        self._updated()
 
+    def _updated(self):
+        self.version += 1
         user_web_inventory = os.path.join(_base_dir, 'web', 'inventory-%s.json' % (self.bot.config.username))
         try:
             with open(user_web_inventory, 'w') as outfile:
-                json.dump(inventory, outfile)
+                json.dump(self.inventory_items, outfile)
         except IOError as e:
             errmsg = '[x] Error while opening location file: user_web_inventory'
 
@@ -1123,6 +1450,11 @@ RESISTANCE_FACTOR = 0.8
 _inventory = None  # type: Inventory
 
 
+def _changed():
+    if _inventory is not None:
+        _inventory.version += 1
+
+
 def _calc_cp(base_attack, base_defense, base_stamina,
              iv_attack=15, iv_defense=15, iv_stamina=15,
              cp_multiplier=.0):
@@ -1161,29 +1493,48 @@ def _calc_cp(base_attack, base_defense, base_stamina,
         * (cp_multiplier ** 2) / 10
 
 
-# Initialize static data in the right order
-Types()  # init Types
-LevelToCPm()  # init LevelToCPm
-FastAttacks()  # init FastAttacks
-ChargedAttacks()  # init ChargedAttacks
-Pokemons()  # init Pokemons
-
-
 #
 # Usage helpers
 # TODO : Complete the doc
 # Only type return have been filled for now. It helps the IDE to suggest methods of the class.
 
-def init_inventory(bot):
+def init_inventory(bot, inventory_items=None):
     """
     Initialises the cached inventory, retrieves data from the server.
     :param bot: Instance of the bot.
     :type bot: pokemongo_bot.PokemonGoBot
-    :return: Nothing.
-    :rtype: None
+    :param inventory_items: Items of a previous GET_INVENTORY response to start from instead.
+    :return: The cached inventory.
+    :rtype: Inventory
     """
     global _inventory
-    _inventory = Inventory(bot)
+    _inventory = Inventory(bot, inventory_items)
+    return _inventory
+
+
+def get_inventory():
+    """
+    :return: The cached inventory, None before init_inventory.
+    :rtype: Inventory
+    """
+    return _inventory
+
+
+def set_inventory(inventory):
+    """
+    Makes `inventory` the cached inventory, for processes running several bots.
+    :type inventory: Inventory
+    """
+    global _inventory
+    _inventory = inventory
+
+
+def version():
+    """
+    :return: A number that changes whenever the cached inventory changes.
+    :rtype: int
+    """
+    return _inventory.version if _inventory is not None else 0
 
 
 def refresh_inventory():
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+# Sightings are sent in full with every response, everything else only when
+# it changed since the timestamp we sent for the cell
+POKEMON_KEYS = ('wild_pokemons', 'catchable_pokemons', 'nearby_pokemons')
+
+
+def _spawn_point_key(spawn_point):
+    return spawn_point.get('latitude'), spawn_point.get('longitude')
+
+
+class MapCell(object):
+    """
+    Merged state of one S2 cell.
+    """
+
+    def __init__(self, cell_id):
+        self.cell_id = cell_id
+        self.timestamp = 0
+        self.forts = OrderedDict()
+        self.spawn_points = OrderedDict()
+        self.pokemons = dict((key, []) for key in POKEMON_KEYS)
+
+    def merge(self, delta):
+        """
+        :param delta: A map cell of a GET_MAP_OBJECTS response.
+        :type delta: dict
+        """
+        for object_id in delta.get('deleted_objects', []):
+            self.forts.pop(object_id, None)
+        for fort in delta.get('forts', []):
+            self.forts[fort['id']] = fort
+        for spawn_point in delta.get('spawn_points', []):
+            self.spawn_points[_spawn_point_key(spawn_point)] = spawn_point
+        for key in POKEMON_KEYS:
+            self.pokemons[key] = delta.get(key, [])
+        self.timestamp = max(self.timestamp, delta.get('current_timestamp_ms', 0))
+
+    def to_dict(self):
+        cell = {
+            's2_cell_id': self.cell_id,
+            'current_timestamp_ms': self.timestamp,
+            'forts': self.forts.values(),
+            'spawn_points': self.spawn_points.values(),
+        }
+        for key in POKEMON_KEYS:
+            cell[key] = list(self.pokemons[key])
+        return cell
+
+
+class MapCellStore(object):
+    """
+    Keeps the map cells received from GET_MAP_OBJECTS, so the next request only
+    asks for what changed since (`since_timestamp_ms`) and the deltas are merged
+    into the cells we already know.
+
+    The cells least recently requested are dropped once there are more than
+    `max_cells`; they are fetched in full again when needed.
+    """
+
+    def __init__(self, max_cells=500):
+        self.max_cells = max_cells
+        self._cells = OrderedDict()
+
+    def __len__(self):
+        return len(self._cells)
+
+    def timestamps(self, cell_ids):
+        """
+        :return: The `since_timestamp_ms` to send for each cell, 0 for cells we don't know.
+        :rtype: list of int
+        """
+        return [self._cells[cell_id].timestamp if cell_id in self._cells else 0 for cell_id in cell_ids]
+
+    def update(self, map_cells):
+        """
+        Merges the map cells of a GET_MAP_OBJECTS response.
+        """
+        for delta in map_cells:
+            cell_id = delta['s2_cell_id']
+            cell = self._cells.pop(cell_id, None) or MapCell(cell_id)
+            cell.merge(delta)
+            self._cells[cell_id] = cell
+
+        while len(self._cells) > self.max_cells:
+            self._cells.popitem(last=False)
+
+    def cells(self, cell_ids):
+        """
+        :return: The merged state of the known cells among `cell_ids`, as map cell dicts.
+        :rtype: list of dict
+        """
+        return [self._cells[cell_id].to_dict() for cell_id in cell_ids if cell_id in self._cells]
+
+    def clear(self):
+        self._cells.clear()
@@ -62,6 +62,24 @@ class Metrics(object):
     def earned_dust(self):
         return self.dust['latest'] - self.dust['start']
 
+    def summary(self):
+        """
+        :return: What the bot achieved since it started, as plain numbers.
+        :rtype: dict
+        """
+        return {
+            'username': self.bot.config.username,
+            'runtime': time.time() - self.start_time,
+            'xp_earned': self.xp_earned(),
+            'distance_travelled': self.distance_travelled(),
+            'visits': self.num_visits(),
+            'encounters': self.num_encounters(),
+            'captures': self.num_captures(),
+            'releases': self.releases,
+            'evolutions': self.num_evolutions(),
+            'earned_dust': self.earned_dust(),
+        }
+
     def captured_pokemon(self, name, cp, iv_display, potential):
         if cp > self.highest_cp['cp']:
             self.highest_cp = \
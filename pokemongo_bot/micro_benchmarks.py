@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks of hot code paths, comparing the plain Python version with
+the optimized one:
+
+    python -m pokemongo_bot.micro_benchmarks [name ...]
+"""
+
+import glob
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+from collections import OrderedDict
+
+from pokemongo_bot import clock, inventory, static_data
+from pokemongo_bot.api_recorder import ApiRecorder
+from pokemongo_bot.base_dir import _base_dir
+from pokemongo_bot.cell_workers.utils import distance, distances, pairs_within
+from pokemongo_bot.task_scheduler import TaskScheduler, Every, OnInventoryChange, OnMapUpdate
+from pokemongo_bot.worker_result import WorkerResult
+
+BENCHMARKS = OrderedDict()
+
+# Scalar pairwise distances are quadratic, skip them above this many points
+MAX_SCALAR_PAIRS = 1000
+
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def best_time(function, repeat=3):
+    """
+    :return: The shortest of `repeat` runs, in seconds.
+    :rtype: float
+    """
+    times = []
+    for _ in xrange(repeat):
+        start = timeit.default_timer()
+        function()
+        times.append(timeit.default_timer() - start)
+    return min(times)
+
+
+def random_points(count, lat=40.7665, lng=-73.9771, spread=0.02, seed=42):
+    rand = random.Random(seed)
+    return ([lat + rand.uniform(-spread, spread) for _ in xrange(count)],
+            [lng + rand.uniform(-spread, spread) for _ in xrange(count)])
+
+
+def scalar_pairs_within(lats, lngs, radius):
+    return [(i, j)
+            for i in xrange(len(lats))
+            for j in xrange(i + 1, len(lats))
+            if distance(lats[i], lngs[i], lats[j], lngs[j]) <= radius]
+
+
+@benchmark('distance')
+def distance_benchmark(sizes=(10, 100, 10000)):
+    """
+    :return: (case, number of points, scalar seconds, vectorized seconds) rows,
+    the scalar time is None when it was skipped.
+    """
+    rows = []
+    for size in sizes:
+        lats, lngs = random_points(size)
+        rows.append((
+            'one to many', size,
+            best_time(lambda: [distance(lats[0], lngs[0], lat, lng) for lat, lng in zip(lats, lngs)]),
+            best_time(lambda: distances(lats[0], lngs[0], lats, lngs))
+        ))
+        rows.append((
+            'pairs within 100m', size,
+            best_time(lambda: scalar_pairs_within(lats, lngs, 100), repeat=1) if size <= MAX_SCALAR_PAIRS else None,
+            best_time(lambda: pairs_within(lats, lngs, 100), repeat=1)
+        ))
+    return rows
+
+
+class PollingTask(object):
+    """
+    Stand-in for a task checking itself whether it has work to do, like the
+    inventory tasks going through the pokemon list on every tick.
+    """
+
+    def __init__(self, pokemons, triggers=None):
+        self.pokemons = pokemons
+        self._triggers = triggers
+
+    def triggers(self):
+        return self._triggers
+
+    def work(self):
+        groups = {}
+        for pokemon in self.pokemons:
+            groups.setdefault(pokemon % 150, []).append(pokemon)
+        for group in groups.itervalues():
+            group.sort(reverse=True)
+        return WorkerResult.SUCCESS
+
+
+class BenchmarkBot(object):
+    def __init__(self):
+        self.last_time_map_object = 0
+        self.position = (0, 0, 0)
+
+
+def run_ticks(bot, workers, ticks, scheduled):
+    """
+    Ticks once per virtual second, the inventory changes every 20 ticks and
+    the map every 5.
+
+    :return: (work calls, seconds) of the run.
+    """
+    scheduler = TaskScheduler(bot)
+    virtual_clock = clock.VirtualClock(start=0)
+    real_clock = clock.get_clock()
+    clock.set_clock(virtual_clock)
+    calls = 0
+    try:
+        start = timeit.default_timer()
+        for tick in xrange(ticks):
+            virtual_clock.sleep(1)
+            if tick % 20 == 0:
+                inventory._changed()
+            if tick % 5 == 0:
+                bot.last_time_map_object = tick
+            if scheduled:
+                scheduler.run(workers)
+            else:
+                for worker in workers:
+                    calls += 1
+                    worker.work()
+        seconds = timeit.default_timer() - start
+    finally:
+        clock.set_clock(real_clock)
+    return (scheduler.calls if scheduled else calls), seconds
+
+
+@benchmark('scheduler')
+def scheduler_benchmark(ticks=2000):
+    """
+    Polls a typical task list on every tick, then runs it with the TaskScheduler.
+
+    :return: (case, number of ticks, polling, scheduled, unit) rows.
+    """
+    pokemons = range(250)
+    workers = [PollingTask(pokemons, [OnInventoryChange(), Every(300)]) for _ in xrange(6)]
+    workers += [PollingTask(pokemons, [Every(10)]) for _ in xrange(3)]
+    workers += [PollingTask(pokemons, [OnMapUpdate()])]
+    workers += [PollingTask(pokemons) for _ in xrange(4)]
+
+    polling_calls, polling_seconds = run_ticks(BenchmarkBot(), workers, ticks, scheduled=False)
+    scheduled_calls, scheduled_seconds = run_ticks(BenchmarkBot(), workers, ticks, scheduled=True)
+    return [
+        ('work calls per tick', ticks, float(polling_calls) / ticks, float(scheduled_calls) / ticks, 'calls'),
+        ('time per tick', ticks, polling_seconds / ticks, scheduled_seconds / ticks, 's')
+    ]
+
+
+def random_pokemons(count, seed=42):
+    """
+    :return: `count` pokemon_data dicts as sent by the server.
+    :rtype: list
+    """
+    return list(iter_random_pokemons(count, seed))
+
+
+def iter_random_pokemons(count, seed=42):
+    rand = random.Random(seed)
+    for index in xrange(count):
+        static = inventory.Pokemons.data_for(rand.randint(1, 151))
+        moveset = rand.choice(static.movesets)
+        cp_multiplier = inventory.LevelToCPm.cp_multiplier_for(rand.randint(1, 30))
+        ivs = [rand.randint(0, 15) for _ in xrange(3)]
+        cp = inventory._calc_cp(static.base_attack, static.base_defense, static.base_stamina,
+                                *ivs, cp_multiplier=cp_multiplier)
+        yield {
+            'id': 1000000 + index,
+            'pokemon_id': static.id,
+            'cp': max(int(cp), 10),
+            'cp_multiplier': cp_multiplier,
+            'stamina_max': 10 + index % 100,
+            'stamina': 10 + index % 100,
+            'individual_attack': ivs[0],
+            'individual_defense': ivs[1],
+            'individual_stamina': ivs[2],
+            'move_1': moveset.fast_attack.id,
+            'move_2': moveset.charged_attack.id,
+            'height_m': rand.uniform(0.2, 2),
+            'weight_kg': rand.uniform(1, 100),
+            'pokeball': 1,
+            'captured_cell_id': rand.getrandbits(63),
+            'creation_time_ms': 1470000000000 + index,
+        }
+
+
+class DictPokemon(object):
+    """
+    Pokemon as kept before __slots__: every stat computed in an attribute
+    dict, along with the raw dict.
+    """
+
+    def __init__(self, data):
+        pokemon = inventory.Pokemon(data)
+        pokemon.compute_stats()
+        for name in inventory.Pokemon.__slots__:
+            setattr(self, name.lstrip('_'), getattr(pokemon, name))
+        self._data = data
+
+
+def eager_pokemon(data):
+    pokemon = inventory.Pokemon(data)
+    pokemon.compute_stats()
+    return pokemon
+
+
+# keeps a bag of pokemons with every stat computed, prints the growth of the
+# resident set size in KB. The server dicts are made one at a time, so that
+# only what the pokemons hold on to stays resident. The memory freed by the
+# imports is first filled with other pokemons, otherwise the bag would partly
+# fit in it.
+POKEMON_BAG_RSS = """
+import gc, os
+from pokemongo_bot import micro_benchmarks
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+make = micro_benchmarks.{factory}
+gc.collect()
+ballast = []
+start = rss()
+for data in micro_benchmarks.iter_random_pokemons(100000, seed=0):
+    ballast.append(make(data))
+    if rss() - start > 256 * 1024:
+        break
+start = rss()
+bag = [make(data) for data in micro_benchmarks.iter_random_pokemons({size})]
+gc.collect()
+print (rss() - start) / 1024.0
+"""
+
+
+def pokemon_bag_rss(factory, size):
+    """
+    :param factory: Name of the function of this module making a pokemon from its data.
+    :return: KB the bag of `size` pokemons added to the resident set of a new process,
+    None where it can't be measured.
+    """
+    if not os.path.exists('/proc/self/statm'):
+        return None
+    script = POKEMON_BAG_RSS.format(factory=factory, size=size)
+    return float(subprocess.check_output([sys.executable, '-c', script]).splitlines()[-1])
+
+
+@benchmark('pokemon_bag')
+def pokemon_bag_benchmark(sizes=(250, 1000)):
+    """
+    Parses a bag of pokemons computing every stat up front, then leaving
+    them until first used. The memory is compared with every stat computed
+    in both: the raw dict and attribute dict against __slots__.
+
+    :return: (case, number of pokemons, eager, lazy, unit) rows.
+    """
+    rows = []
+    for size in sizes:
+        bag = random_pokemons(size)
+        rows.append((
+            'parse', size,
+            best_time(lambda: [eager_pokemon(data) for data in bag]),
+            best_time(lambda: [inventory.Pokemon(data) for data in bag])
+        ))
+        rows.append((
+            'resident memory', size,
+            pokemon_bag_rss('DictPokemon', size),
+            pokemon_bag_rss('eager_pokemon', size),
+            'KB'
+        ))
+    return rows
+
+
+# starts the bots of {accounts} accounts of the example config in this
+# process, replaying the recording of their login, prints the resident set
+# size in KB
+ACCOUNTS_RSS = """
+import gc, os, sys
+sys.argv = ['pokecli', '-cf', os.path.join({base_dir!r}, 'configs', 'config.json.example')]
+import pokecli
+from pokemongo_bot import PokemonGoBot, clock
+from pokemongo_bot.multi_account import SharedState, account_configs
+from pokemongo_bot.tree_config_builder import TreeConfigBuilder
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+clock.set_clock(clock.VirtualClock())
+config = pokecli.init_config()
+config.benchmark = {recording!r}
+config.location = '40.7665,-73.9771'
+config.websocket_server_url = False
+config.health_record = False
+config.api_async_workers = 0
+config.accounts = [{{'username': {username!r}.format(i)}} for i in range({accounts})]
+shared = SharedState(config)
+bots = []
+for account_config in account_configs(config):
+    bot = PokemonGoBot(account_config, shared)
+    bot.start()
+    bot.workers = TreeConfigBuilder(bot, account_config.raw_tasks).build()
+    bots.append(bot)
+gc.collect()
+print rss() / 1024.0
+"""
+
+BENCHMARK_USERNAME = 'rss-benchmark-{}'
+
+
+def write_login_recording(path, pokemons):
+    """
+    Records the responses a bot needs to start: its player and an inventory
+    of `pokemons` pokemons.
+    """
+    recorder = ApiRecorder(path)
+    items = [{'inventory_item_data': {'pokemon_data': data}} for data in iter_random_pokemons(pokemons)]
+    recorder.record([('GET_INVENTORY', {})], {
+        'responses': {'GET_INVENTORY': {'success': True, 'inventory_delta': {'inventory_items': items}}},
+        'status_code': 1
+    })
+    recorder.record([('GET_PLAYER', {})], {
+        'responses': {'GET_PLAYER': {'player_data': {
+            'username': 'benchmark',
+            'creation_timestamp_ms': 1470000000000,
+            'currencies': [{'name': 'POKECOIN', 'amount': 0}, {'name': 'STARDUST', 'amount': 0}],
+            'max_pokemon_storage': 250,
+            'max_item_storage': 350,
+        }}},
+        'status_code': 1
+    })
+    recorder.close()
+
+
+def accounts_rss(accounts, pokemons=250):
+    """
+    :return: KB of resident set per account of a new process running the bots
+    of `accounts` accounts, None where it can't be measured.
+    """
+    if not os.path.exists('/proc/self/statm'):
+        return None
+    work_dir = tempfile.mkdtemp()
+    # the bots keep their sqlite database in data/ under the working directory
+    os.mkdir(os.path.join(work_dir, 'data'))
+    recording = os.path.join(work_dir, 'login.rec')
+    write_login_recording(recording, pokemons)
+    script = ACCOUNTS_RSS.format(
+        base_dir=_base_dir, recording=recording, username=BENCHMARK_USERNAME, accounts=accounts)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_base_dir, os.environ.get('PYTHONPATH')])))
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output([sys.executable, '-c', script], cwd=work_dir, env=env, stderr=devnull)
+    finally:
+        shutil.rmtree(work_dir)
+        # the location and cell files the bots wrote on start
+        for directory in ('data', 'web'):
+            for path in glob.glob(os.path.join(_base_dir, directory, '*' + BENCHMARK_USERNAME.format('*') + '*')):
+                os.remove(path)
+    return float(output.splitlines()[-1]) / accounts
+
+
+@benchmark('accounts')
+def accounts_benchmark(sizes=(10, 50)):
+    """
+    Starts the bots of several accounts with a 250 pokemon inventory each, a
+    process per account, then all of them in one process.
+
+    :return: (case, number of accounts, process per account, shared process, unit) rows.
+    """
+    single = accounts_rss(1)
+    return [('memory per account', size, single, accounts_rss(size), 'KB') for size in sizes]
+
+
+def scan_groups(pokemons, key, exclude_kept=False):
+    groups = {}
+    for pokemon in pokemons.all():
+        if exclude_kept and (pokemon.in_fort or pokemon.is_favorite):
+            continue
+        groups.setdefault(key(pokemon), []).append(pokemon)
+    return groups
+
+
+@benchmark('pokemon_queries')
+def pokemon_queries_benchmark(sizes=(250, 1000)):
+    """
+    Answers the queries of the pokemon tasks by going through the whole bag,
+    then from the indexes of Pokemons.
+
+    :return: (case, number of pokemons, scan, indexed, unit) rows.
+    """
+    rows = []
+    for size in sizes:
+        pokemons = inventory.Pokemons()
+        pokemons.refresh([{'inventory_item_data': {'pokemon_data': data}} for data in random_pokemons(size)])
+        pokemons.sorted_by('iv')
+        rows.append((
+            'group by family', size,
+            best_time(lambda: scan_groups(pokemons, lambda p: p.family_id)),
+            best_time(lambda: pokemons.groups('family_id'))
+        ))
+        rows.append((
+            'transfer groups', size,
+            best_time(lambda: scan_groups(pokemons, lambda p: p.pokemon_id, exclude_kept=True)),
+            best_time(lambda: pokemons.groups('pokemon_id', exclude=('favorite', 'deployed')))
+        ))
+        rows.append((
+            'sorted by iv', size,
+            best_time(lambda: sorted(pokemons.all(), key=lambda p: p.iv, reverse=True)),
+            best_time(lambda: pokemons.sorted_by('iv'))
+        ))
+    return rows
+
+
+STATIC_COMPONENTS = (inventory.Types, inventory.LevelToCPm, inventory.FastAttacks, inventory.ChargedAttacks,
+                     inventory.Pokemons, inventory.Items)
+
+# import inventory, then build its static data from the JSON files as the
+# module used to do on import
+EAGER_IMPORT = """
+import timeit
+start = timeit.default_timer()
+from pokemongo_bot import inventory, static_data
+if {eager}:
+    data = static_data.parse_sources()
+    static_data.load = data.get
+    for component in {components}:
+        component.init_static_data()
+print timeit.default_timer() - start
+"""
+
+
+def build_static_components(load):
+    """
+    Builds every static component from `load`, the way the bot needs them
+    at startup.
+    """
+    real_load = static_data.load
+    static_data.load = load
+    try:
+        for component in STATIC_COMPONENTS:
+            for name in component.STATIC_ATTRIBUTES:
+                if name in component.__dict__:
+                    delattr(component, name)
+            component.init_static_data()
+    finally:
+        static_data.load = real_load
+
+
+def eager_startup():
+    # every file parsed when importing inventory, then pokemon.json and
+    # items.json parsed again by the bot
+    data = static_data.parse_sources()
+    build_static_components(data.get)
+    static_data.parse_sources()
+
+
+def import_time(eager):
+    """
+    :return: Seconds taken by a new interpreter to import inventory.
+    :rtype: float
+    """
+    components = '({},)'.format(', '.join('inventory.' + c.__name__ for c in STATIC_COMPONENTS))
+    script = EAGER_IMPORT.format(eager=eager, components=components)
+    return float(subprocess.check_output([sys.executable, '-c', script]))
+
+
+@benchmark('static_data')
+def static_data_benchmark():
+    """
+    Loads the game data from the JSON files every time, then from the
+    compiled cache shared by every consumer.
+
+    :return: (case, number of data files, JSON, cache, unit) rows.
+    """
+    files = len(static_data.DATA_FILES)
+    cache_path = os.path.join(tempfile.mkdtemp(), 'static_data.cache')
+    static_data.compile_cache(cache_path)
+    rows = [
+        ('read data files', files,
+         best_time(static_data.parse_sources),
+         best_time(lambda: static_data.read_cache(cache_path))),
+        ('startup', files,
+         best_time(eager_startup),
+         best_time(lambda: build_static_components(static_data.read_cache(cache_path).get))),
+        ('import inventory', files,
+         min(import_time(eager=True) for _ in xrange(3)),
+         min(import_time(eager=False) for _ in xrange(3))),
+    ]
+    os.remove(cache_path)
+    os.rmdir(os.path.dirname(cache_path))
+    return rows
+
+
+def format_row(case, size, before, after, unit='s'):
+    def value(amount):
+        if amount is None:
+            return '{:>12}'.format('-')
+        if unit == 's':
+            return '{:10.3f}ms'.format(amount * 1000)
+        return '{:>12}'.format('{:.2f} {}'.format(amount, unit))
+
+    speedup = '{:8.1f}x'.format(before / after) if before is not None and after else ''
+    return '{:<20} {:>6} {} {} {}'.format(case, size, value(before), value(after), speedup)
+
+
+def main(names):
+    for name in names or BENCHMARKS.keys():
+        print '{}\n{:<20} {:>6} {:>12} {:>12}'.format(name, 'case', 'size', 'before', 'after')
+        for row in BENCHMARKS[name]():
+            print format_row(*row)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
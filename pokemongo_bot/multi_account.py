@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import logging
+import os
+
+from pgoapi.exceptions import NotLoggedInException, ServerSideRequestThrottlingException, ServerBusyOrOfflineException
+from socketIO_client import SocketIO
+
+import clock
+from api_wrapper import PermaBannedException, CircuitOpenException
+from async_api import AsyncApi
+from base_dir import _base_dir
+from fort_cache import FortCache
+from retry_policy import RetryPolicy, circuit_breakers_for
+from tree_config_builder import TreeConfigBuilder
+from web_updater import WebUpdater
+
+
+def account_configs(config):
+    """
+    :param config: The configuration, with the `accounts` list of the config file.
+    :return: A configuration per account: the shared one with the settings of the account on top.
+    :rtype: list
+    """
+    configs = []
+    for index, settings in enumerate(config.accounts):
+        account_config = copy.deepcopy(config)
+        account_config.accounts = []
+        for key, value in settings.iteritems():
+            setattr(account_config, key.replace('.', '_'), value)
+        if index > 0:
+            # there is only one embedded websocket server per process
+            account_config.websocket_start_embedded_server = False
+        configs.append(account_config)
+    return configs
+
+
+class SharedState(object):
+    """
+    State shared by the bots of several accounts running in one process.
+
+    Besides the static game data (pokemon, moves, types and CP multipliers are
+    loaded once per process anyway), the bots share the fort details cache,
+    the thread writing the web location files, the threads running
+    background API calls and the websocket client. Map cells are not shared: they carry the fort
+    cooldowns and catchable pokemon of each player.
+    """
+
+    def __init__(self, config):
+        self.fort_cache = FortCache(
+            path=os.path.join(_base_dir, 'data', 'fort-details.json'),
+            max_size=config.forts_details_cache_size,
+            ttl=config.forts_details_cache_ttl,
+            retry_delay=config.forts_details_retry_delay
+        )
+        self.web_updater = WebUpdater()
+        self.api_executor = AsyncApi(None, workers=config.api_async_workers)
+        self._socketio_clients = {}
+
+    def socketio_client(self, url):
+        """
+        :param url: host:port of the websocket server.
+        :return: The client connected to `url`, created on first use.
+        """
+        client = self._socketio_clients.get(url)
+        if client is None:
+            host, port = url.split(':')
+            client = self._socketio_clients[url] = SocketIO(host, int(port))
+        return client
+
+
+class Account(object):
+    def __init__(self, config):
+        self.config = config
+        self.bot = None
+        self.resume_at = 0
+        self.reconnect_delay = None
+        # kept across the bots of the account
+        self.circuit_breakers = circuit_breakers_for(config)
+
+
+class MultiAccountRunner(object):
+    """
+    Runs the bots of several accounts in one process, ticking them in turn.
+
+    A bot that loses its session or hits a busy server is paused and started
+    again later, the others keep running. A bot whose tick needs a request
+    type paused by its circuit breaker keeps its session and just waits.
+    Permanently banned accounts are dropped.
+    """
+
+    def __init__(self, configs, bot_factory, health_record=None):
+        """
+        :param configs: A configuration per account, see account_configs.
+        :param bot_factory: Creates a bot from a configuration, the SharedState and the
+                            CircuitBreakers of the account, usually PokemonGoBot.
+        """
+        self.accounts = [Account(config) for config in configs]
+        self.bot_factory = bot_factory
+        self.health_record = health_record
+        self.shared = SharedState(configs[0])
+        self.retry_policy = RetryPolicy(
+            max_retries=configs[0].api_max_retries,
+            base_delay=configs[0].api_retry_base_delay,
+            max_delay=configs[0].api_retry_max_delay
+        )
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def bots(self):
+        return [account.bot for account in self.accounts if account.bot is not None]
+
+    def start(self):
+        try:
+            self.shared.fort_cache.load()
+        except (IOError, ValueError):
+            self.logger.debug('Starting a new fort details cache at {}'.format(self.shared.fort_cache.path))
+
+    def run(self, reload_configs=None):
+        """
+        :param reload_configs: Called between ticks, returns the new configurations of the accounts
+                               when the config file changed, None otherwise.
+        """
+        self.start()
+        try:
+            while self.accounts:
+                configs = reload_configs() if reload_configs else None
+                if configs is not None:
+                    self.reload_config(configs)
+                self.tick()
+        finally:
+            self.stop()
+
+    def tick(self):
+        now = clock.now()
+        ready = [account for account in self.accounts if account.resume_at <= now]
+        if not ready:
+            clock.sleep(min(account.resume_at for account in self.accounts) - now)
+            return
+
+        for account in ready:
+            self._tick(account)
+
+    def reload_config(self, configs):
+        """
+        Applies the new configurations to the running bots (see PokemonGoBot.reload_config),
+        paused ones use them when they start again. Accounts can't be added or removed.
+        """
+        configs = {config.username: config for config in configs}
+        for account in self.accounts:
+            config = configs.get(account.config.username)
+            if config is None:
+                continue
+            if account.bot is None:
+                account.config = config
+            else:
+                account.bot.activate()
+                account.bot.reload_config(config)
+
+    def _start_bot(self, account):
+        bot = self.bot_factory(account.config, self.shared, account.circuit_breakers)
+        account.bot = bot
+        bot.start()
+        bot.workers = TreeConfigBuilder(bot, account.config.raw_tasks).build()
+        bot.metrics.capture_stats()
+        bot.health_record = self.health_record
+        bot.event_manager.emit(
+            'bot_start',
+            sender=bot,
+            level='info',
+            formatted='Starting bot...'
+        )
+
+    def _tick(self, account):
+        try:
+            if account.bot is None:
+                self._start_bot(account)
+            account.bot.activate()
+            account.bot.tick()
+            account.reconnect_delay = None
+        except NotLoggedInException:
+            self._pause(account, account.config.reconnecting_timeout * 60, 'Not logged in')
+        except CircuitOpenException as e:
+            self._wait(account, e.retry_after)
+        except (ServerBusyOrOfflineException, ServerSideRequestThrottlingException):
+            account.reconnect_delay = self.retry_policy.next_delay(account.reconnect_delay)
+            self._pause(account, account.reconnect_delay, 'Server busy or throttling')
+        except PermaBannedException:
+            self.logger.warning('Account {} is probably permabanned, dropping it'.format(account.config.username))
+            self._stop_bot(account)
+            self.accounts.remove(account)
+        except Exception:
+            # a bug hit by one account must not stop the others
+            self.logger.exception('{}: Unexpected error'.format(account.config.username))
+            account.reconnect_delay = self.retry_policy.next_delay(account.reconnect_delay)
+            self._pause(account, account.reconnect_delay, 'Unexpected error')
+
+    def _pause(self, account, seconds, reason):
+        self.logger.info('{}: {}, reconnecting in {:.0f} seconds'.format(account.config.username, reason, seconds))
+        self._stop_bot(account)
+        account.resume_at = clock.now() + seconds
+
+    def _wait(self, account, seconds):
+        self.logger.info('{}: Server keeps failing, resuming in {:.0f} seconds'.format(account.config.username, seconds))
+        account.resume_at = clock.now() + seconds
+
+    def _stop_bot(self, account):
+        bot, account.bot = account.bot, None
+        if bot is not None:
+            bot.profiler.detach()
+            # the next bot of the account starts from what this one knew
+            try:
+                self._save(bot)
+            except Exception:
+                self.logger.exception('{}: Error saving the bot state'.format(account.config.username))
+
+    @staticmethod
+    def _save(bot):
+        if bot.tick_count == 0:
+            return
+        bot.save_snapshot(background=False)
+        bot.save_recent_forts()
+
+    def stop(self):
+        for bot in self.bots():
+            self._save(bot)
+        try:
+            self.shared.fort_cache.save()
+        except IOError:
+            self.logger.warning('Error saving the fort details to {}'.format(self.shared.fort_cache.path))
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import logging
+import threading
+
+import clock
+
+CRITICAL = 0
+NORMAL = 1
+BACKGROUND = 2
+
+PRIORITIES = {'critical': CRITICAL, 'normal': NORMAL, 'background': BACKGROUND}
+
+# Request types not listed here are NORMAL
+DEFAULT_PRIORITIES = {
+    'ENCOUNTER': CRITICAL,
+    'DISK_ENCOUNTER': CRITICAL,
+    'INCENSE_ENCOUNTER': CRITICAL,
+    'CATCH_POKEMON': CRITICAL,
+    'USE_ITEM_CAPTURE': CRITICAL,
+    'NICKNAME_POKEMON': BACKGROUND,
+    'SET_FAVORITE_POKEMON': BACKGROUND,
+    'RECYCLE_INVENTORY_ITEM': BACKGROUND,
+    'RELEASE_POKEMON': BACKGROUND,
+    'EVOLVE_POKEMON': BACKGROUND,
+    'UPGRADE_POKEMON': BACKGROUND,
+    'CHECK_AWARDED_BADGES': BACKGROUND,
+    'LEVEL_UP_REWARDS': BACKGROUND,
+    'GET_PLAYER_PROFILE': BACKGROUND,
+    'DOWNLOAD_SETTINGS': BACKGROUND,
+    'DOWNLOAD_ITEM_TEMPLATES': BACKGROUND,
+    'DOWNLOAD_REMOTE_CONFIG_VERSION': BACKGROUND,
+    'GET_ASSET_DIGEST': BACKGROUND,
+}
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self._lock = threading.Lock()
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._last_refill = clock.now()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._last_refill)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def time_until_available(self):
+        """
+        :return: The number of seconds until a token can be taken.
+        :rtype: float
+        """
+        with self._lock:
+            self._refill(clock.now())
+            if self._tokens >= 1:
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def take(self):
+        with self._lock:
+            self._refill(clock.now())
+            self._tokens -= 1
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(clock.now())
+            self.rate = float(rate)
+
+
+class RateLimiter(object):
+    """
+    Request scheduler shared by every request issued through an ApiWrapper.
+
+    All requests draw from one global bucket; request types listed in
+    `request_rates` additionally draw from their own bucket, so a type can be
+    limited below the global rate (e.g. {'GET_MAP_OBJECTS': 0.2}).
+
+    The global rate adapts to the server: it is halved every time the server
+    throttles us and creeps back up towards `requests_per_second` with every
+    successful call (additive increase, multiplicative decrease).
+
+    Waiting requests are served by priority (CRITICAL, NORMAL, BACKGROUND),
+    so a catch doesn't queue up behind a batch of renames. A request is
+    promoted by one class for every `starvation_timeout` seconds it waits,
+    which keeps background requests from waiting forever.
+    """
+
+    DECREASE_FACTOR = 0.5
+    INCREASE_STEP = 0.05  # fraction of the configured rate regained per success
+
+    def __init__(self, requests_per_second=2, burst=1, request_rates=None, min_requests_per_second=0.2,
+                 request_priorities=None, starvation_timeout=10.0):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.max_rate = float(requests_per_second)
+        self.min_rate = min(float(min_requests_per_second), self.max_rate)
+        self.bucket = TokenBucket(self.max_rate, burst)
+        self.request_buckets = {}
+        for request_type, rate in (request_rates or {}).iteritems():
+            self.request_buckets[request_type.upper()] = TokenBucket(rate)
+        self.priorities = dict(DEFAULT_PRIORITIES)
+        for request_type, priority in (request_priorities or {}).iteritems():
+            self.priorities[request_type.upper()] = PRIORITIES[priority.lower()]
+        self.starvation_timeout = float(starvation_timeout)
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def set_rate(self, requests_per_second):
+        self.max_rate = float(requests_per_second)
+        self.min_rate = min(self.min_rate, self.max_rate)
+        self.bucket.set_rate(self.max_rate)
+
+    def priority_of(self, request_types):
+        """
+        :return: The priority of the most urgent sub-request.
+        :rtype: int
+        """
+        return min([self.priorities.get(t, NORMAL) for t in request_types] or [NORMAL])
+
+    def _rank(self, waiter, now):
+        priority, sequence, enqueued_at = waiter
+        return priority - (now - enqueued_at) / self.starvation_timeout, sequence
+
+    def _head(self, now):
+        return min(self._waiting, key=lambda waiter: self._rank(waiter, now))
+
+    def wait(self, request_types=(), priority=None):
+        """
+        Blocks until a request made of the given sub-requests may be sent.
+        :param request_types: Upper-cased RequestType names of the sub-requests.
+        :type request_types: list of str
+        :param priority: CRITICAL, NORMAL or BACKGROUND, by default the priority of the request types.
+        :return: The number of seconds spent waiting.
+        :rtype: float
+        """
+        if priority is None:
+            priority = self.priority_of(request_types)
+        buckets = [self.bucket] + [self.request_buckets[t] for t in request_types if t in self.request_buckets]
+        start = clock.now()
+        waiter = (priority, next(self._sequence), start)
+
+        with self._condition:
+            self._waiting.append(waiter)
+            try:
+                while True:
+                    if self._head(clock.now()) is not waiter:
+                        self._condition.wait(0.1)
+                        continue
+
+                    delay = max(bucket.time_until_available() for bucket in buckets)
+                    if delay <= 0:
+                        for bucket in buckets:
+                            bucket.take()
+                        break
+
+                    # let more urgent requests arriving meanwhile jump the queue
+                    self._condition.release()
+                    try:
+                        clock.sleep(delay)
+                    finally:
+                        self._condition.acquire()
+            finally:
+                self._waiting.remove(waiter)
+                self._condition.notify_all()
+
+        return clock.now() - start
+
+    def throttled(self):
+        new_rate = max(self.min_rate, self.bucket.rate * self.DECREASE_FACTOR)
+        if new_rate < self.bucket.rate:
+            self.logger.warning(
+                'Server is throttling us, lowering request rate to {:.2f}/s'.format(new_rate))
+        self.bucket.set_rate(new_rate)
+
+    def succeeded(self):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.max_rate * self.INCREASE_STEP))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+import clock
+from request_types import COALESCABLE_REQUESTS, made_stale_by
+
+
+class RequestCoalescer(object):
+    """
+    Merges the read-only sub-requests issued during one tick into as few RPCs
+    as possible.
+
+    The read-only sub-requests seen during the previous tick are expected
+    again, so the first read-only request of a tick carries all of them in its
+    envelope. The parts nobody asked for yet are kept until the end of the tick
+    (or `max_age` seconds) and handed to the next callers without a round trip.
+    A request that can change the player state drops what it made stale.
+    """
+
+    def __init__(self, max_age=3.0):
+        self._lock = threading.Lock()
+        self.max_age = max_age
+        self._responses = {}  # request type -> (envelope, response, timestamp)
+        self._requested = set()
+        self._expected = set()
+        self.coalesced_calls = 0
+
+    def new_window(self):
+        """
+        Starts a new tick window, the sub-requests of the finished window
+        become the ones expected in the new one.
+        """
+        with self._lock:
+            self._expected = self._requested
+            self._requested = set()
+            self._responses = {}
+
+    def invalidate(self, request_types=None):
+        """
+        Drops the responses made stale by a request of `request_types`, every
+        response by default.
+        """
+        stale = made_stale_by(request_types) if request_types is not None else None
+        with self._lock:
+            if stale is None:
+                self._responses = {}
+            else:
+                for request_type in stale:
+                    self._responses.pop(request_type, None)
+
+    def lookup(self, request_types):
+        """
+        Serves a request from the responses collected in this window.
+        :param request_types: Upper-cased RequestType names of the sub-requests.
+        :return: A response envelope, or None if the request has to be sent.
+        :rtype: dict
+        """
+        now = clock.now()
+        with self._lock:
+            self._requested.update(t for t in request_types if t in COALESCABLE_REQUESTS)
+            parts = {}
+            for request_type in request_types:
+                entry = self._responses.get(request_type)
+                if entry is None or now - entry[2] > self.max_age:
+                    return None
+                parts[request_type] = entry
+
+            self.coalesced_calls += 1
+
+        result = {}
+        for envelope, response, timestamp in parts.itervalues():
+            result.update(envelope)
+        result['responses'] = {request_type: entry[1] for request_type, entry in parts.iteritems()}
+        return result
+
+    def extra_requests(self, request_types):
+        """
+        :return: The expected sub-requests worth adding to a request made of `request_types`.
+        :rtype: list of str
+        """
+        with self._lock:
+            return sorted(self._expected - set(request_types) - set(self._responses))
+
+    def store(self, result):
+        if not isinstance(result, dict) or not isinstance(result.get('responses'), dict):
+            return
+
+        envelope = {k: v for k, v in result.iteritems() if k != 'responses'}
+        now = clock.now()
+        with self._lock:
+            for request_type, response in result['responses'].iteritems():
+                if request_type in COALESCABLE_REQUESTS:
+                    self._responses[request_type] = (envelope, response, now)
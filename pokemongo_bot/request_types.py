@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Which request types read the player state and which change it, shared by the
+RequestCoalescer and the ResponseCache.
+"""
+
+# Sub-requests that don't change the player state. GET_HATCHED_EGGS and
+# CHECK_AWARDED_BADGES are not among them: the server reports each hatch or
+# badge once, so an answer nobody reads loses it.
+READ_ONLY_REQUESTS = frozenset([
+    'GET_PLAYER',
+    'GET_INVENTORY',
+    'DOWNLOAD_SETTINGS',
+    'DOWNLOAD_ITEM_TEMPLATES',
+    'DOWNLOAD_REMOTE_CONFIG_VERSION',
+    'FORT_DETAILS',
+    'GET_MAP_OBJECTS',
+    'GET_PLAYER_PROFILE',
+    'GET_ASSET_DIGEST',
+])
+
+# Parameterless read-only sub-requests that can be shared between callers
+COALESCABLE_REQUESTS = frozenset([
+    'GET_PLAYER',
+    'GET_INVENTORY',
+    'DOWNLOAD_SETTINGS',
+])
+
+_PLAYER_STATE = ('GET_PLAYER', 'GET_INVENTORY')
+
+# Read-only request types made stale by a request type. Request types that are
+# neither read-only nor listed here make every response stale.
+INVALIDATES = {
+    'CATCH_POKEMON': _PLAYER_STATE,
+    'RELEASE_POKEMON': _PLAYER_STATE,
+    'EVOLVE_POKEMON': _PLAYER_STATE,
+    'UPGRADE_POKEMON': _PLAYER_STATE,
+    'NICKNAME_POKEMON': ('GET_INVENTORY',),
+    'SET_FAVORITE_POKEMON': ('GET_INVENTORY',),
+    'RECYCLE_INVENTORY_ITEM': ('GET_INVENTORY',),
+    'FORT_SEARCH': _PLAYER_STATE,
+    'ENCOUNTER': ('GET_INVENTORY',),
+    'DISK_ENCOUNTER': ('GET_INVENTORY',),
+    'USE_ITEM_CAPTURE': ('GET_INVENTORY',),
+    'USE_ITEM_POTION': ('GET_INVENTORY',),
+    'USE_ITEM_REVIVE': ('GET_INVENTORY',),
+    'USE_ITEM_FLEE': ('GET_INVENTORY',),
+    'USE_ITEM_XP_BOOST': ('GET_INVENTORY',),
+    'USE_ITEM_EGG_INCUBATOR': ('GET_INVENTORY',),
+    'USE_INCENSE': ('GET_INVENTORY',),
+    'LEVEL_UP_REWARDS': _PLAYER_STATE,
+    'GET_HATCHED_EGGS': _PLAYER_STATE,
+    'CHECK_AWARDED_BADGES': ('GET_PLAYER',),
+    'COLLECT_DAILY_BONUS': _PLAYER_STATE,
+    'ADD_FORT_MODIFIER': ('GET_INVENTORY', 'FORT_DETAILS'),
+}
+
+
+def made_stale_by(request_types):
+    """
+    :param request_types: Upper-cased RequestType names of the sub-requests of a request.
+    :return: The read-only request types whose responses the request makes stale,
+    None if it makes all of them stale.
+    :rtype: set
+    """
+    stale = set()
+    for request_type in request_types:
+        if request_type in READ_ONLY_REQUESTS:
+            continue
+        if request_type not in INVALIDATES:
+            return None
+        stale.update(INVALIDATES[request_type])
+    return stale
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+import clock
+from request_types import made_stale_by
+
+# Seconds a response stays valid, request types not listed here are never cached
+DEFAULT_TTL = {
+    'GET_PLAYER': 60,
+    'GET_INVENTORY': 15,
+    'DOWNLOAD_SETTINGS': 3600,
+}
+
+
+class ResponseCache(object):
+    """
+    TTL cache for the responses of idempotent sub-requests.
+
+    Entries are keyed by request type and parameters. FORT_DETAILS is left to
+    the fort cache. Requests that change the player state invalidate the
+    entries they make stale (see request_types.INVALIDATES). Expired entries
+    are purged on every put.
+    """
+
+    def __init__(self, ttl=None):
+        self._lock = threading.Lock()
+        self.ttl = dict(DEFAULT_TTL)
+        for request_type, seconds in (ttl or {}).iteritems():
+            self.ttl[request_type.upper()] = seconds
+        self._entries = {}  # (request type, params) -> (envelope, response, expiration)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(request_type, params):
+        return request_type, repr(sorted(params.items()))
+
+    def is_cacheable(self, request_type):
+        return self.ttl.get(request_type, 0) > 0
+
+    def get(self, sub_requests):
+        """
+        :param sub_requests: (request type, parameters) of every sub-request.
+        :type sub_requests: list of (str, dict)
+        :return: A response envelope if every sub-request is cached; otherwise, None.
+        :rtype: dict
+        """
+        if not sub_requests or not all(self.is_cacheable(t) for t, _ in sub_requests):
+            return None
+
+        now = clock.now()
+        with self._lock:
+            entries = []
+            for request_type, params in sub_requests:
+                entry = self._entries.get(self._key(request_type, params))
+                if entry is None or entry[2] < now:
+                    self.misses += 1
+                    return None
+                entries.append((request_type, entry))
+            self.hits += 1
+
+        result = {}
+        for request_type, (envelope, response, expiration) in entries:
+            result.update(envelope)
+        result['responses'] = {request_type: entry[1] for request_type, entry in entries}
+        return result
+
+    def put(self, sub_requests, result):
+        if not isinstance(result, dict) or not isinstance(result.get('responses'), dict):
+            return
+
+        envelope = {k: v for k, v in result.iteritems() if k != 'responses'}
+        now = clock.now()
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.iteritems() if v[2] >= now}
+            for request_type, params in sub_requests:
+                if self.is_cacheable(request_type) and request_type in result['responses']:
+                    self._entries[self._key(request_type, params)] = \
+                        (envelope, result['responses'][request_type], now + self.ttl[request_type])
+
+    def invalidate(self, request_types):
+        """
+        Drops the entries made stale by requests of the given types.
+        """
+        stale = made_stale_by(request_types)
+        if stale is None:
+            self.clear()
+        elif stale:
+            with self._lock:
+                for key in [k for k in self._entries if k[0] in stale]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
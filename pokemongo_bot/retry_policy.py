@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+
+import clock
+
+
+class RetryPolicy(object):
+    """
+    Capped exponential backoff with decorrelated jitter.
+
+    Every delay is drawn between `base_delay` and three times the previous
+    delay and never exceeds `max_delay`, so consecutive retries back off
+    quickly without several bots retrying in lockstep.
+    """
+
+    def __init__(self, max_retries=15, base_delay=1.0, max_delay=30.0):
+        self.max_retries = max_retries
+        self.base_delay = float(base_delay)
+        self.max_delay = max(float(max_delay), self.base_delay)
+
+    def next_delay(self, previous_delay=None):
+        """
+        :param previous_delay: The delay used before the previous retry, None for the first retry.
+        :return: The number of seconds to wait before the next retry.
+        :rtype: float
+        """
+        previous_delay = max(previous_delay or 0, self.base_delay)
+        return min(self.max_delay, random.uniform(self.base_delay, previous_delay * 3))
+
+
+class CircuitBreaker(object):
+    """
+    Stops sending requests to an endpoint that keeps failing.
+
+    The breaker opens after `failure_threshold` consecutive failures. Once
+    `reset_timeout` seconds have passed it turns half-open and lets a single
+    trial request through: success closes it again, failure re-opens it. A
+    trial that never reports back is given up after another `reset_timeout`.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self._lock = threading.Lock()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = float(reset_timeout)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def _update(self, now):
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_started_at = None
+
+    @property
+    def state(self):
+        with self._lock:
+            self._update(clock.now())
+            return self._state
+
+    def is_open(self):
+        return self.state == self.OPEN
+
+    def retry_after(self):
+        """
+        :return: The number of seconds until the breaker lets a request through,
+        0 if it would let one through now.
+        :rtype: float
+        """
+        now = clock.now()
+        with self._lock:
+            self._update(now)
+            if self._state == self.OPEN:
+                return max(0.0, self._opened_at + self.reset_timeout - now)
+            if self._state == self.HALF_OPEN and self._trial_started_at is not None:
+                # the trial of another caller is still running
+                return max(0.0, self._trial_started_at + self.reset_timeout - now)
+            return 0.0
+
+    def allow_request(self):
+        now = clock.now()
+        with self._lock:
+            self._update(now)
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and \
+                    (self._trial_started_at is None or now - self._trial_started_at >= self.reset_timeout):
+                self._trial_started_at = now
+                return True
+            return False
+
+    def cancel_trial(self):
+        """
+        Gives back a trial granted by allow_request that was not sent.
+        """
+        with self._lock:
+            self._trial_started_at = None
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = clock.now()
+                self._trial_started_at = None
+
+
+def circuit_breakers_for(config):
+    """
+    :return: The CircuitBreakers configured by `config`. They outlive the bots
+    of a session, create them once and pass them to every new bot.
+    :rtype: CircuitBreakers
+    """
+    return CircuitBreakers(
+        # a request type pauses after several requests each failed all their retries
+        failure_threshold=config.api_breaker_failed_calls * config.api_max_retries,
+        reset_timeout=config.api_breaker_reset_timeout
+    )
+
+
+class CircuitBreakers(object):
+    """
+    One CircuitBreaker per request type, created on first use.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self._lock = threading.Lock()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+
+    def get(self, request_type):
+        request_type = request_type.upper()
+        with self._lock:
+            breaker = self._breakers.get(request_type)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[request_type] = breaker
+            return breaker
+
+    def is_open(self, *request_types):
+        """
+        Lets workers skip API-bound work, e.g. `bot.api.circuit_breakers.is_open('FORT_SEARCH')`.
+        """
+        return any(self.get(t).is_open() for t in request_types)
+
+    def allow_request(self, request_types):
+        if self.is_open(*request_types):
+            return False
+        allowed = []
+        for request_type in request_types:
+            breaker = self.get(request_type)
+            if not breaker.allow_request():
+                # don't hold the trials of the other types while this one waits
+                for other in allowed:
+                    other.cancel_trial()
+                return False
+            allowed.append(breaker)
+        return True
+
+    def retry_after(self, request_types):
+        return max([self.get(t).retry_after() for t in request_types] or [0.0])
+
+    def record_success(self, request_types):
+        for request_type in request_types:
+            self.get(request_type).record_success()
+
+    def record_failure(self, request_types):
+        for request_type in request_types:
+            self.get(request_type).record_failure()
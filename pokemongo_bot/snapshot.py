@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import cPickle as pickle
+import logging
+import os
+import threading
+import time
+import zlib
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotWriter(object):
+    """
+    Saves snapshots of the world state of the bot (see PokemonGoBot.capture_snapshot)
+    as zlib compressed pickles.
+
+    The state is pickled by the caller's thread, so it is consistent, while
+    compressing and writing happen on a background thread. Files are written
+    to a temporary file first and renamed over the previous snapshot, so a
+    crash never leaves a truncated snapshot behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.logger = logging.getLogger(type(self).__name__)
+        self.saved_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def save(self, state, background=True):
+        """
+        :param state: The world state, must be picklable.
+        :type state: dict
+        :param background: Write on a background thread. A snapshot is skipped if the previous one is still being written.
+        :return: False if the snapshot was skipped.
+        """
+        if background and self.writing():
+            return False
+
+        data = pickle.dumps(dict(state, version=SNAPSHOT_VERSION, saved_at=time.time()), pickle.HIGHEST_PROTOCOL)
+        if not background:
+            self._write(data)
+            return True
+
+        self._thread = threading.Thread(target=self._write, args=(data,))
+        self._thread.daemon = True
+        self._thread.start()
+        return True
+
+    def writing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _write(self, data):
+        tmp_path = '{}.{}.tmp'.format(self.path, threading.current_thread().ident)
+        with self._lock:
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(zlib.compress(data))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.rename(tmp_path, self.path)
+                self.saved_at = time.time()
+            except (IOError, OSError) as e:
+                self.logger.warning('Error saving the snapshot to {}: {}'.format(self.path, e))
+
+
+def load_snapshot(path, max_age=None):
+    """
+    :param max_age: Ignore snapshots older than this many seconds.
+    :return: The saved state, None if there is no usable snapshot.
+    :rtype: dict
+    """
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.loads(zlib.decompress(f.read()))
+    except (IOError, EOFError, zlib.error, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or state.get('version') != SNAPSHOT_VERSION:
+        return None
+    if max_age is not None and time.time() - state['saved_at'] > max_age:
+        return None
+    return state
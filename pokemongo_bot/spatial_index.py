@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from itertools import count
+from math import cos, radians, pi
+
+from cell_workers.utils import distance
+
+# meters per degree of latitude on the sphere used by utils.distance
+METERS_PER_DEGREE = 6371000 * pi / 180
+
+
+class SpatialIndex(object):
+    """
+    Grid of `cell_size` meter buckets over map objects (dicts with a latitude
+    and a longitude) answering nearest and within-radius queries.
+
+    Queries only look at the buckets around the position, ring by ring, until
+    no bucket further away can hold a closer match, so their cost depends on
+    the number of objects returned rather than the number indexed. Distances
+    are computed with utils.distance, results come out in the same order as
+    sorting by it.
+    """
+
+    def __init__(self, items=(), cell_size=100.0):
+        self.cell_size = float(cell_size)
+        self._lat_step = self.cell_size / METERS_PER_DEGREE
+        self._lng_step = None
+        self._buckets = defaultdict(list)
+        self._size = 0
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return self._size
+
+    def _key(self, lat, lng):
+        return int(lat // self._lat_step), int(lng // self._lng_step)
+
+    def add(self, item):
+        if self._lng_step is None:
+            # buckets are square around the first object, which is good
+            # enough for the few kilometers the bot sees
+            self._cos_lat = max(cos(radians(item['latitude'])), 0.01)
+            self._lng_step = self._lat_step / self._cos_lat
+        self._buckets[self._key(item['latitude'], item['longitude'])].append(item)
+        self._size += 1
+
+    def remove(self, item):
+        key = self._key(item['latitude'], item['longitude'])
+        bucket = self._buckets.get(key, [])
+        for i, other in enumerate(bucket):
+            if other is item:
+                del bucket[i]
+                self._size -= 1
+                if not bucket:
+                    del self._buckets[key]
+                return
+        raise ValueError('item is not indexed')
+
+    def _ring(self, center, r):
+        x, y = center
+        if r == 0:
+            yield center
+            return
+        for dx in xrange(-r, r + 1):
+            yield x + dx, y - r
+            yield x + dx, y + r
+        for dy in xrange(-r + 1, r):
+            yield x - r, y + dy
+            yield x + r, y + dy
+
+    def nearest(self, lat, lng, k=None, max_distance=None, predicate=None):
+        """
+        :param k: Maximum number of objects to return, all by default.
+        :param max_distance: Only return objects at most this many meters away.
+        :param predicate: Only return objects for which it returns True.
+        :return: The matching objects, closest first.
+        :rtype: list
+        """
+        if not self._size:
+            return []
+
+        center = self._key(lat, lng)
+        # lower bound of the distance to objects outside the searched rings,
+        # per ring, with some slack for the projection
+        ring_distance = self.cell_size * 0.99 * min(1.0, max(cos(radians(lat)), 0.01) / self._cos_lat)
+
+        matches = []
+        visited = 0
+        for r in count():
+            if 8 * r > len(self._buckets):
+                # the rings are now larger than the index, look at the rest at once
+                matches = self._matches(lat, lng, self._buckets.itervalues(), max_distance, predicate)
+                break
+
+            matches += self._matches(
+                lat, lng, (self._buckets[key] for key in self._ring(center, r) if key in self._buckets),
+                max_distance, predicate)
+
+            bound = r * ring_distance
+            if max_distance is not None and bound >= max_distance:
+                break
+            if k is not None and sum(1 for d, item in matches if d <= bound) >= k:
+                break
+
+        matches.sort(key=lambda match: match[0])
+        return [item for d, item in matches[:k]]
+
+    def within(self, lat, lng, radius, predicate=None):
+        return self.nearest(lat, lng, max_distance=radius, predicate=predicate)
+
+    @staticmethod
+    def _matches(lat, lng, buckets, max_distance, predicate):
+        matches = []
+        for bucket in buckets:
+            for item in bucket:
+                if predicate is not None and not predicate(item):
+                    continue
+                d = distance(lat, lng, item['latitude'], item['longitude'])
+                if max_distance is None or d <= max_distance:
+                    matches.append((d, item))
+        return matches
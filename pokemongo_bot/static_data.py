@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Game data shipped in the data directory (pokemons, moves, types, items, CP
+multipliers), loaded once per process and shared by every consumer.
+
+The JSON files are compiled into a single marshal file, rebuilt whenever the
+checksum of a source file changes. It can be built ahead of time with:
+
+    python -m pokemongo_bot.static_data
+"""
+
+import hashlib
+import json
+import logging
+import marshal
+import os
+import threading
+
+from pokemongo_bot.base_dir import _base_dir
+
+DATA_FILES = (
+    'charged_moves.json',
+    'fast_moves.json',
+    'items.json',
+    'level_to_cpm.json',
+    'pokemon.json',
+    'types.json',
+)
+# bumped whenever the layout of the cache changes
+CACHE_VERSION = 1
+CACHE_PATH = os.path.join(_base_dir, 'data', 'static_data.cache')
+
+_lock = threading.Lock()
+_data = None
+
+logger = logging.getLogger(__name__)
+
+
+def load(name):
+    """
+    :param name: File name in the data directory, e.g. 'pokemon.json'.
+    :return: The parsed file, shared by every consumer. Must not be modified.
+    """
+    global _data
+    if _data is None:
+        with _lock:
+            if _data is None:
+                _data = _load_all()
+    return _data[name]
+
+
+def clear():
+    """
+    Drops the loaded data, the next load reads the cache again.
+    """
+    global _data
+    with _lock:
+        _data = None
+
+
+def checksums(data_dir=None):
+    """
+    :return: MD5 of every data file by name.
+    :rtype: dict
+    """
+    data_dir = data_dir or os.path.join(_base_dir, 'data')
+    result = {}
+    for name in DATA_FILES:
+        with open(os.path.join(data_dir, name), 'rb') as f:
+            result[name] = hashlib.md5(f.read()).hexdigest()
+    return result
+
+
+def parse_sources(data_dir=None):
+    """
+    :return: Every data file parsed from its JSON source, by name.
+    :rtype: dict
+    """
+    data_dir = data_dir or os.path.join(_base_dir, 'data')
+    result = {}
+    for name in DATA_FILES:
+        with open(os.path.join(data_dir, name)) as f:
+            result[name] = json.load(f)
+    return result
+
+
+def compile_cache(path=CACHE_PATH, data_dir=None):
+    """
+    Compiles the data files into the cache at `path`.
+
+    :return: The compiled data by name.
+    :rtype: dict
+    """
+    data = parse_sources(data_dir)
+    write_cache(data, path, data_dir)
+    return data
+
+
+def write_cache(data, path=CACHE_PATH, data_dir=None):
+    header = (CACHE_VERSION, marshal.version, checksums(data_dir))
+    # written aside then renamed, so other processes never read half a cache
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'wb') as f:
+        marshal.dump(header, f)
+        marshal.dump(data, f)
+    os.rename(temp_path, path)
+
+
+def read_cache(path=CACHE_PATH, data_dir=None):
+    """
+    :return: The compiled data by name, None if the cache is missing, corrupt,
+    or older than a data file.
+    :rtype: dict
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = marshal.load(f)
+            if header != (CACHE_VERSION, marshal.version, checksums(data_dir)):
+                return None
+            return marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _load_all():
+    data = read_cache()
+    if data is None:
+        data = parse_sources()
+        try:
+            write_cache(data)
+        except (IOError, OSError) as e:
+            logger.debug('Error writing the static data cache: {}'.format(e))
+    return data
+
+
+if __name__ == '__main__':
+    compile_cache()
+    print 'Compiled {} data files into {}'.format(len(DATA_FILES), CACHE_PATH)
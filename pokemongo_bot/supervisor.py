@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+import binascii
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from base_dir import _base_dir
+from fort_cache import FortCache
+from multi_account import MultiAccountRunner
+from rate_limiter import BACKGROUND
+from retry_policy import RetryPolicy
+
+# A worker that ran this long before crashing starts again without waiting
+STABLE_RUN_SECONDS = 600
+# Seconds given to the workers to save their state when stopping
+STOP_TIMEOUT = 60
+
+
+def shard(items, count):
+    """
+    :return: `items` dealt round robin into at most `count` non empty lists.
+    :rtype: list
+    """
+    shards = [items[i::count] for i in xrange(count)]
+    return [s for s in shards if s]
+
+
+class FleetMetrics(object):
+    """
+    Latest Metrics.summary of every account of the fleet.
+    """
+
+    TOTALS = ('xp_earned', 'distance_travelled', 'visits', 'encounters', 'captures',
+              'releases', 'evolutions', 'earned_dust')
+
+    def __init__(self):
+        self.accounts = {}
+
+    def update(self, summaries):
+        for summary in summaries:
+            self.accounts[summary['username']] = summary
+
+    def totals(self):
+        totals = dict.fromkeys(self.TOTALS, 0)
+        for summary in self.accounts.values():
+            for key in self.TOTALS:
+                totals[key] += max(summary[key], 0)
+        totals['accounts'] = len(self.accounts)
+        return totals
+
+    def format(self):
+        return ('{accounts} accounts: {xp_earned} XP, {distance_travelled:.2f}km, {visits} stops, '
+                '{encounters} encountered, {captures} caught, {releases} released, {evolutions} evolved, '
+                '{earned_dust} stardust'.format(**self.totals()))
+
+
+class WorldCacheServer(object):
+    """
+    Local socket service holding the fort details shared by the workers and
+    the latest metrics of their accounts, run in a process of its own by the
+    supervisor.
+
+    Requests and responses are JSON documents, one per line. The first line
+    of a connection must be the token of the server. Plain sockets are used
+    rather than multiprocessing managers, which don't work once eventlet
+    patched the socket module, and the service has its own process because
+    eventlet threads would be copied into every forked worker.
+    """
+
+    def __init__(self, fort_cache):
+        self.fort_cache = fort_cache
+        self.metrics = FleetMetrics()
+        self.token = binascii.hexlify(os.urandom(16))
+        self.logger = logging.getLogger(type(self).__name__)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(16)
+        self.address = self._socket.getsockname()
+        self._stopped = False
+
+    def close(self):
+        self._socket.close()
+
+    def serve_forever(self):
+        # the supervisor stops the service once the workers are done
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            self.fort_cache.load()
+        except (IOError, ValueError):
+            self.logger.debug('Starting a new fort details cache at {}'.format(self.fort_cache.path))
+
+        # accept doesn't notice the socket being closed under eventlet, poll instead
+        self._socket.settimeout(1)
+        while not self._stopped:
+            try:
+                connection, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            connection.settimeout(None)
+            thread = threading.Thread(target=self._serve, args=(connection,))
+            thread.daemon = True
+            thread.start()
+        self.close()
+
+        try:
+            self.fort_cache.save()
+        except IOError:
+            self.logger.warning('Error saving the fort details to {}'.format(self.fort_cache.path))
+
+    def _serve(self, connection):
+        stream = connection.makefile('r+b')
+        try:
+            if json.loads(stream.readline() or 'null') != self.token:
+                return
+            for line in stream:
+                stream.write(json.dumps(self.handle(json.loads(line))) + '\n')
+                stream.flush()
+        except (IOError, ValueError) as e:
+            self.logger.debug('Connection closed: {}'.format(e))
+        finally:
+            stream.close()
+            connection.close()
+
+    def handle(self, request):
+        method = request['method']
+        if method == 'entry':
+            return self.fort_cache.entry(request['fort_id'])
+        if method == 'put':
+            self.fort_cache.put(request['fort_id'], request['details'], request['fetched_at'])
+        elif method == 'report_metrics':
+            self.metrics.update(request['summaries'])
+        elif method == 'metrics':
+            return self.metrics.accounts.values()
+        elif method == 'stop':
+            self._stopped = True
+        return None
+
+
+class WorldCacheClient(object):
+    """
+    Connection of a worker to the WorldCacheServer, usable as the backend of
+    a FortCache. Raises IOError or EOFError once the server is gone.
+    """
+
+    def __init__(self, address, token):
+        self._connection = socket.create_connection(address)
+        self._stream = self._connection.makefile('r+b')
+        self._lock = threading.Lock()
+        self._send(token)
+
+    def _send(self, document):
+        self._stream.write(json.dumps(document) + '\n')
+        self._stream.flush()
+
+    def _call(self, method, **kwargs):
+        kwargs['method'] = method
+        with self._lock:
+            self._send(kwargs)
+            line = self._stream.readline()
+        if not line:
+            raise EOFError('World cache server closed the connection')
+        return json.loads(line)
+
+    def entry(self, fort_id):
+        entry = self._call('entry', fort_id=fort_id)
+        return tuple(entry) if entry is not None else None
+
+    def put(self, fort_id, details, fetched_at):
+        self._call('put', fort_id=fort_id, details=details, fetched_at=fetched_at)
+
+    def report_metrics(self, summaries):
+        self._call('report_metrics', summaries=summaries)
+
+    def metrics(self):
+        """
+        :return: The latest Metrics.summary of every account.
+        :rtype: list
+        """
+        return self._call('metrics')
+
+    def stop(self):
+        self._call('stop')
+
+
+def run_worker(configs, bot_factory, health_record_factory, server_address, token, metrics_interval):
+    """
+    Entry point of a worker process: runs the bots of `configs` with a
+    MultiAccountRunner, sharing the fort details of the supervisor, and
+    reports their metrics every `metrics_interval` seconds.
+    """
+    client = WorldCacheClient(server_address, token)
+    health_record = health_record_factory(configs[0]) if health_record_factory else None
+    runner = MultiAccountRunner(configs, bot_factory, health_record)
+    runner.shared.fort_cache.backend = client
+    runner.start()
+    last_report = time.time()
+    try:
+        while runner.accounts:
+            runner.tick()
+            if time.time() - last_report >= metrics_interval:
+                last_report = time.time()
+                client.report_metrics(_capture_metrics(runner))
+    finally:
+        runner.stop()
+        try:
+            client.report_metrics([bot.metrics.summary() for bot in runner.bots()])
+        except (IOError, EOFError):
+            pass
+
+
+def _capture_metrics(runner):
+    summaries = []
+    for bot in runner.bots():
+        with bot.api.priority(BACKGROUND):
+            bot.metrics.capture_stats()
+        summaries.append(bot.metrics.summary())
+    return summaries
+
+
+class Worker(object):
+    def __init__(self, index, configs):
+        self.index = index
+        self.configs = configs
+        self.process = None
+        self.started_at = None
+        self.restart_at = None
+        self.restart_delay = None
+
+
+class Supervisor(object):
+    """
+    Shards the accounts across worker processes, one per core by default,
+    each running its bots with a MultiAccountRunner.
+
+    Crashed workers are started again after a growing delay. The workers
+    share the fort details through a WorldCacheServer and send it their
+    metrics, which are logged for the whole fleet.
+    """
+
+    def __init__(self, configs, bot_factory, health_record_factory=None, workers=None, metrics_interval=300):
+        """
+        :param configs: A configuration per account, see multi_account.account_configs.
+        :param bot_factory: Creates a bot, see MultiAccountRunner. Usually PokemonGoBot.
+        :param health_record_factory: Creates the health record of a worker from a configuration, usually BotEvent.
+        :param workers: Number of worker processes, the number of cores by default.
+        """
+        self.configs = configs
+        self.bot_factory = bot_factory
+        self.health_record_factory = health_record_factory
+        self.metrics_interval = metrics_interval
+        self.workers = [Worker(index, shard_configs) for index, shard_configs
+                        in enumerate(shard(configs, workers or multiprocessing.cpu_count()))]
+        self.retry_policy = RetryPolicy(
+            max_retries=configs[0].api_max_retries,
+            base_delay=configs[0].api_retry_base_delay,
+            max_delay=configs[0].api_retry_max_delay
+        )
+        self.metrics = FleetMetrics()
+        self.server = None
+        self.server_process = None
+        self.client = None
+        self.logger = logging.getLogger(type(self).__name__)
+        self.last_report = time.time()
+
+    def running(self):
+        return any(worker.process is not None or worker.restart_at is not None for worker in self.workers)
+
+    def run(self):
+        self.start_server()
+        try:
+            self.check_workers()
+            while self.running():
+                time.sleep(1)
+                self.check_workers()
+                if time.time() - self.last_report >= self.metrics_interval:
+                    self.last_report = time.time()
+                    self.report_metrics()
+        finally:
+            self.stop()
+
+    def start_server(self):
+        config = self.configs[0]
+        self.server = WorldCacheServer(FortCache(
+            path=os.path.join(_base_dir, 'data', 'fort-details.json'),
+            max_size=config.forts_details_cache_size,
+            ttl=config.forts_details_cache_ttl,
+            retry_delay=config.forts_details_retry_delay
+        ))
+        self.server_process = multiprocessing.Process(target=self.server.serve_forever)
+        self.server_process.start()
+        # the socket is served by the server process only
+        self.server.close()
+        self.client = WorldCacheClient(self.server.address, self.server.token)
+
+    def start_worker(self, worker):
+        worker.process = multiprocessing.Process(
+            target=run_worker,
+            args=(worker.configs, self.bot_factory, self.health_record_factory, self.server.address,
+                  self.server.token, self.metrics_interval)
+        )
+        worker.process.start()
+        worker.started_at = time.time()
+        worker.restart_at = None
+        self.logger.info('Worker {} started with {} accounts'.format(worker.index, len(worker.configs)))
+
+    def check_workers(self):
+        now = time.time()
+        for worker in self.workers:
+            if worker.process is None:
+                if worker.restart_at is not None and worker.restart_at <= now or worker.started_at is None:
+                    self.start_worker(worker)
+                continue
+
+            if worker.process.is_alive():
+                continue
+
+            exitcode = worker.process.exitcode
+            worker.process = None
+            if exitcode == 0:
+                self.logger.info('Worker {} has no accounts left'.format(worker.index))
+                continue
+
+            if now - worker.started_at >= STABLE_RUN_SECONDS:
+                worker.restart_delay = None
+            worker.restart_delay = self.retry_policy.next_delay(worker.restart_delay)
+            worker.restart_at = now + worker.restart_delay
+            self.logger.warning('Worker {} exited with code {}, restarting it in {:.0f} seconds'.format(
+                worker.index, exitcode, worker.restart_delay))
+
+    def report_metrics(self):
+        self.metrics.update(self.client.metrics())
+        self.logger.info(self.metrics.format())
+
+    def stop(self):
+        deadline = time.time() + STOP_TIMEOUT
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(max(deadline - time.time(), 0))
+            if worker.process.is_alive():
+                self.logger.warning('Worker {} is still running, terminating it'.format(worker.index))
+                worker.process.terminate()
+
+        if self.client is None:
+            return
+        try:
+            self.report_metrics()
+            self.client.stop()
+        except (IOError, EOFError) as e:
+            self.logger.warning('Error stopping the world cache server: {}'.format(e))
+        self.server_process.join(STOP_TIMEOUT)
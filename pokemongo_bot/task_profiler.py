@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from collections import Counter, deque
+from StringIO import StringIO
+
+import clock
+from api_stats import RingBuffer
+
+
+class TaskProfile(object):
+    """
+    Measurements of the last `size` runs of a task.
+    """
+
+    def __init__(self, size=1000):
+        self.wall = RingBuffer(size)
+        self.cpu = RingBuffer(size)
+        self.api_calls = RingBuffer(size)
+        self.sleep = RingBuffer(size)
+        self.results = deque(maxlen=size)
+
+    def add(self, wall, cpu, api_calls, sleep, result):
+        self.wall.append(wall)
+        self.cpu.append(cpu)
+        self.api_calls.append(api_calls)
+        self.sleep.append(sleep)
+        self.results.append(result)
+
+    def summary(self):
+        return {
+            'calls': self.wall.count,
+            'window': len(self.wall),
+            'wall_total': self.wall.total,
+            'wall_window': self.wall.window_total(),
+            'wall_p50': self.wall.percentile(50),
+            'wall_p95': self.wall.percentile(95),
+            'wall_max': self.wall.percentile(100),
+            'cpu_window': self.cpu.window_total(),
+            'api_calls_window': int(self.api_calls.window_total()),
+            'sleep_window': self.sleep.window_total(),
+            'results': dict(Counter(list(self.results))),
+        }
+
+
+class _Run(object):
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.api_calls = 0
+        self.sleep = 0.0
+
+
+def _cpu_time():
+    user, system = os.times()[0:2]
+    return user + system
+
+
+class TaskProfiler(object):
+    """
+    Measures every task run by the TaskScheduler: wall time, CPU time, API
+    calls, time slept and the WorkerResult, over the last `window` runs of
+    each task.
+
+    API calls and sleeps are only counted when they happen on the thread
+    running the task, requests sent through AsyncApi are not attributed to it.
+    CPU time is the one of the whole process, API threads included.
+
+    The task named `cprofile_task` also runs under cProfile, its statistics
+    accumulate until dumped with cprofile_stats or export.
+    """
+
+    def __init__(self, window=1000, cprofile_task=None):
+        self.window = window
+        self.cprofile_task = cprofile_task
+        self._cprofile = cProfile.Profile() if cprofile_task else None
+        self._profiles = {}
+        self._run = None
+
+    def attach(self, api_stats):
+        api_stats.add_listener(self._on_api_call)
+        clock.add_sleep_listener(self._on_sleep)
+
+    def detach(self):
+        clock.remove_sleep_listener(self._on_sleep)
+
+    def _on_api_call(self, **kwargs):
+        run = self._run
+        if run is not None and run.thread is threading.current_thread():
+            run.api_calls += 1
+
+    def _on_sleep(self, seconds):
+        run = self._run
+        if run is not None and run.thread is threading.current_thread():
+            run.sleep += seconds
+
+    def get(self, name):
+        profile = self._profiles.get(name)
+        if profile is None:
+            profile = self._profiles.setdefault(name, TaskProfile(self.window))
+        return profile
+
+    def run(self, worker):
+        """
+        Calls worker.work() and records how it went.
+        :return: What work returned.
+        """
+        name = type(worker).__name__
+        run = self._run = _Run()
+        result = None
+        wall_start = time.time()
+        cpu_start = _cpu_time()
+        try:
+            if self._cprofile is not None and name == self.cprofile_task:
+                result = self._cprofile.runcall(worker.work)
+            else:
+                result = worker.work()
+            return result
+        finally:
+            self._run = None
+            self.get(name).add(time.time() - wall_start, _cpu_time() - cpu_start, run.api_calls, run.sleep, result)
+
+    def summary(self):
+        """
+        :return: (task name, summary) pairs, the tasks taking the most time first.
+        :rtype: list of (str, dict)
+        """
+        summaries = [(name, profile.summary()) for name, profile in self._profiles.items()]
+        return sorted(summaries, key=lambda s: -s[1]['wall_window'])
+
+    def cprofile_stats(self, limit=20):
+        """
+        :return: The functions taking the most time in `cprofile_task`, None if it isn't profiled.
+        :rtype: str
+        """
+        if self._cprofile is None:
+            return None
+        output = StringIO()
+        stats = pstats.Stats(self._cprofile, stream=output)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+    def export(self, path):
+        """
+        Writes the summary to `path` as JSON, and the cProfile statistics
+        next to it (`path` with a .prof extension).
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'exported_at': time.time(), 'tasks': dict(self.summary())}, f, indent=2)
+        os.rename(tmp_path, path)
+
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(os.path.splitext(path)[0] + '.prof')
+
+
+def format_summary(name, summary):
+    def ms(seconds):
+        return '-' if seconds is None else '{:.1f}ms'.format(seconds * 1000)
+
+    return '{}: {} runs, {:.2f}s wall p50 {} p95 {} max {}, {:.2f}s CPU, {} API calls, {:.1f}s slept, {}'.format(
+        name, summary['window'], summary['wall_window'], ms(summary['wall_p50']), ms(summary['wall_p95']),
+        ms(summary['wall_max']), summary['cpu_window'], summary['api_calls_window'], summary['sleep_window'],
+        ', '.join('{} {}'.format(count, result) for result, count in sorted(summary['results'].items())))
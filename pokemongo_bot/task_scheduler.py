@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import weakref
+
+import clock
+import inventory
+from api_wrapper import CircuitOpenException
+from cell_workers.utils import distance
+from worker_result import WorkerResult
+
+
+class Trigger(object):
+    """
+    Condition under which a task has work to do, see BaseTask.triggers.
+    """
+
+    def fired(self, bot):
+        raise NotImplementedError
+
+    def reset(self, bot):
+        """
+        Called after the task ran.
+        """
+        pass
+
+
+class Every(Trigger):
+    """
+    Fires `seconds` after the task last ran, and on the first tick.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.next_run = None
+
+    def fired(self, bot):
+        return self.next_run is None or clock.now() >= self.next_run
+
+    def reset(self, bot):
+        self.next_run = clock.now() + self.seconds
+
+
+class OnMapUpdate(Trigger):
+    """
+    Fires when the bot received new map objects since the task last ran.
+    """
+
+    def __init__(self):
+        self.seen = None
+
+    def fired(self, bot):
+        return bot.last_time_map_object != self.seen
+
+    def reset(self, bot):
+        self.seen = bot.last_time_map_object
+
+
+class OnInventoryChange(Trigger):
+    """
+    Fires when the cached inventory changed since the task last ran.
+    """
+
+    def __init__(self):
+        self.seen = None
+
+    def fired(self, bot):
+        return inventory.version() != self.seen
+
+    def reset(self, bot):
+        self.seen = inventory.version()
+
+
+class OnPositionChange(Trigger):
+    """
+    Fires when the bot moved more than `min_distance` meters since the task last ran.
+    """
+
+    def __init__(self, min_distance=0):
+        self.min_distance = min_distance
+        self.seen = None
+
+    def fired(self, bot):
+        if self.seen is None:
+            return True
+        return distance(self.seen[0], self.seen[1], bot.position[0], bot.position[1]) > self.min_distance
+
+    def reset(self, bot):
+        self.seen = tuple(bot.position[0:2])
+
+
+class TaskScheduler(object):
+    """
+    Runs the tasks of a tick in order, skipping the ones whose triggers did
+    not fire. Tasks without triggers run every tick, like tasks returning
+    WorkerResult.RUNNING, which also end the tick.
+
+    Tasks are run through `profiler` (a TaskProfiler) when there is one. A
+    task sending a request type paused by its circuit breaker is skipped,
+    its triggers stay fired so that it runs again once the type is resumed.
+    """
+
+    def __init__(self, bot, profiler=None):
+        self.bot = bot
+        self.profiler = profiler
+        self.calls = 0
+        self.skipped = 0
+        self.logger = logging.getLogger(type(self).__name__)
+        self._triggers = weakref.WeakKeyDictionary()
+        self._running = weakref.WeakKeyDictionary()
+
+    def _triggers_of(self, worker):
+        if worker not in self._triggers:
+            self._triggers[worker] = worker.triggers()
+        return self._triggers[worker]
+
+    def is_due(self, worker):
+        return self._is_due(worker, self._triggers_of(worker))
+
+    def _is_due(self, worker, triggers):
+        if triggers is None or worker in self._running:
+            return True
+        for trigger in triggers:
+            if trigger.fired(self.bot):
+                return True
+        return False
+
+    def run(self, workers):
+        for worker in workers:
+            triggers = self._triggers_of(worker)
+            if not self._is_due(worker, triggers):
+                self.skipped += 1
+                continue
+
+            self.calls += 1
+            try:
+                result = self.profiler.run(worker) if self.profiler else worker.work()
+            except CircuitOpenException as e:
+                self.logger.debug('Skipping {}: {}'.format(type(worker).__name__, e))
+                self._running.pop(worker, None)
+                continue
+            for trigger in triggers or ():
+                trigger.reset(self.bot)
+
+            if result == WorkerResult.RUNNING:
+                self._running[worker] = True
+                return
+            self._running.pop(worker, None)
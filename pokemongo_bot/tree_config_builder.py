@@ -25,8 +25,22 @@ class TreeConfigBuilder(object):
     def _is_plugin_task(self, name):
         return '.' in name
 
-    def build(self):
+    def _reuse(self, previous, worker, task_config):
+        # a task whose config didn't change keeps running with its state
+        for instance in previous:
+            if type(instance) is worker and instance.config == task_config:
+                previous.remove(instance)
+                return instance
+        return None
+
+    def build(self, previous=None):
+        """
+        :param previous: Workers of the tree being replaced, the ones with an unchanged config are kept.
+        :return: The workers of the enabled tasks.
+        :rtype: list
+        """
         workers = []
+        previous = list(previous or [])
         deprecated_pokemon_task = False
 
         for task in self.tasks_raw:
@@ -71,7 +85,7 @@ class TreeConfigBuilder(object):
                     )
                 )
 
-            instance = worker(self.bot, task_config)
+            instance = self._reuse(previous, worker, task_config) or worker(self.bot, task_config)
             if instance.enabled:
                 workers.append(instance)
 
@@ -1,4 +1,3 @@
-import time
 from itertools import chain
 from math import ceil
 
@@ -6,6 +5,9 @@ import haversine
 import polyline
 import requests
 
+from pokemongo_bot import clock
+
+
 class PolylineObjectHandler:
     '''
     Does this need to be a class?
@@ -69,13 +71,13 @@ class Polyline(object):
         self.speed = float(speed)
         self.lat, self.long = self.points[0][0], self.points[0][1]
         self.polyline = self.combine_polylines(self.points)
-        self._timestamp = time.time()
+        self._timestamp = clock.now()
         self.is_paused = False
         self._last_paused_timestamp = None
         self._paused_total = 0.0
 
     def reset_timestamps(self):
-        self._timestamp = time.time()
+        self._timestamp = clock.now()
         self.is_paused = False
         self._last_paused_timestamp = None
         self._paused_total = 0.0
@@ -93,12 +95,12 @@ class Polyline(object):
     def pause(self):
         if not self.is_paused:
             self.is_paused = True
-            self._last_paused_timestamp = time.time()
+            self._last_paused_timestamp = clock.now()
 
     def unpause(self):
         if self.is_paused:
             self.is_paused = False
-            self._paused_total += time.time() - self._last_paused_timestamp
+            self._paused_total += clock.now() - self._last_paused_timestamp
             self._last_paused_timestamp = None
 
     def walk_steps(self):
@@ -114,7 +116,7 @@ class Polyline(object):
     def get_pos(self):
         walked_distance = 0.0
         if not self.is_paused:
-            time_passed = time.time()
+            time_passed = clock.now()
         else:
             time_passed = self._last_paused_timestamp
         time_passed_distance = self.speed * abs(time_passed - self._timestamp - self._paused_total)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from collections import OrderedDict
+
+
+class WebUpdater(object):
+    """
+    Writes the web location files of bots (PokemonGoBot.update_web_location)
+    on a background thread, so the tick doesn't wait for the disk.
+
+    Requests of a bot made while its previous one is still waiting are
+    merged. Several bots can share one updater, and so one thread.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(type(self).__name__)
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def request(self, bot):
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._process_requests)
+                self._thread.daemon = True
+                self._thread.start()
+            if bot not in self._pending:
+                self._pending[bot] = True
+                self._condition.notify()
+
+    def _process_requests(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                bot, _ = self._pending.popitem(last=False)
+            try:
+                bot.update_web_location()
+            except Exception as e:
+                self.logger.warning('Error updating the web location: {}'.format(e))
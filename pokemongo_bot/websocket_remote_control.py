@@ -47,7 +47,13 @@ class WebsocketRemoteControl(object):
         request = self.bot.api.create_request()
         request.get_player()
         request.get_inventory()
-        response_dict = request.call()
+        # reply from an API thread instead of blocking the socket
+        self.bot.async_api.call(request).add_done_callback(self._send_player_info)
+
+    def _send_player_info(self, future):
+        if future.exception() is not None:
+            return
+        response_dict = future.result()
         inventory = response_dict['responses'].get('GET_INVENTORY', {})
         player_info = response_dict['responses'].get('GET_PLAYER', {})
         self.sio.emit(
@@ -59,3 +65,14 @@ class WebsocketRemoteControl(object):
                 # 'account': self.bot.config.username
             }
         )
+
+    def get_task_profile(self):
+        self.sio.emit(
+            'bot:send_reply',
+            {
+                'result': dict(self.bot.profiler.summary()),
+                'command': 'get_task_profile',
+                'account': 'bot'
+                # 'account': self.bot.config.username
+            }
+        )
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock, patch
+
+from pokemongo_bot import clock
+from pokemongo_bot.api_wrapper import ApiRequest
+from pokemongo_bot.api_recorder import ApiRecorder, ApiRecording, RecordingApiWrapper, ReplayApiWrapper
+from pokemongo_bot.benchmark import Benchmark
+from pokemongo_bot.clock import VirtualClock
+from pokemongo_bot.rate_limiter import RateLimiter
+
+INVENTORY = {'responses': {'GET_INVENTORY': {'inventory_delta': {}}}, 'status_code': 1}
+FORT_A = {'responses': {'FORT_DETAILS': {'name': 'A'}}, 'status_code': 1}
+FORT_B = {'responses': {'FORT_DETAILS': {'name': 'B'}}, 'status_code': 1}
+
+
+class ApiRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'session.rec')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        recorder = ApiRecorder(self.path)
+        recorder.record([('GET_INVENTORY', {})], INVENTORY)
+        recorder.record([('FORT_DETAILS', {'fort_id': 'a'})], FORT_A)
+        recorder.close()
+
+        recording = ApiRecording.load(self.path)
+        self.assertEqual([r['response'] for r in recording.records], [INVENTORY, FORT_A])
+
+    def test_unclosed_recording_can_be_loaded(self):
+        recorder = ApiRecorder(self.path)
+        recorder.record([('GET_INVENTORY', {})], INVENTORY)
+
+        self.assertEqual(len(ApiRecording.load(self.path).records), 1)
+        recorder.close()
+
+    @patch.object(ApiRequest, '_call', return_value=FORT_A)
+    def test_recording_wrapper_records_calls(self, mock_call):
+        recorder = MagicMock()
+        api = RecordingApiWrapper(recorder, rate_limiter=RateLimiter(requests_per_second=100))
+        api.set_position(0, 0, 0)
+        request = api.create_request()
+        request.can_call = MagicMock(return_value=True)
+        request.fort_details(fort_id='a')
+
+        self.assertEqual(request.call(), FORT_A)
+        recorder.record.assert_called_once_with([('FORT_DETAILS', {'fort_id': 'a'})], FORT_A)
+
+
+class ApiRecordingTest(unittest.TestCase):
+    def setUp(self):
+        self.recording = ApiRecording([
+            {'t': 0, 'requests': [('FORT_DETAILS', {'fort_id': 'a'})], 'response': FORT_A},
+            {'t': 1, 'requests': [('FORT_DETAILS', {'fort_id': 'b'})], 'response': FORT_B},
+            {'t': 2, 'requests': [('GET_INVENTORY', {})], 'response': INVENTORY},
+        ])
+
+    def test_exact_request_is_preferred(self):
+        self.assertEqual(self.recording.response([('FORT_DETAILS', {'fort_id': 'b'})]), FORT_B)
+        self.assertEqual(self.recording.response([('FORT_DETAILS', {'fort_id': 'b'})]), FORT_B)
+
+    def test_same_request_types_are_served_round_robin(self):
+        self.assertEqual(self.recording.response([('FORT_DETAILS', {'fort_id': 'c'})]), FORT_A)
+        self.assertEqual(self.recording.response([('FORT_DETAILS', {'fort_id': 'c'})]), FORT_B)
+        self.assertEqual(self.recording.response([('FORT_DETAILS', {'fort_id': 'c'})]), FORT_A)
+
+    def test_unknown_requests_get_empty_response(self):
+        response = self.recording.response([('FORT_SEARCH', {'fort_id': 'a'})])
+        self.assertEqual(response, {'status_code': 1, 'responses': {'FORT_SEARCH': {}}})
+        self.assertEqual((self.recording.calls, self.recording.misses), (1, 1))
+
+    def test_responses_are_copies(self):
+        self.recording.response([('GET_INVENTORY', {})])['responses'].clear()
+        self.assertEqual(self.recording.response([('GET_INVENTORY', {})]), INVENTORY)
+
+    def test_replay_wrapper_works_offline(self):
+        api = ReplayApiWrapper(self.recording, rate_limiter=RateLimiter(requests_per_second=100))
+        api.set_position(0, 0, 0)
+
+        self.assertTrue(api.login('ptc', 'user', 'password'))
+        self.assertEqual(api.get_inventory(), INVENTORY)
+        self.assertEqual(api.renew().recording, self.recording)
+
+
+class BenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        self.real_clock = clock.get_clock()
+        clock.set_clock(VirtualClock(start=0))
+
+    def tearDown(self):
+        clock.set_clock(self.real_clock)
+
+    def test_run(self):
+        bot = MagicMock()
+        bot.api.recording = ApiRecording([])
+        worker = MagicMock()
+        bot.workers = [worker]
+
+        def tick():
+            bot.api.recording.response([('GET_INVENTORY', {})])
+            for worker in bot.workers:
+                worker.work()
+            clock.sleep(2)
+        bot.tick.side_effect = tick
+
+        benchmark = Benchmark(bot, ticks=10)
+        benchmark.run()
+
+        self.assertEqual(benchmark.api_calls_per_tick(), 1)
+        self.assertEqual(benchmark.simulated, 20)
+        self.assertEqual(benchmark.worker_calls['MagicMock'], 10)
+        self.assertGreater(benchmark.ticks_per_second(), 0)
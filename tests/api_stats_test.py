@@ -0,0 +1,95 @@
+import unittest
+from mock import MagicMock, patch
+
+from tests import FakeApi
+from pgoapi.exceptions import ServerSideRequestThrottlingException
+from pokemongo_bot.api_stats import ApiStats, RingBuffer, format_summary
+from pokemongo_bot.rate_limiter import RateLimiter
+
+PLAYER = {'responses': {'GET_PLAYER': {'a': 1}}, 'status_code': 1}
+
+
+class RingBufferTest(unittest.TestCase):
+    def test_keeps_last_samples(self):
+        buffer = RingBuffer(size=3)
+        for value in range(10):
+            buffer.append(value)
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.count, 10)
+        self.assertEqual(buffer.total, 45)
+        self.assertEqual(buffer.percentile(0), 7)
+        self.assertEqual(buffer.percentile(100), 9)
+
+    def test_percentiles(self):
+        buffer = RingBuffer()
+        self.assertIsNone(buffer.percentile(50))
+        for value in range(101):
+            buffer.append(value)
+
+        self.assertEqual(buffer.percentile(50), 50)
+        self.assertEqual(buffer.percentile(95), 95)
+
+
+class ApiStatsTest(unittest.TestCase):
+    def test_summary_orders_by_time_spent(self):
+        stats = ApiStats()
+        stats.record_call(('GET_INVENTORY', ), latency=0.1, throttle_wait=0, retries={})
+        stats.record_call(('GET_MAP_OBJECTS', ), latency=0.2, throttle_wait=1.5, retries={'throttle': 2})
+        stats.record_call(('GET_MAP_OBJECTS', ), latency=0.4, throttle_wait=0.5, retries={'throttle': 1})
+
+        summary = stats.summary()
+        self.assertEqual([t for t, s in summary], ['GET_MAP_OBJECTS', 'GET_INVENTORY'])
+        self.assertEqual(summary[0][1]['calls'], 2)
+        self.assertEqual(summary[0][1]['throttle_wait_total'], 2)
+        self.assertEqual(summary[0][1]['retries'], {'throttle': 3})
+        self.assertEqual(
+            format_summary(*summary[0]),
+            'GET_MAP_OBJECTS: 2 calls (0 batched), latency p50 400ms p95 400ms p99 400ms, 2.0s rate limited, 3 retries'
+        )
+
+    def test_listeners_are_called(self):
+        stats = ApiStats()
+        listener = MagicMock()
+        stats.add_listener(listener)
+        stats.record_call(('GET_PLAYER', ), latency=0.1, throttle_wait=0, retries={}, response=PLAYER)
+
+        listener.assert_called_once_with(
+            request_types=('GET_PLAYER', ), latency=0.1, throttle_wait=0, retries={}, response_size=len("{'a': 1}"))
+
+    def test_batched_calls_are_recorded_under_every_type(self):
+        stats = ApiStats()
+        listener = MagicMock()
+        stats.add_listener(listener)
+        stats.record_call(('GET_PLAYER', ), latency=0.1, throttle_wait=0, retries={})
+        stats.record_call(('GET_PLAYER', 'GET_INVENTORY'), latency=0.2, throttle_wait=0, retries={},
+                          response={'responses': {'GET_PLAYER': {'a': 1}, 'GET_INVENTORY': {'items': []}}})
+
+        summary = dict(stats.summary())
+        self.assertEqual((summary['GET_PLAYER']['calls'], summary['GET_PLAYER']['batched']), (2, 1))
+        self.assertEqual((summary['GET_INVENTORY']['calls'], summary['GET_INVENTORY']['batched']), (1, 1))
+        self.assertEqual(stats.get('GET_INVENTORY').response_size.percentile(50), len("{'items': []}"))
+        self.assertEqual(listener.call_count, 2)
+
+    def test_response_sizes_are_sampled(self):
+        stats = ApiStats(size_sample_interval=3)
+        for _ in range(7):
+            stats.record_call(('GET_PLAYER', ), latency=0.1, throttle_wait=0, retries={}, response=PLAYER)
+        stats.record_call(('GET_PLAYER', ), latency=0.1, throttle_wait=0, retries={}, response=None)
+
+        self.assertEqual(stats.get('GET_PLAYER').latency.count, 8)
+        self.assertEqual(len(stats.get('GET_PLAYER').response_size), 3)
+
+    @patch('pokemongo_bot.api_wrapper.sleep')
+    def test_api_calls_are_recorded(self, sleep):
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+        request = api.create_request()
+        response = {'responses': {'FORT_SEARCH': {}}, 'status_code': 1}
+        request._call.side_effect = [ServerSideRequestThrottlingException(), 'wrong', response]
+        request.fort_search()
+        request.call()
+
+        stats = api.stats.get('FORT_SEARCH')
+        self.assertEqual(stats.latency.count, 1)
+        self.assertEqual(stats.response_size.percentile(50), len(repr({})))
+        self.assertEqual(dict(stats.retries), {'throttle': 1, 'invalid_response': 1, 'unexpected_response': 0})
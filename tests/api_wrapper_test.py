@@ -5,8 +5,9 @@ from timeout_decorator import timeout, TimeoutError
 from tests import FakeApi
 
 from pgoapi import PGoApi
-from pgoapi.exceptions import NotLoggedInException, ServerBusyOrOfflineException, NoPlayerPositionSetException, EmptySubrequestChainException
+from pgoapi.exceptions import NotLoggedInException, ServerBusyOrOfflineException, NoPlayerPositionSetException, EmptySubrequestChainException, ServerSideRequestThrottlingException
 from pokemongo_bot.api_wrapper import ApiWrapper
+from pokemongo_bot.rate_limiter import RateLimiter, BACKGROUND
 
 class TestApiWrapper(unittest.TestCase):
     def test_raises_not_logged_in_exception(self):
@@ -98,26 +99,60 @@ class TestApiWrapper(unittest.TestCase):
 
     @timeout(1)
     def test_api_call_throttle_should_pass(self):
-        request = FakeApi().create_request()
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=5))
+        request = api.create_request()
         request.is_response_valid = MagicMock(return_value=True)
-        request.requests_per_seconds = 5
 
-        for i in range(request.requests_per_seconds):
+        for i in range(5):
             request.call()
 
     @timeout(1) # expects a timeout
     def test_api_call_throttle_should_fail(self):
-        request = FakeApi().create_request()
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=5))
+        request = api.create_request()
         request.is_response_valid = MagicMock(return_value=True)
-        request.requests_per_seconds = 5
 
         with self.assertRaises(TimeoutError):
-            for i in range(request.requests_per_seconds * 2):
+            for i in range(5 * 2):
+                request.call()
+
+    @timeout(1) # expects a timeout
+    def test_api_call_throttle_is_shared_between_requests(self):
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=5))
+
+        with self.assertRaises(TimeoutError):
+            for i in range(5 * 2):
+                request = api.create_request()
+                request.is_response_valid = MagicMock(return_value=True)
                 request.call()
 
+    @patch('pokemongo_bot.api_wrapper.sleep')
+    def test_api_call_throttled_by_server_lowers_rate(self, sleep):
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+        request = api.create_request()
+        request.is_response_valid = MagicMock(return_value=True)
+        request._call.side_effect = [ServerSideRequestThrottlingException(), 'mock return']
+        request.get_inventory()
+
+        self.assertEqual(request.call(), 'mock return')
+        self.assertLess(api.rate_limiter.rate, 100)
+        sleep.assert_not_called()
+
     @patch('pokemongo_bot.api_wrapper.ApiRequest.is_response_valid')
     def test_api_direct_call(self, mock_method):
         mock_method.return_value = True
 
         result = FakeApi().get_inventory()
         self.assertEqual(result, 'mock return')
+
+    def test_priority_block(self):
+        rate_limiter = MagicMock()
+        rate_limiter.wait.return_value = 0
+        api = FakeApi(rate_limiter=rate_limiter)
+        with api.priority(BACKGROUND):
+            request = api.create_request({'responses': {'GET_PLAYER': {}}, 'status_code': 1})
+        request.get_player()
+        request.call()
+
+        rate_limiter.wait.assert_called_once_with(['GET_PLAYER'], priority=BACKGROUND)
+        self.assertIsNone(api.current_priority())
@@ -0,0 +1,74 @@
+import threading
+import unittest
+from mock import MagicMock
+
+from tests import FakeApi
+from pokemongo_bot.async_api import AsyncApi, ApiFuture, ApiFutureTimeout
+from pokemongo_bot.rate_limiter import RateLimiter
+
+FORT = {'responses': {'FORT_DETAILS': {'name': 'A'}}, 'status_code': 1}
+
+
+class ApiFutureTest(unittest.TestCase):
+    def test_result_and_callbacks(self):
+        future = ApiFuture()
+        callback = MagicMock()
+        future.add_done_callback(callback)
+        with self.assertRaises(ApiFutureTimeout):
+            future.result(timeout=0.01)
+
+        future.set_result(FORT)
+        self.assertEqual(future.result(), FORT)
+        callback.assert_called_once_with(future)
+
+        # callbacks added later run right away
+        late_callback = MagicMock()
+        future.add_done_callback(late_callback)
+        late_callback.assert_called_once_with(future)
+
+    def test_exception_is_raised_by_result(self):
+        future = ApiFuture()
+        future.set_exception(ValueError())
+
+        self.assertIsInstance(future.exception(), ValueError)
+        with self.assertRaises(ValueError):
+            future.result()
+
+
+class AsyncApiTest(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+        self.api.create_request = MagicMock(side_effect=lambda: FakeApi.create_request(self.api, FORT))
+
+    def test_calls_overlap(self):
+        async_api = AsyncApi(self.api, workers=2)
+        both_running = threading.Event()
+        running = []
+
+        def call():
+            running.append(True)
+            if len(running) == 2:
+                both_running.set()
+            return both_running.wait(1)
+
+        futures = [async_api.submit(call), async_api.submit(call)]
+        self.assertTrue(all(f.result(timeout=2) for f in futures))
+        async_api.shutdown()
+
+    def test_request_shortcuts(self):
+        async_api = AsyncApi(self.api, workers=1)
+        future = async_api.fort_details(fort_id='a', latitude=0, longitude=0)
+
+        self.assertEqual(future.result(timeout=2), FORT)
+        async_api.shutdown()
+
+    def test_inline_calls(self):
+        async_api = AsyncApi(self.api, workers=0)
+        future = async_api.fort_details(fort_id='a', latitude=0, longitude=0)
+
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), FORT)
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            AsyncApi(self.api).wrong_request()
@@ -0,0 +1,47 @@
+import time
+import unittest
+from datetime import datetime
+
+from pokemongo_bot import clock
+from pokemongo_bot.cell_workers.sleep_schedule import SleepSchedule
+from pokemongo_bot.clock import VirtualClock
+from tests import FakeBot
+
+
+class ClockTest(unittest.TestCase):
+    def setUp(self):
+        self.real_clock = clock.get_clock()
+        self.clock = VirtualClock(start=time.mktime(datetime(2016, 8, 1, 12, 0).timetuple()))
+        clock.set_clock(self.clock)
+
+    def tearDown(self):
+        clock.set_clock(self.real_clock)
+
+    def test_virtual_time(self):
+        clock.sleep(90)
+        clock.sleep(-1)
+
+        self.assertEqual(clock.datetime_now(), datetime(2016, 8, 1, 12, 1, 30))
+        self.assertEqual(self.clock.slept, 90)
+
+    def test_sleep_listeners(self):
+        slept = []
+        clock.add_sleep_listener(slept.append)
+        try:
+            clock.sleep(2)
+            clock.sleep(0)
+        finally:
+            clock.remove_sleep_listener(slept.append)
+        clock.sleep(3)
+
+        self.assertEqual(slept, [2])
+
+    def test_hours_of_sleep_schedule_are_simulated_instantly(self):
+        worker = SleepSchedule(FakeBot(), {'time': '12:20', 'duration': '07:00'})
+        worker._next_duration = 7 * 3600
+
+        start = time.time()
+        worker._sleep()
+
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(clock.datetime_now(), datetime(2016, 8, 1, 19, 0))
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from argparse import Namespace
+
+from pokemongo_bot import clock, PokemonGoBot, TreeConfigBuilder
+from pokemongo_bot.config_watcher import ConfigWatcher
+from tests import FakeBot
+
+
+class ConfigWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = clock.VirtualClock(start=100)
+        real_clock = clock.get_clock()
+        clock.set_clock(self.clock)
+        self.addCleanup(clock.set_clock, real_clock)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'config.json')
+        self.write('{}')
+        self.watcher = ConfigWatcher(self.path, interval=5)
+
+    def write(self, content):
+        with open(self.path, 'w') as f:
+            f.write(content)
+
+    def test_changes_are_noticed_once(self):
+        self.write('{"tasks": []}')
+        self.clock.sleep(5)
+
+        self.assertTrue(self.watcher.changed())
+        self.clock.sleep(5)
+        self.assertFalse(self.watcher.changed())
+
+    def test_file_is_checked_at_most_every_interval(self):
+        self.write('{"tasks": []}')
+        self.clock.sleep(1)
+
+        self.assertFalse(self.watcher.changed())
+        self.clock.sleep(4)
+        self.assertTrue(self.watcher.changed())
+
+    def test_missing_file_is_not_a_change(self):
+        os.remove(self.path)
+        self.clock.sleep(5)
+
+        self.assertFalse(self.watcher.changed())
+
+
+def make_config(raw_tasks, **kwargs):
+    config = Namespace(raw_tasks=raw_tasks, location='here', **dict.fromkeys(PokemonGoBot.LIVE_SETTINGS))
+    config.__dict__.update(kwargs)
+    return config
+
+
+class ReloadConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.bot = FakeBot()
+        self.bot.config = make_config([{'type': 'HandleSoftBan'}, {'type': 'IncubateEggs'}], daily_catch_limit=800)
+        self.bot.workers = TreeConfigBuilder(self.bot, self.bot.config.raw_tasks).build()
+
+    def test_changed_tasks_and_live_settings_are_applied(self):
+        soft_ban, incubate_eggs = self.bot.workers
+        config = make_config([{'type': 'HandleSoftBan'}, {'type': 'IncubateEggs', 'config': {'longer_eggs_first': True}}],
+                             daily_catch_limit=100, location='there')
+
+        self.assertTrue(self.bot.reload_config(config))
+
+        self.assertIs(self.bot.workers[0], soft_ban)
+        self.assertIsNot(self.bot.workers[1], incubate_eggs)
+        self.assertEqual(self.bot.config.daily_catch_limit, 100)
+        self.assertEqual(self.bot.config.location, 'here')
+
+    def test_invalid_tasks_keep_the_current_ones(self):
+        workers = self.bot.workers
+
+        self.assertFalse(self.bot.reload_config(make_config([{'type': 'NoSuchTask'}], daily_catch_limit=100)))
+
+        self.assertIs(self.bot.workers, workers)
+        self.assertEqual(self.bot.config.daily_catch_limit, 800)
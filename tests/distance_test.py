@@ -0,0 +1,31 @@
+import unittest
+
+from pokemongo_bot.cell_workers.utils import distance, distances, distance_matrix, pairs_within
+from pokemongo_bot.micro_benchmarks import random_points, scalar_pairs_within
+
+
+class DistanceTest(unittest.TestCase):
+    def setUp(self):
+        self.lats, self.lngs = random_points(200)
+
+    def test_distances_match_scalar(self):
+        vectorized = distances(self.lats[0], self.lngs[0], self.lats, self.lngs)
+
+        for lat, lng, d in zip(self.lats, self.lngs, vectorized):
+            self.assertAlmostEqual(d, distance(self.lats[0], self.lngs[0], lat, lng), places=6)
+
+    def test_distance_matrix(self):
+        matrix = distance_matrix(self.lats[:3], self.lngs[:3], self.lats, self.lngs)
+
+        self.assertEqual(matrix.shape, (3, 200))
+        self.assertAlmostEqual(matrix[2][7], distance(self.lats[2], self.lngs[2], self.lats[7], self.lngs[7]), places=6)
+        self.assertEqual(matrix[1][1], 0)
+
+    def test_pairs_within(self):
+        expected = scalar_pairs_within(self.lats, self.lngs, 300)
+
+        self.assertTrue(expected)
+        self.assertEqual(sorted(pairs_within(self.lats, self.lngs, 300, block_size=16)), expected)
+
+    def test_pairs_within_no_points(self):
+        self.assertEqual(pairs_within([], [], 100), [])
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock, patch
+
+from tests import FakeApi
+from pokemongo_bot.async_api import AsyncApi
+from pokemongo_bot.cell_workers.utils import fort_details, prefetch_fort_details
+from pokemongo_bot.fort_cache import FortCache
+from pokemongo_bot.rate_limiter import RateLimiter
+
+FORT = {'id': 'a', 'latitude': 0, 'longitude': 0}
+DETAILS = {'name': 'A'}
+RESPONSE = {'responses': {'FORT_DETAILS': DETAILS}, 'status_code': 1}
+
+
+@patch('pokemongo_bot.fort_cache.clock')
+class FortCacheTest(unittest.TestCase):
+    def test_least_recently_used_are_dropped(self, mock_clock):
+        mock_clock.now.return_value = 100
+        cache = FortCache(max_size=2)
+        cache.put('a', {})
+        cache.put('b', {})
+        cache.get('a')
+        cache.put('c', {})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {})
+
+    def test_expired_details_are_fetched_again(self, mock_clock):
+        mock_clock.now.return_value = 100
+        cache = FortCache(ttl=60)
+        cache.put('a', DETAILS)
+        self.assertFalse(cache.should_fetch('a'))
+
+        mock_clock.now.return_value = 200
+        self.assertIsNone(cache.get('a'))
+        self.assertTrue(cache.should_fetch('a'))
+
+    def test_failures_are_retried_later(self, mock_clock):
+        mock_clock.now.return_value = 100
+        cache = FortCache(retry_delay=300)
+        cache.put_failure('a')
+        self.assertFalse(cache.should_fetch('a'))
+
+        mock_clock.now.return_value = 401
+        self.assertTrue(cache.should_fetch('a'))
+
+    def test_save_and_load(self, mock_clock):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'forts.json')
+            mock_clock.now.return_value = 100
+            cache = FortCache(path, ttl=60)
+            cache.put('a', DETAILS)
+            cache.put('b', DETAILS, fetched_at=10)
+            cache.save()
+
+            loaded = FortCache(path, ttl=60)
+            loaded.load()
+            self.assertEqual(loaded.get('a'), DETAILS)
+            self.assertEqual(len(loaded), 1)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_backend_is_shared(self, mock_clock):
+        mock_clock.now.return_value = 100
+        backend = FortCache(ttl=60)
+        first = FortCache(ttl=60, backend=backend)
+        second = FortCache(ttl=60, backend=backend)
+
+        first.put('a', DETAILS)
+        self.assertFalse(second.should_fetch('a'))
+        self.assertEqual(second.get('a'), DETAILS)
+
+        mock_clock.now.return_value = 200
+        self.assertTrue(second.should_fetch('a'))
+
+    def test_lost_backend_is_dropped(self, mock_clock):
+        mock_clock.now.return_value = 100
+        backend = MagicMock()
+        backend.entry.side_effect = EOFError
+        cache = FortCache(backend=backend)
+
+        self.assertTrue(cache.should_fetch('a'))
+        cache.put('a', DETAILS)
+        self.assertIsNone(cache.backend)
+        self.assertEqual(cache.get('a'), DETAILS)
+
+
+class FortDetailsTest(unittest.TestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.bot.api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+        self.bot.fort_cache = FortCache()
+        self.bot.async_api = AsyncApi(self.bot.api, workers=0)
+
+    def test_details_are_cached(self):
+        self.bot.api.create_request = MagicMock(side_effect=lambda: FakeApi.create_request(self.bot.api, RESPONSE))
+
+        self.assertEqual(fort_details(self.bot, 'a', 0, 0), DETAILS)
+        self.assertEqual(fort_details(self.bot, 'a', 0, 0), DETAILS)
+        self.assertEqual(self.bot.api.create_request.call_count, 1)
+
+    @patch('pokemongo_bot.api_wrapper.sleep')
+    def test_failures_are_cached(self, sleep):
+        self.bot.api.create_request = MagicMock(side_effect=lambda: FakeApi.create_request(self.bot.api, 'wrong'))
+        self.bot.api.retry_policy.max_retries = 1
+
+        self.assertEqual(fort_details(self.bot, 'a', 0, 0), {})
+        self.assertEqual(fort_details(self.bot, 'a', 0, 0), {})
+        self.assertEqual(self.bot.api.create_request.call_count, 1)
+
+    def test_prefetch(self):
+        self.bot.api.create_request = MagicMock(side_effect=lambda: FakeApi.create_request(self.bot.api, RESPONSE))
+        prefetch_fort_details(self.bot, [FORT], wait=False)
+
+        self.assertEqual(self.bot.fort_cache.get('a'), DETAILS)
+        self.assertEqual(self.bot.fort_cache.pending, {})
+        prefetch_fort_details(self.bot, [FORT])
+        self.assertEqual(self.bot.api.create_request.call_count, 1)
@@ -1,6 +1,8 @@
 import unittest
+from mock import MagicMock, patch
 
 from pokemongo_bot.inventory import *
+from pokemongo_bot.micro_benchmarks import random_pokemons
 
 
 class InventoryTest(unittest.TestCase):
@@ -122,7 +124,7 @@ class InventoryTest(unittest.TestCase):
             "cp_multiplier": 0.4627983868122101,
             "additional_cp_multiplier": 0.018886566162109375,
             "cp": 653, "nickname": "Golb", "id": 13632861873471324})
-        self.assertEqual(poke.level, 12.5)
+        self.assertEqual(poke.level, 13.0)
         self.assertEqual(poke.iv, 0.47)
         self.assertAlmostEqual(poke.ivcp, 0.488747515)
         self.assertAlmostEqual(poke.static.max_cp, 1921.34561459)
@@ -141,7 +143,7 @@ class InventoryTest(unittest.TestCase):
             "move_1": 221, "move_2": 129, "pokemon_id": 19, "cp": 106,
             "individual_attack": 6, "stamina_max": 22, "individual_defense": 14,
             "cp_multiplier": 0.37523558735847473, "id": 7841053399})
-        self.assertEqual(poke.level, 7.5)
+        self.assertEqual(poke.level, 8.0)
         self.assertEqual(poke.iv, 0.44)
         self.assertAlmostEqual(poke.ivcp, 0.3804059)
         self.assertAlmostEqual(poke.static.max_cp, 581.64643575)
@@ -156,6 +158,25 @@ class InventoryTest(unittest.TestCase):
         self.assertAlmostEqual(poke.moveset.attack_perfection, 0.835172881385)
         self.assertAlmostEqual(poke.moveset.defense_perfection, 0.603137650999)
 
+    def test_pokemon_stats_are_computed_on_first_use(self):
+        poke = Pokemon({
+            "move_1": 221, "move_2": 129, "pokemon_id": 19, "cp": 106,
+            "individual_attack": 6, "stamina_max": 22, "individual_defense": 14,
+            "cp_multiplier": 0.37523558735847473, "id": 7841053399})
+        self.assertFalse(hasattr(poke, '__dict__'))
+        self.assertIsNone(poke._moveset)
+
+        self.assertIs(poke.moveset, poke.moveset)
+        self.assertEqual(poke.dps, poke.moveset.dps)
+        self.assertEqual(poke.ncp, poke.cp_percent)
+
+    def test_inconsistent_pokemon_fails_at_parse(self):
+        data = random_pokemons(1)[0]
+        data['cp'] += 100
+
+        with self.assertRaises(AssertionError):
+            Pokemon(data)
+
     def test_levels_to_cpm(self):
         l2c = LevelToCPm
         self.assertIs(levels_to_cpm(), l2c)
@@ -175,6 +196,34 @@ class InventoryTest(unittest.TestCase):
 
         self.assertEqual(l2c.level_from_cpm(0.79030001), 40.0)
         self.assertEqual(l2c.level_from_cpm(0.7903), 40.0)
+        self.assertEqual(l2c.level_from_cpm(0.094), 1.0)
+        self.assertEqual(l2c.level_from_cpm(0.7875), 39.5)
+        self.assertRaises(ValueError, l2c.level_from_cpm, 0.9)
+
+        levels = [1, 12.5, 17.5, 40]
+        cpms = l2c.cp_multipliers_for(levels)
+        self.assertEqual(list(cpms), [l2c.cp_multiplier_for(level) for level in levels])
+        self.assertEqual(list(l2c.levels_from_cpms(cpms + 1e-4)), levels)
+        self.assertRaises(ValueError, l2c.cp_multipliers_for, [12.25])
+        self.assertRaises(ValueError, l2c.levels_from_cpms, [0.01, 0.5])
+
+    def test_static_data_is_built_under_the_lock_and_published_last(self):
+        built = {name: LevelToCPm.__dict__[name] for name in LevelToCPm.STATIC_ATTRIBUTES}
+        for name in built:
+            delattr(LevelToCPm, name)
+        self.addCleanup(lambda: [setattr(LevelToCPm, name, value) for name, value in built.items()])
+        seen = []
+
+        def load(name):
+            seen.append((LevelToCPm._static_data_lock.locked(), 'STATIC_DATA' in LevelToCPm.__dict__))
+            return built['STATIC_DATA']
+
+        with patch('pokemongo_bot.inventory.static_data.load', side_effect=load):
+            self.assertEqual(LevelToCPm.level_from_cpm(0.094), 1.0)
+            LevelToCPm.init_static_data()
+
+        self.assertEqual(seen, [(True, False)])
+        self.assertFalse(LevelToCPm._static_data_lock.locked())
 
     def test_attacks(self):
         self._test_attacks(fast_attacks, FastAttacks)
@@ -213,3 +262,117 @@ class InventoryTest(unittest.TestCase):
             assert (attack in clazz.list_for_type(attack.type.name))
             self.assertIsInstance(attack, ChargedAttack if charged else Attack)
             prev_dps = attack.dps
+
+
+def inventory_response(inventory_items, new_timestamp_ms, original_timestamp_ms=None):
+    inventory_delta = {'inventory_items': inventory_items, 'new_timestamp_ms': new_timestamp_ms}
+    if original_timestamp_ms:
+        inventory_delta['original_timestamp_ms'] = original_timestamp_ms
+    return {'responses': {'GET_INVENTORY': {'inventory_delta': inventory_delta}}}
+
+
+def inventory_item(item_type, **data):
+    return {'inventory_item_data': {item_type: data}}
+
+
+class InventoryDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.bot.api.get_inventory.return_value = inventory_response([
+            inventory_item('item', item_id=1, count=20),
+            inventory_item('item', item_id=2, count=5),
+            inventory_item('candy', family_id=1, candy=3),
+            inventory_item('pokemon_data', id=11, is_egg=True, egg_km_walked_target=5.0),
+            inventory_item('pokemon_data', id=12, is_egg=True, egg_km_walked_target=2.0),
+        ], new_timestamp_ms=1000)
+        self.inventory = Inventory(self.bot)
+
+    def test_only_the_changes_are_applied(self):
+        egg = self.inventory.pokemons.get(12)
+        self.bot.api.get_inventory.return_value = inventory_response([
+            inventory_item('item', item_id=1, count=19),
+            inventory_item('candy', family_id=4, candy=1),
+            {'deleted_item': {'pokemon_id': 11}},
+        ], new_timestamp_ms=2000, original_timestamp_ms=1000)
+        version = self.inventory.version
+
+        self.inventory.refresh()
+
+        self.bot.api.get_inventory.assert_called_with(last_timestamp_ms=1000)
+        self.assertEqual(self.inventory.last_timestamp_ms, 2000)
+        self.assertEqual(self.inventory.items.get(1).count, 19)
+        self.assertEqual(self.inventory.items.get(2).count, 5)
+        self.assertEqual(self.inventory.candy.get(4).quantity, 1)
+        self.assertIsNone(self.inventory.pokemons.get(11))
+        self.assertIs(self.inventory.pokemons.get(12), egg)
+        self.assertEqual(len(self.inventory.inventory_items), 5)
+        self.assertGreater(self.inventory.version, version)
+
+    def test_empty_delta_keeps_the_inventory(self):
+        self.bot.api.get_inventory.return_value = inventory_response([], new_timestamp_ms=3000,
+                                                                     original_timestamp_ms=1000)
+        version = self.inventory.version
+
+        self.inventory.refresh()
+
+        self.assertEqual(self.inventory.version, version)
+        self.assertEqual(self.inventory.last_timestamp_ms, 3000)
+        self.assertEqual(len(self.inventory.inventory_items), 5)
+
+    def test_full_answer_replaces_the_inventory(self):
+        self.bot.api.get_inventory.return_value = inventory_response([
+            inventory_item('item', item_id=1, count=7),
+        ], new_timestamp_ms=4000)
+
+        self.inventory.refresh()
+
+        self.assertEqual(self.inventory.items.get(1).count, 7)
+        self.assertEqual(self.inventory.items.get(2).count, 0)
+        self.assertIsNone(self.inventory.pokemons.get(12))
+
+
+class PokemonsIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.bag = random_pokemons(60)
+        self.bag[0]['favorite'] = 1
+        self.bag[1]['deployed_fort_id'] = 'fort'
+        self.pokemons = Pokemons()
+        self.pokemons.refresh([inventory_item('pokemon_data', **data) for data in self.bag])
+
+    def assertIndexed(self):
+        everything = self.pokemons.all()
+        for pokemon_id, group in self.pokemons.groups('pokemon_id').iteritems():
+            self.assertItemsEqual(group, [p for p in everything if p.pokemon_id == pokemon_id])
+        for family_id, group in self.pokemons.groups('family_id').iteritems():
+            self.assertItemsEqual(group, self.pokemons.in_family(family_id))
+            self.assertItemsEqual(group, [p for p in everything if p.family_id == family_id])
+        self.assertItemsEqual(self.pokemons.favorites(), [p for p in everything if p.is_favorite])
+        self.assertItemsEqual(self.pokemons.deployed(), [p for p in everything if p.in_fort])
+        for stat in Pokemons.SORTED_STATS:
+            self.assertEqual([getattr(p, stat) for p in self.pokemons.sorted_by(stat)],
+                             sorted([getattr(p, stat) for p in everything], reverse=True))
+
+    def test_queries_match_the_bag(self):
+        self.assertIndexed()
+
+        groups = self.pokemons.groups('pokemon_id', exclude=('favorite', 'deployed'))
+
+        self.assertEqual(sum(len(group) for group in groups.values()), 58)
+        self.assertNotIn(self.pokemons.get(self.bag[0]['id']), groups.get(self.bag[0]['pokemon_id'], []))
+
+    def test_indexes_follow_changes(self):
+        self.pokemons.sorted_by('iv')
+        removed = self.pokemons.get(self.bag[2]['id'])
+
+        self.pokemons.remove(removed.unique_id)
+        self.pokemons.add(Pokemon(self.bag[2]))
+        self.pokemons.remove(self.bag[3]['id'])
+        self.pokemons.apply_delta([
+            inventory_item('pokemon_data', **dict(self.bag[4], favorite=1)),
+            {'deleted_item': {'pokemon_id': self.bag[5]['id']}},
+        ])
+
+        self.assertNotIn(removed, self.pokemons.with_pokemon_id(removed.pokemon_id))
+        self.assertIn(self.bag[4]['id'], [p.unique_id for p in self.pokemons.favorites()])
+        self.assertEqual(len(self.pokemons.sorted_by('iv')), 58)
+        self.assertIndexed()
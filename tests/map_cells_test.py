@@ -0,0 +1,54 @@
+import unittest
+
+from pokemongo_bot.map_cells import MapCellStore
+
+FORT_A = {'id': 'a', 'latitude': 1, 'longitude': 1}
+FORT_B = {'id': 'b', 'latitude': 2, 'longitude': 2}
+POKEMON = {'encounter_id': 1, 'pokemon_id': 16}
+
+
+class MapCellStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = MapCellStore()
+        self.store.update([{
+            's2_cell_id': 1,
+            'current_timestamp_ms': 1000,
+            'forts': [FORT_A, FORT_B],
+            'catchable_pokemons': [POKEMON],
+        }])
+
+    def test_timestamps(self):
+        self.assertEqual(self.store.timestamps([1, 2]), [1000, 0])
+
+    def test_deltas_are_merged(self):
+        moved_fort = dict(FORT_B, latitude=3)
+        self.store.update([{
+            's2_cell_id': 1,
+            'current_timestamp_ms': 2000,
+            'forts': [moved_fort],
+            'deleted_objects': ['a'],
+        }])
+
+        cell, = self.store.cells([1, 2])
+        self.assertEqual(cell['forts'], [moved_fort])
+        self.assertEqual(cell['catchable_pokemons'], [])
+        self.assertEqual(self.store.timestamps([1]), [2000])
+
+    def test_unchanged_forts_are_kept(self):
+        self.store.update([{'s2_cell_id': 1, 'current_timestamp_ms': 2000, 'wild_pokemons': [POKEMON]}])
+
+        cell, = self.store.cells([1])
+        self.assertEqual(cell['forts'], [FORT_A, FORT_B])
+        self.assertEqual(cell['wild_pokemons'], [POKEMON])
+
+    def test_returned_lists_are_copies(self):
+        self.store.cells([1])[0]['catchable_pokemons'].pop()
+        self.assertEqual(self.store.cells([1])[0]['catchable_pokemons'], [POKEMON])
+
+    def test_least_recently_updated_cells_are_dropped(self):
+        store = MapCellStore(max_cells=2)
+        for cell_id in range(3):
+            store.update([{'s2_cell_id': cell_id, 'current_timestamp_ms': 1}])
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.timestamps([0, 1, 2]), [0, 1, 1])
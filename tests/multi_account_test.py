@@ -0,0 +1,135 @@
+import unittest
+from argparse import Namespace
+from mock import MagicMock, patch
+
+from pgoapi.exceptions import NotLoggedInException
+
+from pokemongo_bot.api_wrapper import PermaBannedException, CircuitOpenException
+from pokemongo_bot.multi_account import MultiAccountRunner, SharedState, account_configs
+
+
+def make_config(**kwargs):
+    config = Namespace(
+        username=None,
+        password=None,
+        accounts=[],
+        raw_tasks=[],
+        websocket_start_embedded_server=True,
+        reconnecting_timeout=15,
+        forts_details_cache_size=10,
+        forts_details_cache_ttl=60,
+        forts_details_retry_delay=60,
+        api_async_workers=0,
+        api_max_retries=3,
+        api_retry_base_delay=1,
+        api_retry_max_delay=30,
+        api_breaker_failed_calls=2,
+        api_breaker_reset_timeout=60
+    )
+    config.__dict__.update(kwargs)
+    return config
+
+
+class SharedStateTest(unittest.TestCase):
+    @patch('pokemongo_bot.multi_account.SocketIO')
+    def test_one_websocket_client_per_server(self, socketio):
+        shared = SharedState(make_config())
+
+        self.assertIs(shared.socketio_client('localhost:4000'), shared.socketio_client('localhost:4000'))
+        socketio.assert_called_once_with('localhost', 4000)
+
+
+class AccountConfigsTest(unittest.TestCase):
+    def test_account_settings_override_the_shared_ones(self):
+        config = make_config(location='here', raw_tasks=[{'type': 'MoveToFort'}], accounts=[
+            {'username': 'a', 'password': 'pa'},
+            {'username': 'b', 'password': 'pb', 'location': 'there', 'forts.details_cache_size': 5}
+        ])
+
+        first, second = account_configs(config)
+
+        self.assertEqual((first.username, first.location), ('a', 'here'))
+        self.assertEqual((second.username, second.location), ('b', 'there'))
+        self.assertEqual(second.forts_details_cache_size, 5)
+        self.assertTrue(first.websocket_start_embedded_server)
+        self.assertFalse(second.websocket_start_embedded_server)
+        self.assertIsNot(first.raw_tasks, second.raw_tasks)
+
+
+@patch('pokemongo_bot.multi_account.TreeConfigBuilder')
+class MultiAccountRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.configs = [make_config(username='a'), make_config(username='b')]
+        self.bots = {}
+
+        def bot_factory(config, shared, circuit_breakers):
+            bot = MagicMock(tick_count=1)
+            bot.shared = shared
+            bot.circuit_breakers = circuit_breakers
+            self.bots[config.username] = bot
+            return bot
+        self.runner = MultiAccountRunner(self.configs, bot_factory)
+
+    def test_bots_tick_in_turn_and_share_state(self, tree_config_builder):
+        self.runner.tick()
+        self.runner.tick()
+
+        for bot in self.bots.values():
+            self.assertEqual(bot.tick.call_count, 2)
+            self.assertEqual(bot.activate.call_count, 2)
+            self.assertIs(bot.shared, self.runner.shared)
+
+    def test_failing_bots_are_paused(self, tree_config_builder):
+        self.runner.tick()
+        failing = self.bots['a']
+        failing.tick.side_effect = NotLoggedInException()
+        self.runner.tick()
+        self.runner.tick()
+
+        self.assertEqual(failing.tick.call_count, 2)
+        failing.save_snapshot.assert_called_once_with(background=False)
+        self.assertEqual(self.bots['b'].tick.call_count, 3)
+        self.assertEqual(self.runner.bots(), [self.bots['b']])
+
+    def test_unexpected_errors_pause_the_account(self, tree_config_builder):
+        self.runner.tick()
+        failing = self.bots['a']
+        failing.tick.side_effect = ValueError()
+        failing.save_snapshot.side_effect = IOError()
+        self.runner.tick()
+        self.runner.tick()
+
+        self.assertEqual(failing.tick.call_count, 2)
+        self.assertEqual(self.bots['b'].tick.call_count, 3)
+        self.assertEqual(self.runner.bots(), [self.bots['b']])
+
+    def test_open_breakers_keep_the_session(self, tree_config_builder):
+        self.runner.tick()
+        waiting = self.bots['a']
+        waiting.tick.side_effect = CircuitOpenException(['GET_MAP_OBJECTS'], 30)
+        self.runner.tick()
+        self.runner.tick()
+
+        self.assertEqual(waiting.tick.call_count, 2)
+        waiting.save_snapshot.assert_not_called()
+        self.assertIs(self.runner.accounts[0].bot, waiting)
+        self.assertIs(waiting.circuit_breakers, self.runner.accounts[0].circuit_breakers)
+        self.assertEqual(self.bots['b'].tick.call_count, 3)
+
+    def test_banned_accounts_are_dropped(self, tree_config_builder):
+        self.runner.tick()
+        self.bots['b'].tick.side_effect = PermaBannedException()
+        self.runner.tick()
+
+        self.assertEqual([account.config.username for account in self.runner.accounts], ['a'])
+
+    def test_reloaded_configs_reach_running_and_paused_bots(self, tree_config_builder):
+        self.runner.tick()
+        self.bots['b'].tick.side_effect = NotLoggedInException()
+        self.runner.tick()
+        configs = [make_config(username='a', daily_catch_limit=10), make_config(username='b', daily_catch_limit=10)]
+
+        self.runner.reload_config(configs)
+
+        self.bots['a'].reload_config.assert_called_once_with(configs[0])
+        self.assertIs(self.runner.accounts[1].config, configs[1])
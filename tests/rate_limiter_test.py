@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+
+from pokemongo_bot import clock
+from pokemongo_bot.clock import VirtualClock
+from pokemongo_bot.rate_limiter import RateLimiter, TokenBucket, CRITICAL, NORMAL, BACKGROUND
+
+
+class ClockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.real_clock = clock.get_clock()
+        self.clock = VirtualClock(start=100.0)
+        clock.set_clock(self.clock)
+
+    def tearDown(self):
+        clock.set_clock(self.real_clock)
+
+
+class TokenBucketTest(ClockTestCase):
+    def test_take(self):
+        bucket = TokenBucket(rate=2, capacity=1)
+
+        self.assertEqual(bucket.time_until_available(), 0)
+        bucket.take()
+        self.assertAlmostEqual(bucket.time_until_available(), 0.5)
+        self.clock.now = 100.25
+        self.assertAlmostEqual(bucket.time_until_available(), 0.25)
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+        self.clock.now = 1000.0
+
+        for i in range(3):
+            self.assertEqual(bucket.time_until_available(), 0)
+            bucket.take()
+        self.assertAlmostEqual(bucket.time_until_available(), 0.5)
+
+
+class RateLimiterTest(ClockTestCase):
+    def test_request_type_rate(self):
+        limiter = RateLimiter(requests_per_second=10, request_rates={'get_map_objects': 1})
+
+        self.assertEqual(limiter.wait(['GET_MAP_OBJECTS']), 0)
+        self.clock.now = 100.5
+        self.assertAlmostEqual(limiter.wait(['GET_MAP_OBJECTS']), 0.5)
+        self.assertAlmostEqual(self.clock.slept, 0.5)
+        # other request types are only bound by the global rate
+        self.clock.now = 102.0
+        self.assertEqual(limiter.wait(['GET_INVENTORY']), 0)
+
+    def test_adapts_to_throttling(self):
+        limiter = RateLimiter(requests_per_second=2, min_requests_per_second=0.5)
+
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 1)
+        limiter.throttled()
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 0.5)
+
+        for i in range(100):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 2)
+
+    def test_priorities(self):
+        limiter = RateLimiter(request_priorities={'get_inventory': 'background'})
+
+        self.assertEqual(limiter.priority_of(['CATCH_POKEMON']), CRITICAL)
+        self.assertEqual(limiter.priority_of(['GET_MAP_OBJECTS']), NORMAL)
+        self.assertEqual(limiter.priority_of(['GET_INVENTORY']), BACKGROUND)
+        self.assertEqual(limiter.priority_of(['GET_INVENTORY', 'ENCOUNTER']), CRITICAL)
+
+    def test_waiting_requests_age(self):
+        limiter = RateLimiter(starvation_timeout=10)
+        background = (BACKGROUND, 0, 100.0)
+        normal = (NORMAL, 1, 105.0)
+        limiter._waiting = [background, normal]
+        self.assertIs(limiter._head(105.0), normal)
+
+        # after waiting 15s the background request goes before new normal requests
+        normal = (NORMAL, 1, 115.0)
+        limiter._waiting = [background, normal]
+        self.assertIs(limiter._head(115.0), background)
+
+
+class RateLimiterThreadTest(unittest.TestCase):
+    def test_critical_requests_jump_the_queue(self):
+        limiter = RateLimiter(requests_per_second=5)
+        limiter.wait()
+        served = []
+
+        def wait(request_type):
+            limiter.wait([request_type])
+            served.append(request_type)
+
+        threads = [threading.Thread(target=wait, args=(t,)) for t in ('RELEASE_POKEMON', 'CATCH_POKEMON')]
+        threads[0].start()
+        time.sleep(0.05)
+        threads[1].start()
+        for thread in threads:
+            thread.join(2)
+
+        self.assertEqual(served, ['CATCH_POKEMON', 'RELEASE_POKEMON'])
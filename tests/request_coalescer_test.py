@@ -0,0 +1,85 @@
+import unittest
+from mock import MagicMock
+
+from tests import FakeApi
+from pokemongo_bot.rate_limiter import RateLimiter
+from pokemongo_bot.request_coalescer import RequestCoalescer
+
+PLAYER_AND_INVENTORY = {
+    'responses': {'GET_PLAYER': {'player_data': {}}, 'GET_INVENTORY': {'inventory_delta': {}}},
+    'status_code': 1
+}
+
+
+class RequestCoalescerTest(unittest.TestCase):
+    def test_lookup_needs_every_part(self):
+        coalescer = RequestCoalescer()
+        coalescer.store(PLAYER_AND_INVENTORY)
+
+        result = coalescer.lookup(['GET_INVENTORY'])
+        self.assertEqual(result, {'responses': {'GET_INVENTORY': {'inventory_delta': {}}}, 'status_code': 1})
+        self.assertIsNone(coalescer.lookup(['GET_INVENTORY', 'DOWNLOAD_SETTINGS']))
+        self.assertEqual(coalescer.coalesced_calls, 1)
+
+    def test_expected_requests_come_from_previous_window(self):
+        coalescer = RequestCoalescer()
+        coalescer.lookup(['GET_PLAYER', 'DOWNLOAD_SETTINGS'])
+        coalescer.lookup(['GET_INVENTORY'])
+        self.assertEqual(coalescer.extra_requests(['GET_INVENTORY']), [])
+
+        coalescer.new_window()
+        self.assertEqual(coalescer.extra_requests(['GET_INVENTORY']), ['DOWNLOAD_SETTINGS', 'GET_PLAYER'])
+
+    def test_one_shot_requests_are_never_sent_along(self):
+        coalescer = RequestCoalescer()
+        coalescer.lookup(['GET_PLAYER', 'CHECK_AWARDED_BADGES', 'GET_HATCHED_EGGS'])
+        coalescer.new_window()
+
+        self.assertEqual(coalescer.extra_requests(['GET_INVENTORY']), ['GET_PLAYER'])
+
+    def test_new_window_and_invalidate_drop_responses(self):
+        coalescer = RequestCoalescer()
+        coalescer.store(PLAYER_AND_INVENTORY)
+        coalescer.new_window()
+        self.assertIsNone(coalescer.lookup(['GET_PLAYER']))
+
+        coalescer.store(PLAYER_AND_INVENTORY)
+        coalescer.invalidate()
+        self.assertIsNone(coalescer.lookup(['GET_PLAYER']))
+
+    def test_api_requests_are_coalesced(self):
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+        api.coalescer.lookup(['GET_PLAYER'])
+        api.coalescer.new_window()
+
+        request = api.create_request(PLAYER_AND_INVENTORY)
+        request.get_inventory()
+        self.assertEqual(request.call(), PLAYER_AND_INVENTORY)
+        # GET_PLAYER was requested last tick, so it was sent along
+        self.assertEqual(len(request._req_method_list), 2)
+
+        request = api.create_request()
+        request._call = MagicMock()
+        request.get_player()
+        self.assertEqual(request.call()['responses'], {'GET_PLAYER': {'player_data': {}}})
+        request._call.assert_not_called()
+
+    def test_write_request_invalidates(self):
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+        api.coalescer.store(PLAYER_AND_INVENTORY)
+
+        request = api.create_request({'responses': {'RECYCLE_INVENTORY_ITEM': {}}, 'status_code': 1})
+        request.recycle_inventory_item(item_id=1, count=1)
+        request.call()
+
+        self.assertIsNone(api.coalescer.lookup(['GET_INVENTORY']))
+        self.assertIsNotNone(api.coalescer.lookup(['GET_PLAYER']))
+
+    def test_unknown_write_request_invalidates_everything(self):
+        coalescer = RequestCoalescer()
+        coalescer.store(PLAYER_AND_INVENTORY)
+        coalescer.invalidate(['GET_MAP_OBJECTS'])
+        self.assertIsNotNone(coalescer.lookup(['GET_PLAYER']))
+
+        coalescer.invalidate(['SET_PLAYER_TEAM'])
+        self.assertIsNone(coalescer.lookup(['GET_PLAYER']))
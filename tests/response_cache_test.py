@@ -0,0 +1,102 @@
+import unittest
+from mock import MagicMock, patch
+
+from tests import FakeApi
+from pokemongo_bot.rate_limiter import RateLimiter
+from pokemongo_bot.response_cache import ResponseCache
+
+PLAYER_AND_INVENTORY = {
+    'responses': {'GET_PLAYER': {'player_data': {}}, 'GET_INVENTORY': {'inventory_delta': {}}},
+    'status_code': 1
+}
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_get_needs_every_part(self):
+        cache = ResponseCache()
+        cache.put([('GET_PLAYER', {}), ('GET_INVENTORY', {})], PLAYER_AND_INVENTORY)
+
+        self.assertEqual(cache.get([('GET_PLAYER', {}), ('GET_INVENTORY', {})]), PLAYER_AND_INVENTORY)
+        self.assertEqual(cache.get([('GET_INVENTORY', {})])['responses'], {'GET_INVENTORY': {'inventory_delta': {}}})
+        self.assertIsNone(cache.get([('DOWNLOAD_SETTINGS', {})]))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_uncacheable_requests_are_not_counted(self):
+        cache = ResponseCache()
+        self.assertIsNone(cache.get([('GET_PLAYER', {}), ('GET_MAP_OBJECTS', {})]))
+        self.assertEqual(cache.misses, 0)
+
+    def test_fort_details_is_left_to_the_fort_cache(self):
+        self.assertFalse(ResponseCache().is_cacheable('FORT_DETAILS'))
+
+    def test_entries_are_keyed_by_params(self):
+        cache = ResponseCache(ttl={'FORT_DETAILS': 60})
+        cache.put([('FORT_DETAILS', {'fort_id': 'a'})], {'responses': {'FORT_DETAILS': {'name': 'A'}}})
+
+        self.assertEqual(cache.get([('FORT_DETAILS', {'fort_id': 'a'})])['responses']['FORT_DETAILS'], {'name': 'A'})
+        self.assertIsNone(cache.get([('FORT_DETAILS', {'fort_id': 'b'})]))
+
+    @patch('pokemongo_bot.response_cache.clock')
+    def test_entries_expire(self, mock_clock):
+        cache = ResponseCache(ttl={'get_inventory': 5})
+        mock_clock.now.return_value = 100
+        cache.put([('GET_INVENTORY', {})], PLAYER_AND_INVENTORY)
+
+        mock_clock.now.return_value = 105
+        self.assertIsNotNone(cache.get([('GET_INVENTORY', {})]))
+        mock_clock.now.return_value = 106
+        self.assertIsNone(cache.get([('GET_INVENTORY', {})]))
+
+    @patch('pokemongo_bot.response_cache.clock')
+    def test_put_purges_expired_entries(self, mock_clock):
+        cache = ResponseCache(ttl={'GET_INVENTORY': 5})
+        mock_clock.now.return_value = 100
+        cache.put([('GET_INVENTORY', {})], PLAYER_AND_INVENTORY)
+
+        mock_clock.now.return_value = 200
+        cache.put([('GET_PLAYER', {})], PLAYER_AND_INVENTORY)
+        self.assertEqual([k[0] for k in cache._entries], ['GET_PLAYER'])
+
+    def test_zero_ttl_disables_caching(self):
+        cache = ResponseCache(ttl={'GET_PLAYER': 0})
+        cache.put([('GET_PLAYER', {})], PLAYER_AND_INVENTORY)
+        self.assertIsNone(cache.get([('GET_PLAYER', {})]))
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        cache.put([('GET_PLAYER', {}), ('GET_INVENTORY', {})], PLAYER_AND_INVENTORY)
+
+        cache.invalidate(['GET_MAP_OBJECTS'])
+        self.assertIsNotNone(cache.get([('GET_INVENTORY', {})]))
+
+        cache.invalidate(['RECYCLE_INVENTORY_ITEM'])
+        self.assertIsNone(cache.get([('GET_INVENTORY', {})]))
+        self.assertIsNotNone(cache.get([('GET_PLAYER', {})]))
+
+        # unknown writes drop everything
+        cache.invalidate(['SET_PLAYER_TEAM'])
+        self.assertIsNone(cache.get([('GET_PLAYER', {})]))
+
+    def test_api_serves_cached_responses(self):
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+
+        request = api.create_request({'responses': {'GET_PLAYER': {'player_data': {}}}, 'status_code': 1})
+        request.get_player()
+        request.call()
+
+        request = api.create_request()
+        request._call = MagicMock()
+        request.get_player()
+        self.assertEqual(request.call()['responses'], {'GET_PLAYER': {'player_data': {}}})
+        request._call.assert_not_called()
+        self.assertEqual(api.response_cache.hits, 1)
+
+    def test_api_write_invalidates(self):
+        api = FakeApi(rate_limiter=RateLimiter(requests_per_second=100))
+        api.response_cache.put([('GET_INVENTORY', {})], PLAYER_AND_INVENTORY)
+
+        request = api.create_request({'responses': {'RECYCLE_INVENTORY_ITEM': {}}, 'status_code': 1})
+        request.recycle_inventory_item(item_id=1, count=1)
+        request.call()
+
+        self.assertIsNone(api.response_cache.get([('GET_INVENTORY', {})]))
@@ -0,0 +1,141 @@
+import unittest
+from argparse import Namespace
+from mock import patch
+
+from tests import FakeApi
+from pokemongo_bot.api_wrapper import CircuitOpenException
+from pokemongo_bot.rate_limiter import RateLimiter
+from pokemongo_bot.retry_policy import RetryPolicy, CircuitBreaker, CircuitBreakers, circuit_breakers_for
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_delays_stay_within_bounds(self):
+        policy = RetryPolicy(base_delay=1, max_delay=10)
+        delay = None
+        for i in range(100):
+            previous = delay
+            delay = policy.next_delay(delay)
+            self.assertGreaterEqual(delay, 1)
+            self.assertLessEqual(delay, min(10, 3 * max(previous, 1)))
+
+    @patch('pokemongo_bot.retry_policy.random')
+    def test_delays_grow_up_to_the_cap(self, mock_random):
+        mock_random.uniform.side_effect = lambda low, high: high
+        policy = RetryPolicy(base_delay=1, max_delay=10)
+
+        self.assertEqual(policy.next_delay(), 3)
+        self.assertEqual(policy.next_delay(3), 9)
+        self.assertEqual(policy.next_delay(9), 10)
+
+
+@patch('pokemongo_bot.retry_policy.clock')
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self, mock_clock):
+        mock_clock.now.return_value = 0
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+        self.assertFalse(breaker.allow_request())
+        self.assertEqual(breaker.retry_after(), 60)
+
+    def test_half_open_allows_one_trial(self, mock_clock):
+        mock_clock.now.return_value = 0
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+
+        mock_clock.now.return_value = 60
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+
+        mock_clock.now.return_value = 120
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow_request())
+
+    def test_retry_after_covers_a_running_trial(self, mock_clock):
+        mock_clock.now.return_value = 0
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+
+        mock_clock.now.return_value = 60
+        self.assertEqual(breaker.retry_after(), 0)
+        self.assertTrue(breaker.allow_request())
+        mock_clock.now.return_value = 70
+        self.assertEqual(breaker.retry_after(), 50)
+
+    def test_refused_requests_give_back_their_trials(self, mock_clock):
+        mock_clock.now.return_value = 0
+        breakers = CircuitBreakers(failure_threshold=1, reset_timeout=60)
+        breakers.record_failure(['GET_INVENTORY', 'FORT_SEARCH'])
+        mock_clock.now.return_value = 60
+        self.assertTrue(breakers.allow_request(['FORT_SEARCH']))
+
+        self.assertFalse(breakers.allow_request(['GET_INVENTORY', 'FORT_SEARCH']))
+        self.assertEqual(breakers.retry_after(['GET_INVENTORY', 'FORT_SEARCH']), 60)
+        self.assertTrue(breakers.allow_request(['GET_INVENTORY']))
+
+    def test_threshold_counts_requests_that_used_up_their_retries(self, mock_clock):
+        config = Namespace(api_breaker_failed_calls=2, api_max_retries=15, api_breaker_reset_timeout=60)
+
+        self.assertEqual(circuit_breakers_for(config).failure_threshold, 30)
+
+    def test_breakers_are_per_request_type(self, mock_clock):
+        mock_clock.now.return_value = 0
+        breakers = CircuitBreakers(failure_threshold=1)
+        breakers.record_failure(['FORT_SEARCH'])
+
+        self.assertTrue(breakers.is_open('fort_search'))
+        self.assertFalse(breakers.is_open('GET_INVENTORY'))
+        self.assertFalse(breakers.allow_request(['GET_INVENTORY', 'FORT_SEARCH']))
+        self.assertTrue(breakers.allow_request(['GET_INVENTORY']))
+
+
+class ApiRetryTest(unittest.TestCase):
+    def create_api(self, **kwargs):
+        return FakeApi(
+            rate_limiter=RateLimiter(requests_per_second=100),
+            circuit_breakers=CircuitBreakers(**kwargs)
+        )
+
+    @patch('pokemongo_bot.api_wrapper.sleep')
+    def test_retries_back_off(self, sleep):
+        api = self.create_api(failure_threshold=10)
+        request = api.create_request()
+        request._call.side_effect = ['wrong', 'wrong', 'wrong', {'responses': {'GET_PLAYER': {}}, 'status_code': 1}]
+        request.get_player()
+
+        self.assertEqual(request.call()['responses'], {'GET_PLAYER': {}})
+        self.assertEqual(sleep.call_count, 3)
+        for args, kwargs in sleep.call_args_list:
+            self.assertGreaterEqual(args[0], api.retry_policy.base_delay)
+            self.assertLessEqual(args[0], api.retry_policy.max_delay)
+
+    @patch('pokemongo_bot.api_wrapper.sleep')
+    def test_open_breaker_stops_retries(self, sleep):
+        api = self.create_api(failure_threshold=3)
+        request = api.create_request('wrong')
+        request.fort_search()
+
+        with self.assertRaises(CircuitOpenException):
+            request.call()
+        self.assertEqual(request._call.call_count, 3)
+        self.assertTrue(api.circuit_breakers.is_open('FORT_SEARCH'))
+
+        request = api.create_request({'responses': {'FORT_SEARCH': {}}, 'status_code': 1})
+        request.fort_search()
+        with self.assertRaises(CircuitOpenException):
+            request.call()
+        request._call.assert_not_called()
@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from pokemongo_bot.map_cells import MapCellStore
+from pokemongo_bot.snapshot import SnapshotWriter, load_snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'snapshot.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        map_cells = MapCellStore()
+        map_cells.update([{'s2_cell_id': 1, 'current_timestamp_ms': 1000, 'forts': [{'id': 'a'}]}])
+        writer = SnapshotWriter(self.path)
+
+        self.assertTrue(writer.save({'fort_timeouts': {'a': 1}, 'map_cells': map_cells}))
+        writer.wait()
+
+        state = load_snapshot(self.path)
+        self.assertEqual(state['fort_timeouts'], {'a': 1})
+        self.assertEqual(state['map_cells'].timestamps([1]), [1000])
+        self.assertEqual(os.listdir(self.directory), ['snapshot.bin'])
+
+    def test_old_snapshots_are_ignored(self):
+        with patch('pokemongo_bot.snapshot.time') as mock_time:
+            mock_time.time.return_value = 100
+            SnapshotWriter(self.path).save({}, background=False)
+
+            mock_time.time.return_value = 200
+            self.assertIsNotNone(load_snapshot(self.path, max_age=150))
+            self.assertIsNone(load_snapshot(self.path, max_age=50))
+
+    def test_missing_or_corrupt_snapshots_are_ignored(self):
+        self.assertIsNone(load_snapshot(self.path))
+
+        with open(self.path, 'wb') as f:
+            f.write('garbage')
+        self.assertIsNone(load_snapshot(self.path))
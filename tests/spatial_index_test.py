@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from pokemongo_bot.cell_workers.utils import distance
+from pokemongo_bot.spatial_index import SpatialIndex
+
+LAT, LNG = 40.7665, -73.9771
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(42)
+        self.forts = [
+            {'id': i, 'latitude': LAT + rand.uniform(-0.02, 0.02), 'longitude': LNG + rand.uniform(-0.02, 0.02)}
+            for i in range(500)
+        ]
+        self.index = SpatialIndex(self.forts)
+
+    def sorted_forts(self, lat, lng):
+        return sorted(self.forts, key=lambda f: distance(lat, lng, f['latitude'], f['longitude']))
+
+    def test_nearest_matches_sorting(self):
+        for lat, lng in [(LAT, LNG), (LAT + 0.015, LNG - 0.01), (LAT + 0.1, LNG)]:
+            expected = self.sorted_forts(lat, lng)
+            self.assertEqual(self.index.nearest(lat, lng, k=5), expected[:5])
+            self.assertEqual(self.index.nearest(lat, lng), expected)
+
+    def test_within(self):
+        expected = [f for f in self.sorted_forts(LAT, LNG)
+                    if distance(LAT, LNG, f['latitude'], f['longitude']) <= 300]
+
+        self.assertTrue(expected)
+        self.assertEqual(self.index.within(LAT, LNG, 300), expected)
+
+    def test_predicate(self):
+        even = self.index.nearest(LAT, LNG, k=3, predicate=lambda f: f['id'] % 2 == 0)
+        self.assertEqual(even, [f for f in self.sorted_forts(LAT, LNG) if f['id'] % 2 == 0][:3])
+
+    def test_remove(self):
+        nearest = self.index.nearest(LAT, LNG, k=1)[0]
+        self.index.remove(nearest)
+
+        self.assertEqual(len(self.index), 499)
+        self.assertNotEqual(self.index.nearest(LAT, LNG, k=1)[0], nearest)
+        with self.assertRaises(ValueError):
+            self.index.remove(nearest)
+
+    def test_empty(self):
+        self.assertEqual(SpatialIndex().nearest(LAT, LNG, k=1), [])
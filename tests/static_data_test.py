@@ -0,0 +1,37 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pokemongo_bot import static_data
+from pokemongo_bot.base_dir import _base_dir
+
+
+class StaticDataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        for name in static_data.DATA_FILES:
+            shutil.copy(os.path.join(_base_dir, 'data', name), self.data_dir)
+        self.path = os.path.join(self.data_dir, 'static_data.cache')
+
+    def test_cache_holds_the_parsed_files(self):
+        compiled = static_data.compile_cache(self.path, self.data_dir)
+
+        self.assertEqual(static_data.read_cache(self.path, self.data_dir), compiled)
+        self.assertEqual(compiled, static_data.parse_sources(self.data_dir))
+
+    def test_cache_is_stale_once_a_file_changed(self):
+        static_data.compile_cache(self.path, self.data_dir)
+        with open(os.path.join(self.data_dir, 'items.json'), 'w') as f:
+            f.write('{"1": "Poke Ball"}')
+
+        self.assertIsNone(static_data.read_cache(self.path, self.data_dir))
+
+    def test_corrupt_or_missing_cache_is_ignored(self):
+        self.assertIsNone(static_data.read_cache(self.path, self.data_dir))
+
+        with open(self.path, 'wb') as f:
+            f.write('not a cache')
+
+        self.assertIsNone(static_data.read_cache(self.path, self.data_dir))
@@ -0,0 +1,130 @@
+import time
+import unittest
+from mock import MagicMock, patch
+
+from pokemongo_bot.fort_cache import FortCache
+from pokemongo_bot.supervisor import FleetMetrics, Supervisor, WorldCacheServer, shard, STABLE_RUN_SECONDS
+from tests.multi_account_test import make_config
+
+
+def summary(username, **kwargs):
+    result = dict.fromkeys(FleetMetrics.TOTALS, 0)
+    result.update(username=username, runtime=10, **kwargs)
+    return result
+
+
+class ShardTest(unittest.TestCase):
+    def test_items_are_dealt_evenly(self):
+        self.assertEqual(shard(range(5), 2), [[0, 2, 4], [1, 3]])
+        self.assertEqual(shard(range(2), 4), [[0], [1]])
+
+
+class FleetMetricsTest(unittest.TestCase):
+    def test_latest_summary_of_each_account_is_counted(self):
+        metrics = FleetMetrics()
+        metrics.update([summary('a', xp_earned=100), summary('b', xp_earned=50, captures=2)])
+        metrics.update([summary('a', xp_earned=300, captures=1)])
+
+        totals = metrics.totals()
+
+        self.assertEqual(totals['accounts'], 2)
+        self.assertEqual(totals['xp_earned'], 350)
+        self.assertEqual(totals['captures'], 3)
+
+    def test_accounts_without_stats_yet_are_ignored(self):
+        metrics = FleetMetrics()
+        metrics.update([summary('a', xp_earned=0, captures=-1)])
+
+        self.assertEqual(metrics.totals()['captures'], 0)
+
+
+class WorldCacheServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = WorldCacheServer(FortCache())
+        self.addCleanup(self.server.close)
+
+    def test_fort_details_are_shared(self):
+        self.assertIsNone(self.server.handle({'method': 'entry', 'fort_id': 'a'}))
+
+        self.server.handle({'method': 'put', 'fort_id': 'a', 'details': {'name': 'A'},
+                            'fetched_at': time.time()})
+        _, details = self.server.handle({'method': 'entry', 'fort_id': 'a'})
+
+        self.assertEqual(details, {'name': 'A'})
+
+    def test_metrics_are_collected(self):
+        self.server.handle({'method': 'report_metrics', 'summaries': [summary('a', xp_earned=5)]})
+        self.server.handle({'method': 'report_metrics', 'summaries': [summary('a', xp_earned=8)]})
+
+        self.assertEqual(self.server.handle({'method': 'metrics'}), [summary('a', xp_earned=8)])
+
+
+class SupervisorTest(unittest.TestCase):
+    def setUp(self):
+        time_patcher = patch('pokemongo_bot.supervisor.time')
+        self.time = time_patcher.start().time
+        self.time.return_value = 0
+        self.addCleanup(time_patcher.stop)
+        configs = [make_config(username=name) for name in 'abc']
+        self.supervisor = Supervisor(configs, MagicMock(), workers=2)
+        self.supervisor.start_worker = MagicMock(side_effect=self.start_worker)
+
+    def start_worker(self, worker):
+        worker.process = MagicMock(exitcode=None)
+        worker.process.is_alive.return_value = True
+        worker.started_at = self.time()
+        worker.restart_at = None
+
+    def crash(self, worker, exitcode=1):
+        worker.process.is_alive.return_value = False
+        worker.process.exitcode = exitcode
+
+    def test_crashed_workers_restart_later(self):
+        self.supervisor.check_workers()
+        first, second = self.supervisor.workers
+        self.assertEqual(self.supervisor.start_worker.call_count, 2)
+        self.assertEqual(len(first.configs), 2)
+
+        self.crash(first)
+        self.time.return_value = 10
+        self.supervisor.check_workers()
+        self.assertIsNone(first.process)
+        self.assertGreater(first.restart_at, 10)
+        self.assertEqual(self.supervisor.start_worker.call_count, 2)
+
+        self.time.return_value = first.restart_at
+        self.supervisor.check_workers()
+        self.assertIsNotNone(first.process)
+        self.assertEqual(self.supervisor.start_worker.call_count, 3)
+
+    def test_restart_delay_grows_until_a_worker_is_stable(self):
+        self.supervisor.retry_policy.next_delay = lambda previous: (previous or 1) * 2
+        self.supervisor.check_workers()
+        worker = self.supervisor.workers[0]
+
+        delays = []
+        for _ in xrange(2):
+            self.crash(worker)
+            self.supervisor.check_workers()
+            delays.append(worker.restart_delay)
+            self.time.return_value = worker.restart_at
+            self.supervisor.check_workers()
+        self.assertEqual(delays, [2, 4])
+
+        self.crash(worker)
+        self.time.return_value = worker.started_at + STABLE_RUN_SECONDS
+        self.supervisor.check_workers()
+        self.assertEqual(worker.restart_delay, 2)
+
+    def test_finished_workers_are_not_restarted(self):
+        self.supervisor.check_workers()
+        worker = self.supervisor.workers[1]
+
+        self.crash(worker, exitcode=0)
+        self.time.return_value = 1000
+        self.supervisor.check_workers()
+
+        self.assertIsNone(worker.process)
+        self.assertIsNone(worker.restart_at)
+        self.assertEqual(self.supervisor.start_worker.call_count, 2)
+        self.assertTrue(self.supervisor.running())
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock
+
+from pokemongo_bot import clock
+from pokemongo_bot.api_stats import ApiStats
+from pokemongo_bot.clock import VirtualClock
+from pokemongo_bot.task_profiler import TaskProfiler, format_summary
+from pokemongo_bot.worker_result import WorkerResult
+
+
+class SleepyTask(object):
+    def __init__(self, api_stats):
+        self.api_stats = api_stats
+
+    def work(self):
+        clock.sleep(2)
+        self.api_stats.record_call(('GET_PLAYER', ), 0.1, 0, {})
+        return WorkerResult.SUCCESS
+
+
+class TaskProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.real_clock = clock.get_clock()
+        clock.set_clock(VirtualClock(start=0))
+        self.api_stats = ApiStats()
+        self.profiler = TaskProfiler(window=2)
+        self.profiler.attach(self.api_stats)
+
+    def tearDown(self):
+        self.profiler.detach()
+        clock.set_clock(self.real_clock)
+
+    def test_run(self):
+        task = SleepyTask(self.api_stats)
+        self.assertEqual(self.profiler.run(task), WorkerResult.SUCCESS)
+        self.profiler.run(task)
+
+        name, summary = self.profiler.summary()[0]
+        self.assertEqual(name, 'SleepyTask')
+        self.assertEqual(summary['calls'], 2)
+        self.assertEqual(summary['api_calls_window'], 2)
+        self.assertEqual(summary['sleep_window'], 4)
+        self.assertEqual(summary['results'], {WorkerResult.SUCCESS: 2})
+        self.assertIn('SleepyTask: 2 runs', format_summary(name, summary))
+
+    def test_rolling_window(self):
+        task = MagicMock()
+        for result in (WorkerResult.ERROR, WorkerResult.RUNNING, WorkerResult.SUCCESS):
+            task.work.return_value = result
+            self.profiler.run(task)
+
+        summary = dict(self.profiler.summary())['MagicMock']
+        self.assertEqual(summary['calls'], 3)
+        self.assertEqual(summary['window'], 2)
+        self.assertEqual(summary['results'], {WorkerResult.RUNNING: 1, WorkerResult.SUCCESS: 1})
+
+    def test_activity_outside_of_tasks_is_ignored(self):
+        clock.sleep(5)
+        self.api_stats.record_call(('GET_PLAYER', ), 0.1, 0, {})
+        self.profiler.run(MagicMock())
+
+        summary = dict(self.profiler.summary())['MagicMock']
+        self.assertEqual(summary['api_calls_window'], 0)
+        self.assertEqual(summary['sleep_window'], 0)
+
+    def test_failing_tasks_are_recorded(self):
+        task = MagicMock()
+        task.work.side_effect = ValueError
+        self.assertRaises(ValueError, self.profiler.run, task)
+
+        self.assertEqual(dict(self.profiler.summary())['MagicMock']['results'], {None: 1})
+
+    def test_export_with_cprofile(self):
+        directory = tempfile.mkdtemp()
+        try:
+            profiler = TaskProfiler(cprofile_task='SleepyTask')
+            profiler.run(SleepyTask(self.api_stats))
+            self.assertIn('work', profiler.cprofile_stats())
+
+            profiler.export(os.path.join(directory, 'profile.json'))
+            with open(os.path.join(directory, 'profile.json')) as f:
+                self.assertEqual(json.load(f)['tasks']['SleepyTask']['calls'], 1)
+            self.assertTrue(os.path.exists(os.path.join(directory, 'profile.prof')))
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,100 @@
+import unittest
+from mock import MagicMock, patch
+
+from pokemongo_bot import clock
+from pokemongo_bot.api_wrapper import CircuitOpenException
+from pokemongo_bot.clock import VirtualClock
+from pokemongo_bot.task_scheduler import TaskScheduler, Every, OnMapUpdate, OnInventoryChange, OnPositionChange
+from pokemongo_bot.worker_result import WorkerResult
+
+
+def make_worker(triggers=None, result=WorkerResult.SUCCESS):
+    worker = MagicMock()
+    worker.triggers.return_value = triggers
+    worker.work.return_value = result
+    return worker
+
+
+class TaskSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.real_clock = clock.get_clock()
+        self.clock = VirtualClock(start=0)
+        clock.set_clock(self.clock)
+        self.bot = MagicMock(last_time_map_object=0, position=(0, 0, 0))
+        self.scheduler = TaskScheduler(self.bot)
+
+    def tearDown(self):
+        clock.set_clock(self.real_clock)
+
+    def test_workers_without_triggers_always_run(self):
+        worker = make_worker()
+        for _ in range(3):
+            self.scheduler.run([worker])
+
+        self.assertEqual(worker.work.call_count, 3)
+
+    def test_workers_needing_a_paused_request_are_skipped(self):
+        worker = make_worker([Every(10)])
+        worker.work.side_effect = CircuitOpenException(['FORT_SEARCH'], 30)
+        other = make_worker()
+        self.scheduler.run([worker, other])
+
+        worker.work.side_effect = None
+        self.scheduler.run([worker, other])
+
+        self.assertEqual(worker.work.call_count, 2)
+        self.assertEqual(other.work.call_count, 2)
+
+    def test_interval(self):
+        worker = make_worker([Every(10)])
+        for now in range(25):
+            self.clock.now = now
+            self.scheduler.run([worker])
+
+        self.assertEqual(worker.work.call_count, 3)
+        self.assertEqual(self.scheduler.skipped, 22)
+
+    def test_map_update(self):
+        worker = make_worker([OnMapUpdate()])
+        self.scheduler.run([worker])
+        self.scheduler.run([worker])
+        self.bot.last_time_map_object = 5
+        self.scheduler.run([worker])
+
+        self.assertEqual(worker.work.call_count, 2)
+
+    @patch('pokemongo_bot.task_scheduler.inventory')
+    def test_inventory_change(self, inventory):
+        inventory.version.return_value = 1
+        worker = make_worker([OnInventoryChange()])
+        self.scheduler.run([worker])
+        self.scheduler.run([worker])
+        inventory.version.return_value = 2
+        self.scheduler.run([worker])
+
+        self.assertEqual(worker.work.call_count, 2)
+
+    def test_position_change(self):
+        worker = make_worker([OnPositionChange(50)])
+        self.scheduler.run([worker])
+        self.bot.position = (0.0001, 0, 0)
+        self.scheduler.run([worker])
+        self.bot.position = (0.001, 0, 0)
+        self.scheduler.run([worker])
+
+        self.assertEqual(worker.work.call_count, 2)
+
+    def test_running_workers_end_the_tick_and_run_again(self):
+        running = make_worker([Every(100)], result=WorkerResult.RUNNING)
+        other = make_worker()
+        self.scheduler.run([running, other])
+        self.scheduler.run([running, other])
+
+        self.assertEqual(running.work.call_count, 2)
+        other.work.assert_not_called()
+
+        running.work.return_value = WorkerResult.SUCCESS
+        self.scheduler.run([running, other])
+        self.scheduler.run([running, other])
+        self.assertEqual(running.work.call_count, 3)
+        self.assertEqual(other.work.call_count, 2)
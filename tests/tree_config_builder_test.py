@@ -105,6 +105,25 @@ class TreeConfigBuilderTest(unittest.TestCase):
         self.assertTrue(len(tree) == 1)
         self.assertIsInstance(tree[0], CatchPokemon)
 
+    def test_rebuilding_keeps_unchanged_tasks(self):
+        previous = TreeConfigBuilder(self.bot, convert_from_json("""[{
+                "type": "HandleSoftBan"
+            }, {
+                "type": "IncubateEggs",
+                "config": {"longer_eggs_first": true}
+            }]""")).build()
+
+        tree = TreeConfigBuilder(self.bot, convert_from_json("""[{
+                "type": "IncubateEggs",
+                "config": {"longer_eggs_first": false}
+            }, {
+                "type": "HandleSoftBan"
+            }]""")).build(previous=previous)
+
+        self.assertIsNot(tree[0], previous[1])
+        self.assertFalse(tree[0].config['longer_eggs_first'])
+        self.assertIs(tree[1], previous[0])
+
     def test_load_plugin_task(self):
         package_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'resources', 'plugin_fixture')
         plugin_loader = PluginLoader()
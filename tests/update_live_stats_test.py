@@ -59,46 +59,46 @@ class UpdateLiveStatsTestCase(unittest.TestCase):
 
         self.assertTrue(self.worker._should_display())
 
-    @patch('pokemongo_bot.cell_workers.update_live_stats.datetime')
-    def test_should_display_no_terminal_log_title(self, mock_datetime):
+    @patch('pokemongo_bot.cell_workers.update_live_stats.clock')
+    def test_should_display_no_terminal_log_title(self, mock_clock):
         # _should_display should return False if both terminal_title and terminal_log are false
         # in configuration, even if we're past next_update.
         now = datetime.now()
-        mock_datetime.now.return_value = now + timedelta(seconds=20)
+        mock_clock.datetime_now.return_value = now + timedelta(seconds=20)
         self.worker.next_update = now
         self.worker.terminal_log = False
         self.worker.terminal_title = False
 
         self.assertFalse(self.worker._should_display())
 
-    @patch('pokemongo_bot.cell_workers.update_live_stats.datetime')
-    def test_should_display_before_next_update(self, mock_datetime):
+    @patch('pokemongo_bot.cell_workers.update_live_stats.clock')
+    def test_should_display_before_next_update(self, mock_clock):
         now = datetime.now()
-        mock_datetime.now.return_value = now - timedelta(seconds=20)
+        mock_clock.datetime_now.return_value = now - timedelta(seconds=20)
         self.worker.next_update = now
 
         self.assertFalse(self.worker._should_display())
 
-    @patch('pokemongo_bot.cell_workers.update_live_stats.datetime')
-    def test_should_display_after_next_update(self, mock_datetime):
+    @patch('pokemongo_bot.cell_workers.update_live_stats.clock')
+    def test_should_display_after_next_update(self, mock_clock):
         now = datetime.now()
-        mock_datetime.now.return_value = now + timedelta(seconds=20)
+        mock_clock.datetime_now.return_value = now + timedelta(seconds=20)
         self.worker.next_update = now
 
         self.assertTrue(self.worker._should_display())
 
-    @patch('pokemongo_bot.cell_workers.update_live_stats.datetime')
-    def test_should_display_exactly_next_update(self, mock_datetime):
+    @patch('pokemongo_bot.cell_workers.update_live_stats.clock')
+    def test_should_display_exactly_next_update(self, mock_clock):
         now = datetime.now()
-        mock_datetime.now.return_value = now
+        mock_clock.datetime_now.return_value = now
         self.worker.next_update = now
 
         self.assertTrue(self.worker._should_display())
 
-    @patch('pokemongo_bot.cell_workers.update_live_stats.datetime')
-    def test_compute_next_update(self, mock_datetime):
+    @patch('pokemongo_bot.cell_workers.update_live_stats.clock')
+    def test_compute_next_update(self, mock_clock):
         now = datetime.now()
-        mock_datetime.now.return_value = now
+        mock_clock.datetime_now.return_value = now
         old_next_display_value = self.worker.next_update
         self.worker._compute_next_update()
 